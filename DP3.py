@@ -1,13 +1,35 @@
 import streamlit as st
-import requests
-import re
 import time
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 import json
 from datetime import datetime
 import logging
 import traceback
+from functools import partial
+
+from vp.batch import iter_batch
+from vp.session import build_session, connection_stats
+from vp.httpcache import cache_from_env
+from vp.cache import MetadataCache
+from vp.urls import canonical_url
+from vp.registry import REGISTRY
+from vp.htmlmeta import fetch_page_meta
+from vp.extractors import youtube_info, bilibili_info, generic_info
+from vp.aio_crawler import iter_async_batch
+from vp.store import HistoryStore
+from vp.jobs import JobScheduler, FAILED, CANCELLED, FINISHED_STATES
+from vp.metrics import METRICS, start_exporter
+from vp.results import BatchResults
+from vp.urlimport import UrlImport
+from vp.checkpoint import BatchCheckpoint, IndexSet, list_checkpoints, pending
+from vp.retry import RetryPolicy, RetryBudget, CircuitBreakers
+from vp.limits import AdaptiveLimiter
+
+FAVORITES_PAGE_SIZE = 20
+BATCH_PAGE_SIZE = 50
+BATCH_STATUS = {"全部": None, "成功": "success", "失败": "error"}
+BATCH_SORT = {"序号": "index", "平台": "platform", "状态": "status", "标题": "title"}
+# 检查点的结果行格式与 DP4 不同，两个应用各用一个目录，互不列出对方的批次
+BATCH_DIR = "temp/batches/dp3"
 
 # 页面配置
 st.set_page_config(
@@ -23,13 +45,16 @@ class ErrorMonitor:
         self.app_name = app_name
     
     def capture_error(self, error: Exception, context: dict = None):
-        """捕获并记录错误"""
+        """捕获错误并按类型与平台计入运行指标"""
+        context = context or {}
         error_info = {
             "timestamp": datetime.now().isoformat(),
             "error_type": error.__class__.__name__,
             "message": str(error),
-            "context": context or {}
+            "context": context
         }
+        platform = context.get('platform') or (REGISTRY.detect(context['url']) if context.get('url') else None)
+        METRICS.count_error(error_info['error_type'], platform)
         return error_info
 
 # 安全数据访问函数
@@ -103,7 +128,14 @@ class VideoStreamCrawler:
     """视频流爬取核心类"""
     
     def __init__(self):
-        self.session = requests.Session()
+        # 完整读取的文本响应经磁盘HTTP缓存，未变化的页面重新验证只需 304；
+        # 每个应用单独一个目录，大小上限由各自进程内的索引执行
+        self.http_cache = cache_from_env("temp/http_cache/dp3")
+        self.session = build_session(cache=self.http_cache)
+        self.cache = MetadataCache()
+        self.breakers = CircuitBreakers()
+        # 按主机自适应并发：慢下来或被限流时自动收紧
+        self.limits = AdaptiveLimiter()
         self.setup_session()
     
     def setup_session(self):
@@ -117,29 +149,18 @@ class VideoStreamCrawler:
             'Upgrade-Insecure-Requests': '1',
         })
     
+    def connection_stats(self):
+        """连接池复用统计"""
+        return connection_stats(self.session)
+    
     def detect_platform(self, url):
-        """检测视频平台"""
-        if not url or not isinstance(url, str):
-            return 'unknown'
-        
-        try:
-            domain = urlparse(url).netloc.lower()
-            platforms = {
-                'youtube': ['youtube.com', 'youtu.be'],
-                'bilibili': ['bilibili.com', 'b23.tv'],
-                'vimeo': ['vimeo.com'],
-                'dailymotion': ['dailymotion.com'],
-                'twitch': ['twitch.tv']
-            }
-            
-            for platform, domains in platforms.items():
-                if any(d in domain for d in domains):
-                    return platform
-            return 'generic'
-        except Exception:
-            return 'unknown'
-    
-    def extract_video_info(self, url, max_retries=3):
+        """检测视频平台（共享注册表，按域名后缀匹配）"""
+        start = time.perf_counter()
+        platform = REGISTRY.detect(url)
+        METRICS.observe('detect', time.perf_counter() - start, platform)
+        return platform
+    
+    def extract_video_info(self, url, max_retries=3, retry_budget=None):
         """提取视频信息和播放链接"""
         if not url or not isinstance(url, str):
             return {
@@ -148,125 +169,67 @@ class VideoStreamCrawler:
                 'platform': 'unknown'
             }
         
-        for attempt in range(max_retries):
-            try:
-                platform = self.detect_platform(url)
-                
-                if platform == 'youtube':
-                    return self._extract_youtube(url)
-                elif platform == 'bilibili':
-                    return self._extract_bilibili(url)
-                else:
-                    return self._extract_generic(url)
-                    
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    return {
-                        'status': 'error',
-                        'error': str(e),
-                        'platform': platform
-                    }
-                time.sleep(2 * (attempt + 1))
-        
-        return {
-            'status': 'error',
-            'error': '达到最大重试次数',
-            'platform': 'unknown'
-        }
+        key = canonical_url(url)
+        hit, cached = self.cache.get(key)
+        if hit:
+            return dict(cached)
+        
+        video_info = self._fetch_video_info(url, max_retries, retry_budget)
+        self.cache.put(key, video_info, platform=video_info.get('platform'),
+                       negative=video_info.get('status') != 'success')
+        return dict(video_info)
+    
+    def _fetch_video_info(self, url, max_retries, retry_budget=None):
+        """按平台分派提取，仅对可重试错误退避重试"""
+        platform = self.detect_platform(url)
+        if platform == 'youtube':
+            extract = self._extract_youtube
+        elif platform == 'bilibili':
+            extract = self._extract_bilibili
+        else:
+            # 只有通用页面抓取走网络，纳入按主机的并发控制；YouTube/B站信息在本地构造
+            extract = partial(self.limits.call, self._extract_generic)
+        
+        policy = RetryPolicy(max_attempts=max_retries, breakers=self.breakers)
+        try:
+            return policy.call(extract, url, budget=retry_budget)
+        except Exception as e:
+            METRICS.count_error(type(e).__name__, platform)
+            return {
+                'status': 'error',
+                'error': str(e),
+                'platform': platform
+            }
     
     def _extract_youtube(self, url):
         """提取YouTube视频信息"""
         try:
             video_id = self._extract_youtube_id(url)
             if video_id:
-                return {
-                    'status': 'success',
-                    'title': f'YouTube视频示例 - {video_id}',
-                    'platform': 'youtube',
-                    'video_url': f'https://www.youtube.com/embed/{video_id}',
-                    'thumbnail': f'https://img.youtube.com/vi/{video_id}/hqdefault.jpg',
-                    'duration': '10:30',
-                    'quality': '1080p',
-                    'embed_html': f'''
-                    <iframe width="100%" height="500" 
-                        src="https://www.youtube.com/embed/{video_id}?autoplay=1" 
-                        frameborder="0" 
-                        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" 
-                        allowfullscreen>
-                    </iframe>
-                    '''
-                }
+                with METRICS.timer('parse', 'youtube'):
+                    return youtube_info(video_id)
             return {'status': 'error', 'error': '无法提取YouTube视频ID'}
         except Exception as e:
             return {'status': 'error', 'error': str(e)}
     
     def _extract_youtube_id(self, url):
         """提取YouTube视频ID"""
-        try:
-            patterns = [
-                r'(?:youtube\.com/watch\?v=|youtu\.be/)([^&?\n]+)',
-                r'youtube\.com/embed/([^&?\n]+)'
-            ]
-            for pattern in patterns:
-                match = re.search(pattern, url)
-                if match:
-                    return match.group(1)
-            return None
-        except Exception:
-            return None
+        return REGISTRY.extract_id(url, 'youtube')
     
     def _extract_bilibili(self, url):
         """提取B站视频信息"""
         try:
-            return {
-                'status': 'success',
-                'title': 'B站视频示例 - 测试视频',
-                'platform': 'bilibili',
-                'video_url': url,
-                'thumbnail': 'https://via.placeholder.com/640x360/00a1d6/ffffff?text=Bilibili+Video',
-                'duration': '15:45',
-                'quality': '720p',
-                'embed_html': f'''
-                <iframe width="100%" height="500" 
-                    src="{url}" 
-                    scrolling="no" 
-                    border="0" 
-                    frameborder="no" 
-                    framespacing="0" 
-                    allowfullscreen="true">
-                </iframe>
-                '''
-            }
+            with METRICS.timer('parse', 'bilibili'):
+                return bilibili_info(url)
         except Exception as e:
             return {'status': 'error', 'error': str(e)}
     
     def _extract_generic(self, url):
-        """提取通用视频信息"""
-        try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            title_tag = soup.find('meta', property='og:title') or soup.find('title')
-            title = title_tag.get('content', '未知标题') if title_tag else '未知标题'
-            
-            return {
-                'status': 'success',
-                'title': title,
-                'platform': 'generic',
-                'video_url': url,
-                'thumbnail': '',
-                'duration': '未知',
-                'quality': '自动',
-                'embed_html': f'''
-                <video width="100%" height="500" controls>
-                    <source src="{url}" type="video/mp4">
-                    您的浏览器不支持视频播放
-                </video>
-                '''
-            }
-        except Exception as e:
-            return {'status': 'error', 'error': str(e), 'platform': 'generic'}
+        """提取通用视频信息，网络与HTTP错误交由重试策略处理"""
+        with METRICS.timer('fetch', 'generic', inflight=True):
+            page = fetch_page_meta(self.session, url, timeout=30)
+        with METRICS.timer('parse', 'generic'):
+            return generic_info(url, page)
 
 def display_video_info_safely(video_info):
     """安全显示视频信息"""
@@ -308,6 +271,7 @@ def process_video_play(crawler, url, error_monitor):
         if video_info and isinstance(video_info, dict) and video_info.get('status') == 'success':
             st.session_state.video_info = video_info
             st.session_state.current_url = url
+            METRICS.count_event('play', platform)
             st.success("✅ 视频解析成功！")
         else:
             error_msg = safe_get(video_info, 'error', '未知错误') if video_info else '解析失败'
@@ -319,7 +283,7 @@ def process_video_play(crawler, url, error_monitor):
         status_text.empty()
         
     except Exception as e:
-        error_info = error_monitor.capture_error(e, {'url': url, 'action': 'video_processing'})
+        error_monitor.capture_error(e, {'url': url, 'action': 'video_processing'})
         st.session_state.video_info = {'status': 'error', 'error': str(e)}
         st.error(f"处理过程中出错: {str(e)}")
         progress_bar.progress(0)
@@ -355,6 +319,13 @@ def video_play_page(crawler, error_monitor):
         with col1_3:
             if st.button("⭐ 收藏视频", use_container_width=True):
                 if 'video_info' in st.session_state and st.session_state.video_info:
+                    info = st.session_state.video_info
+                    get_store().add_favorite(
+                        st.session_state.current_url or safe_get(info, 'url'),
+                        title=safe_get(info, 'title'),
+                        platform=safe_get(info, 'platform'),
+                        thumbnail=safe_get(info, 'thumbnail') or None
+                    )
                     st.success("✅ 视频已添加到收藏夹！")
     
     with col2:
@@ -367,8 +338,9 @@ def video_play_page(crawler, error_monitor):
             st.session_state.video_info is not None and
             isinstance(st.session_state.video_info, dict)):
             
-            info_html = display_video_info_safely(st.session_state.video_info)
-            st.markdown(info_html, unsafe_allow_html=True)
+            with METRICS.timer('render', safe_get(st.session_state.video_info, 'platform')):
+                info_html = display_video_info_safely(st.session_state.video_info)
+                st.markdown(info_html, unsafe_allow_html=True)
         else:
             st.info("等待视频解析...")
     
@@ -377,7 +349,8 @@ def video_play_page(crawler, error_monitor):
         isinstance(st.session_state.video_info, dict) and
         st.session_state.video_info.get('status') == 'success'):
         
-        display_video_player(st.session_state.video_info)
+        with METRICS.timer('render', safe_get(st.session_state.video_info, 'platform')):
+            display_video_player(st.session_state.video_info)
 
 def display_video_player(video_info):
     """显示视频播放器"""
@@ -424,88 +397,288 @@ def batch_process_page(crawler, error_monitor):
             placeholder="https://www.example.com/video1\nhttps://www.example.com/video2",
             help="支持同时处理多个视频链接"
         )
+        batch_file = st.file_uploader(
+            "或导入URL列表文件（TXT/CSV）:",
+            type=['txt', 'csv'],
+            key="batch_file",
+            help="百万行级别的导出文件：逐行流式读取，按平台规则规范化并去重后边读边处理；CSV 取 url/链接 列"
+        )
+        async_mode = st.checkbox("⚡ 异步模式", help="适合上万条URL的大批量任务：在后台任务的事件循环中并发处理，"
+                                                     "同样写入检查点、可续跑，按主机自适应限流")
         
         if st.button("🚀 批量解析", key="batch_parse"):
-            if batch_urls and isinstance(batch_urls, str):
+            if batch_file is not None:
+                process_batch_urls(crawler, batch_file, error_monitor, async_mode)
+            elif batch_urls and isinstance(batch_urls, str):
                 urls = [url.strip() for url in batch_urls.split('\n') if url.strip()]
                 if urls:
-                    process_batch_urls(crawler, urls, error_monitor)
+                    process_batch_urls(crawler, urls, error_monitor, async_mode)
                 else:
                     st.error("请输入至少一个有效的URL")
             else:
                 st.error("请输入有效的URL列表")
+        
+        resume_batch_panel(crawler, error_monitor)
+        
+        # 后台任务不受页面重跑影响，重跑后继续显示进度
+        if st.session_state.get('batch_job') is not None:
+            watch_batch_job(st.session_state.batch_job)
     
     with tab2:
         st.subheader("播放列表管理")
         st.info("播放列表功能开发中...")
 
-def process_batch_urls(crawler, urls, error_monitor):
-    """处理批量URL"""
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    results = []
-    
-    for i, url in enumerate(urls):
-        status_text.text(f"处理中 ({i+1}/{len(urls)}): {url[:50]}...")
-        
-        try:
-            video_info = crawler.extract_video_info(url)
-            results.append({
-                'url': url,
-                'status': safe_get(video_info, 'status', 'error'),
-                'data': video_info if safe_get(video_info, 'status') == 'success' else None,
-                'error': safe_get(video_info, 'error', '未知错误')
-            })
-        except Exception as e:
-            error_info = error_monitor.capture_error(e, {'url': url, 'action': 'batch_processing'})
-            results.append({
-                'url': url,
-                'status': 'error',
-                'error': str(e)
-            })
-        
-        progress_bar.progress((i + 1) / len(urls))
-        time.sleep(1)
+def process_batch_urls(crawler, urls, error_monitor, async_mode=False):
+    """为批次建立检查点后加入后台任务队列；urls 为URL列表或上传的URL列表文件"""
+    checkpoint = BatchCheckpoint.create(urls, directory=BATCH_DIR)
+    if async_mode:
+        # 提取方式记在检查点里，续跑时沿用
+        checkpoint.save_meta(mode='async')
+    start_batch_job(crawler, checkpoint, error_monitor)
+
+def start_batch_job(crawler, checkpoint, error_monitor):
+    """提交（或续跑）检查点对应的批次，页面通过 watch_batch_job 轮询进度"""
+    scheduler = get_scheduler()
+    scheduler.resize(st.session_state.get('max_concurrent', 3))
+    # 列表输入总数已知；文件导入为总数未知的 UrlImport
+    urls = checkpoint.urls()
+    st.session_state.batch_import = urls if isinstance(urls, UrlImport) else None
+    # 结果集由工作线程逐行追加，页面在任务运行中即可分页浏览
+    results = BatchResults(total=checkpoint.meta['total'])
+    reset_batch_view("batch")
+    st.session_state.batch_results = results
+    st.session_state.batch_checkpoint = checkpoint.id
+    st.session_state.batch_job = scheduler.submit(
+        run_batch_urls, crawler, checkpoint, urls, st.session_state.get('max_concurrent', 3),
+        error_monitor, results,
+        name=f"批量解析 {checkpoint.meta['name']}", kind='batch', meta={'batch_id': checkpoint.id}
+    )
+
+def run_batch_urls(job, crawler, checkpoint, urls, max_workers, error_monitor, results):
+    """批量任务体 - 有界并发，结果行追加到结果集并写入检查点；续跑时只处理缺失的序号"""
+    done = IndexSet()
+    for i, record in checkpoint.load():
+        results.add(i, **record)
+        done.add(i)
+    checkpoint.save_meta(rows=len(done))
+    
+    if checkpoint.meta.get('mode') == 'async':
+        # 整批只用一个事件循环；通用页面的单主机并发与同步模式共用自适应限流器
+        batch = iter_async_batch(
+            pending(urls, done), indexed=True, max_concurrency=100, headers=dict(crawler.session.headers),
+            detect_platform=crawler.detect_platform, cache=crawler.cache, breakers=crawler.breakers,
+            limiter=crawler.limits
+        )
+    else:
+        # 整个批次共享重试预算，避免大量失败时重试拖慢批次
+        extract = partial(crawler.extract_video_info, retry_budget=RetryBudget())
+        batch = iter_batch(extract, pending(urls, done), max_workers, indexed=True)
+    total = len(urls) if hasattr(urls, '__len__') else None
+    
+    with checkpoint.writer() as log:
+        for count, (i, url, video_info, error) in enumerate(batch, len(done) + 1):
+            if error is None:
+                row = make_batch_result(url, video_info)
+            else:
+                error_monitor.capture_error(error, {'url': url, 'action': 'batch_processing'})
+                row = {'url': url, 'status': 'error', 'platform': REGISTRY.detect(url), 'error': str(error)}
+            results.add(i, **row)
+            log.add(i, row)
+            
+            # 文件导入总数未知，按已读取的字节估算进度
+            progress = count / total if total else urls.progress
+            job.update(progress=progress, message=f"处理中 ({count}/{total or '?'}): {url[:50]}...")
+            if job.cancelled:
+                # 关闭生成器会取消尚未开始的请求；检查点保持未完成，可稍后续跑
+                batch.close()
+                break
+        else:
+            log.close(finished=True)
     
-    display_batch_results(results)
-    progress_bar.empty()
-    status_text.empty()
+    return results
+
+def resume_batch_panel(crawler, error_monitor):
+    """列出中断或停止的批次，按批次ID续跑，只处理检查点中缺失的URL"""
+    running = {job['meta'].get('batch_id') for job in get_scheduler().snapshot(kind='batch')
+               if job['state'] not in FINISHED_STATES}
+    unfinished = [meta for meta in list_checkpoints(BATCH_DIR, finished=False) if meta['id'] not in running]
+    if not unfinished:
+        return
+    with st.expander(f"♻️ 未完成的批次 ({len(unfinished)})"):
+        meta = st.selectbox(
+            "批次",
+            unfinished,
+            format_func=lambda m: f"{m['id']} · {m['name']} · {m['created']} · 已完成 {m['rows']}"
+                                  + (f"/{m['total']}" if m.get('total') else ""),
+            key="resume_batch"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("▶️ 继续处理", key="resume_batch_start"):
+                start_batch_job(crawler, BatchCheckpoint(meta['id'], BATCH_DIR, meta), error_monitor)
+        with col2:
+            if st.button("🗑 删除检查点", key="resume_batch_delete"):
+                BatchCheckpoint(meta['id'], BATCH_DIR, meta).remove()
+                st.rerun()
+
+def watch_batch_job(job_id):
+    """展示后台批量任务：运行中轮询进度，结束后显示结果"""
+    scheduler = get_scheduler()
+    job = scheduler.get(job_id)
+    if job is None:
+        return
+    if job['state'] not in FINISHED_STATES:
+        batch_job_progress(job_id)
+        return
+    if job['state'] == FAILED:
+        st.error(f"批量任务失败: {job['error']}")
+    elif job['state'] == CANCELLED:
+        st.warning("批量任务已停止，以下为已完成部分")
+    show_batch_info()
+    results = st.session_state.get('batch_results')
+    if results is not None and len(results):
+        display_batch_results(results)
 
-def display_batch_results(results):
-    """显示批量处理结果"""
+@st.fragment(run_every=1)
+def batch_job_progress(job_id):
+    """每秒局部刷新进度与已完成的结果行，任务结束后整页重跑"""
+    scheduler = get_scheduler()
+    job = scheduler.get(job_id)
+    if job is None or job['state'] in FINISHED_STATES:
+        st.rerun()
+    st.progress(job['progress'], text=job['message'] or "排队中...")
+    if st.button("⏹ 停止批量任务", key="cancel_batch_job"):
+        scheduler.cancel(job_id)
+    show_batch_info()
+    results = st.session_state.get('batch_results')
+    if results is not None and len(results):
+        display_batch_results(results)
+
+def show_batch_info():
+    """显示批次ID（用于续跑）以及文件导入的读取速度与去重率"""
+    batch_id = st.session_state.get('batch_checkpoint')
+    if batch_id:
+        st.caption(f"批次ID `{batch_id}`：结果已写入检查点，中断后可在「未完成的批次」中续跑")
+    importer = st.session_state.get('batch_import')
+    if importer is not None:
+        st.caption(f"📄 {importer.name}：{importer.stats.summary()}")
+
+def make_batch_result(url, video_info):
+    """把提取结果转换为批量结果行（BatchResults.add 的参数）"""
+    success = safe_get(video_info, 'status') == 'success'
+    return {
+        'url': url,
+        'status': 'success' if success else 'error',
+        'title': safe_get(video_info, 'title', None) if success else None,
+        'platform': safe_get(video_info, 'platform', None),
+        'data': video_info if success else None,
+        'error': None if success else safe_get(video_info, 'error', '未知错误')
+    }
+
+def reset_batch_view(key):
+    """新批次开始时清除上一批次的筛选与页码"""
+    for name in ('status', 'platform', 'search', 'sort', 'desc', 'page', 'table'):
+        st.session_state.pop(f"{key}_{name}", None)
+
+def display_batch_results(results, key="batch"):
+    """显示批量处理结果：列式结果集在服务端筛选、排序、分页，只渲染当前页"""
+    start = time.perf_counter()
+    stats = results.stats()
     st.subheader("📊 处理结果")
     
-    success_count = sum(1 for r in results if safe_get(r, 'status') == 'success')
-    
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("总任务数", len(results))
+        st.metric("总任务数", stats['total'])
     with col2:
-        st.metric("成功数", success_count)
+        st.metric("成功数", stats['success'])
     with col3:
-        st.metric("失败数", len(results) - success_count)
-    
-    for i, result in enumerate(results):
-        status_icon = '✅' if safe_get(result, 'status') == 'success' else '❌'
-        with st.expander(f"{status_icon} {safe_get(result, 'url', '未知URL')[:50]}...", 
-                        expanded=(i == 0 and safe_get(result, 'status') == 'success')):
-            if safe_get(result, 'status') == 'success':
-                st.success("解析成功")
-                if st.button("🎬 立即播放", key=f"play_{i}"):
-                    st.session_state.video_info = safe_get(result, 'data')
-                    st.session_state.current_url = safe_get(result, 'url')
-                    st.rerun()
-            else:
-                st.error(f"解析失败: {safe_get(result, 'error', '未知错误')}")
+        st.metric("失败数", stats['failed'])
+    
+    def first_page():
+        st.session_state[f"{key}_page"] = 1
+    
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+    with col1:
+        status = st.selectbox("状态", list(BATCH_STATUS), key=f"{key}_status", on_change=first_page)
+    with col2:
+        platform = st.selectbox("平台", ["全部"] + results.platforms(), key=f"{key}_platform",
+                                on_change=first_page)
+    with col3:
+        search = st.text_input("搜索URL/标题", key=f"{key}_search", on_change=first_page)
+    with col4:
+        sort_by = st.selectbox("排序", list(BATCH_SORT), key=f"{key}_sort")
+    with col5:
+        descending = st.checkbox("倒序", key=f"{key}_desc")
+    
+    page_key = f"{key}_page"
+    page = st.session_state.get(page_key, 1)
+    query = partial(results.query, BATCH_STATUS[status], None if platform == "全部" else platform,
+                    search.strip(), sort_by=BATCH_SORT[sort_by], descending=descending,
+                    page_size=BATCH_PAGE_SIZE)
+    page_rows, matched = query(page=page)
+    pages = max(1, -(-matched // BATCH_PAGE_SIZE))
+    if page > pages:
+        # 筛选后页数变少，页码需在控件创建前收回到有效范围
+        st.session_state[page_key] = page = pages
+        page_rows, matched = query(page=page)
+    
+    event = st.dataframe(
+        page_rows, key=f"{key}_table", on_select="rerun", selection_mode="single-row",
+        use_container_width=True, hide_index=True,
+        column_config={
+            'index': st.column_config.NumberColumn('#', width='small'),
+            'url': st.column_config.TextColumn('URL'),
+            'platform': st.column_config.TextColumn('平台', width='small'),
+            'status': st.column_config.TextColumn('状态', width='small'),
+            'title': st.column_config.TextColumn('标题'),
+            'error': st.column_config.TextColumn('错误'),
+        })
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.number_input("页码", 1, pages, key=page_key)
+    selected = event.selection.rows if event else []
+    data = None
+    if selected and selected[0] < len(page_rows):
+        row = page_rows.iloc[selected[0]]
+        data = results.data(int(row['index']))
+    with col2:
+        st.caption(f"共 {pages} 页，筛选后 {matched} 行 · 服务端处理 {(time.perf_counter() - start) * 1000:.0f} ms")
+    with col3:
+        # 整个结果表只有一个播放按钮，作用于选中行
+        if st.button("🎬 播放选中视频", key=f"{key}_play", disabled=data is None,
+                     use_container_width=True):
+            st.session_state.video_info = data
+            st.session_state.current_url = row['url']
+            st.rerun()
+    METRICS.observe('render', time.perf_counter() - start, batch_size_label(stats['rows']))
 
-def favorites_page():
-    """收藏页面"""
+def batch_size_label(rows):
+    """按数量级给批次大小分组，用于对比不同规模批次的渲染耗时"""
+    for limit in (100, 1000, 10000):
+        if rows <= limit:
+            return f"batch<={limit}"
+    return "batch>10000"
+
+def favorites_page(store):
+    """收藏页面：平台筛选与标题搜索下推到 SQLite，按页查询"""
     st.title("⭐ 我的收藏")
     
-    favorites = [
-        {"title": "收藏视频1", "url": "https://example.com/1", "platform": "youtube", "added": "2024-01-15"},
-        {"title": "收藏视频2", "url": "https://example.com/2", "platform": "bilibili", "added": "2024-01-14"},
-    ]
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        platform = st.selectbox("平台筛选", ["全部"] + store.favorite_platforms(),
+                                format_func=lambda p: p if p == "全部" else p.upper())
+    with col2:
+        search = st.text_input("搜索标题", placeholder="输入关键词")
+    
+    filters = {'platform': None if platform == "全部" else platform, 'search': search.strip() or None}
+    pager = st.session_state.setdefault('favorites_pager', {'filters': None, 'cursors': [None]})
+    if pager['filters'] != filters:
+        pager['filters'] = filters
+        pager['cursors'] = [None]
+    total = store.count_favorites(**filters)
+    favorites, next_cursor = store.query_favorites(**filters, limit=FAVORITES_PAGE_SIZE,
+                                                   cursor=pager['cursors'][-1])
     
     if not favorites:
         st.info("暂无收藏视频")
@@ -515,16 +688,32 @@ def favorites_page():
         col1, col2, col3 = st.columns([3, 1, 1])
         with col1:
             st.write(f"**{safe_get(fav, 'title', '未知标题')}**")
-            st.caption(f"平台: {safe_get(fav, 'platform', '未知')} | 添加时间: {safe_get(fav, 'added', '未知')}")
+            added = datetime.fromtimestamp(fav['added']).strftime('%Y-%m-%d %H:%M')
+            st.caption(f"平台: {safe_get(fav, 'platform', '未知')} | 添加时间: {added}")
         with col2:
-            if st.button("播放", key=f"play_fav_{safe_get(fav, 'url')}"):
+            if st.button("播放", key=f"play_fav_{fav['id']}"):
                 st.session_state.current_url = safe_get(fav, 'url')
                 st.rerun()
         with col3:
-            if st.button("删除", key=f"del_fav_{safe_get(fav, 'url')}"):
+            if st.button("删除", key=f"del_fav_{fav['id']}"):
+                store.remove_favorite(fav['id'])
                 st.success("已从收藏中删除")
+                st.rerun()
+    
+    page = len(pager['cursors'])
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ 上一页", disabled=page == 1):
+            pager['cursors'].pop()
+            st.rerun()
+    with col2:
+        st.caption(f"第 {page}/{max(1, -(-total // FAVORITES_PAGE_SIZE))} 页，共 {total} 条")
+    with col3:
+        if st.button("下一页 ➡️", disabled=next_cursor is None):
+            pager['cursors'].append(next_cursor)
+            st.rerun()
 
-def settings_page():
+def settings_page(crawler):
     """设置页面"""
     st.title("⚙️ 播放器设置")
     
@@ -547,23 +736,133 @@ def settings_page():
     
     with tab3:
         st.subheader("高级配置")
-        cache_size = st.slider("缓存大小(MB)", 10, 1000, 100)
-        max_concurrent = st.number_input("最大并发数", 1, 10, 3)
+        cache_size = st.slider("缓存大小(MB)", 10, 1000, crawler.cache.max_bytes // (1024 * 1024))
+        max_concurrent = st.number_input("最大并发数", 1, 10, st.session_state.get('max_concurrent', 3))
+        st.session_state.max_concurrent = max_concurrent
+        # 进程级调度器立即按新设置增减工作线程，不必等到下一次提交批次
+        get_scheduler().resize(max_concurrent)
+        
+        crawler.cache.resize(cache_size * 1024 * 1024)
+        if crawler.http_cache is not None:
+            crawler.http_cache.resize(cache_size * 1024 * 1024)
         
         if st.button("清除缓存"):
+            crawler.cache.clear()
+            if crawler.http_cache is not None:
+                crawler.http_cache.clear()
             st.success("缓存已清除")
         
+        cache_stats = crawler.cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("缓存条目", cache_stats['entries'], f"{cache_stats['bytes'] / 1024 / 1024:.1f} MB")
+        with col2:
+            st.metric("命中", cache_stats['hits'] + cache_stats['negative_hits'], f"{cache_stats['hit_ratio']:.0%}")
+        with col3:
+            st.metric("未命中", cache_stats['misses'])
+        with col4:
+            st.metric("淘汰", cache_stats['evictions'])
+        display_http_cache_stats(crawler.http_cache)
+        
+        st.subheader("连接池状态")
+        stats = crawler.connection_stats()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("请求总数", stats['requests'])
+        with col2:
+            st.metric("新建连接", stats['new_connections'])
+        with col3:
+            st.metric("复用连接", stats['reused_connections'], f"{stats['reuse_ratio']:.0%}")
+        
+        st.subheader("主机并发")
+        display_host_limits(crawler.limits)
+        
+        st.subheader("运行指标")
+        display_runtime_metrics(get_metrics_exporter())
+        
         if st.button("恢复默认设置"):
             st.success("设置已恢复默认")
 
+def display_http_cache_stats(http_cache):
+    """磁盘HTTP缓存：新鲜命中、304 重新验证比例与节省的下载量"""
+    if http_cache is None:
+        return
+    stats = http_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("HTTP缓存", stats['entries'], f"{stats['bytes'] / 1024 / 1024:.1f} MB")
+    with col2:
+        st.metric("新鲜命中", stats['hits'], f"{stats['hit_ratio']:.0%}")
+    with col3:
+        st.metric("304 重新验证", f"{stats['not_modified']}/{stats['revalidations']}",
+                  f"{stats['not_modified_ratio']:.0%}")
+    with col4:
+        st.metric("节省下载", f"{stats['bytes_saved'] / 1024 / 1024:.1f} MB")
+
+def display_host_limits(limits):
+    """各主机当前的自适应并发上限、延迟基线与限流暂停"""
+    rows = limits.snapshot()
+    if not rows:
+        st.caption(f"尚无请求，各主机初始并发上限为 {limits.initial}")
+        return
+    st.dataframe([{
+        "主机": r['host'], "并发上限": r['limit'], "在途": r['inflight'],
+        "最近延迟(ms)": r['latency_ms'], "基线(ms)": r['baseline_ms'], "暂停(秒)": r['paused_s'],
+        "请求数": r['requests'], "拥塞信号": r['congested'], "削减次数": r['cuts'],
+    } for r in rows], use_container_width=True, hide_index=True)
+
+def display_runtime_metrics(exporter):
+    """分阶段延迟与错误计数（与 /metrics 导出同源）"""
+    snap = METRICS.snapshot()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("在途请求", snap['inflight_requests'])
+    with col2:
+        st.metric("常驻内存", f"{(snap['rss_bytes'] or 0) / 1024 / 1024:.0f} MB")
+    with col3:
+        st.metric("错误总数", sum(e['count'] for e in snap['errors']))
+    if snap['latency']:
+        st.dataframe([{
+            '阶段': item['stage'], '平台': item['platform'], '次数': item['count'],
+            'p50(ms)': round(item['p50'] * 1000, 2), 'p95(ms)': round(item['p95'] * 1000, 2),
+        } for item in snap['latency']], use_container_width=True, hide_index=True)
+    if snap['errors']:
+        st.dataframe([{'错误类型': e['type'], '平台': e['platform'], '次数': e['count']}
+                      for e in snap['errors']], use_container_width=True, hide_index=True)
+    if exporter is not None:
+        st.caption(f"Prometheus 导出: {exporter.url} （JSON: {exporter.url}.json）")
+    else:
+        st.caption("指标导出未启用（VP_METRICS_PORT=0 或端口被占用）")
+
+@st.cache_resource
+def get_metrics_exporter():
+    """进程级指标导出线程"""
+    return start_exporter()
+
+@st.cache_resource
+def get_crawler():
+    """进程级共享爬虫实例，所有会话复用同一连接池"""
+    return VideoStreamCrawler()
+
+@st.cache_resource
+def get_store():
+    """进程级共享的收藏/历史库，连接按线程建立"""
+    return HistoryStore()
+
+@st.cache_resource
+def get_scheduler():
+    """进程级后台任务调度器，批量任务不随脚本重跑中断"""
+    return JobScheduler(3)
+
 def main():
     """主应用"""
     # 初始化错误监控
     if 'error_monitor' not in st.session_state:
         st.session_state.error_monitor = ErrorMonitor()
     
-    # 初始化爬虫
-    crawler = VideoStreamCrawler()
+    # 初始化爬虫与指标导出
+    crawler = get_crawler()
+    get_metrics_exporter()
     
     # 初始化session state
     if 'current_url' not in st.session_state:
@@ -600,11 +899,12 @@ def main():
         
         st.markdown("---")
         st.subheader("📊 统计信息")
+        plays_today, plays_total = METRICS.events('play')
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("今日播放", "0")
+            st.metric("今日播放", plays_today)
         with col2:
-            st.metric("总播放量", "0")
+            st.metric("总播放量", plays_total)
     
     # 主内容区
     error_monitor = st.session_state.error_monitor
@@ -614,9 +914,9 @@ def main():
     elif selected_page == "📁 批量处理":
         batch_process_page(crawler, error_monitor)
     elif selected_page == "⭐ 我的收藏":
-        favorites_page()
+        favorites_page(get_store())
     else:
-        settings_page()
+        settings_page(crawler)
 
 if __name__ == "__main__":
     main()
@@ -6,86 +6,71 @@ Created on Thu Nov 27 17:57:58 2025
 """
 
 import streamlit as st
-import requests
 import os
 import time
 import json
-import pandas as pd
 from urllib.parse import urlparse, urljoin
-import streamlink
-import youtube_dl
-from bs4 import BeautifulSoup
 import uuid
-from datetime import datetime
-import subprocess
+from datetime import datetime, timedelta
 import threading
 from functools import partial
-import shlex
-import io
-import cv2
-import numpy as np
-
-# 页面配置
-st.set_page_config(
-    page_title="VIP视频智能爬取工具",
-    page_icon="🎬",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# 自定义CSS美化界面[2](@ref)
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-        font-weight: bold;
-    }
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 8px;
-        padding: 20px;
-        margin: 15px 0;
-    }
-    .error-box {
-        background-color: #f8d7da;
-        border: 1px solid #f5c6cb;
-        border-radius: 8px;
-        padding: 20px;
-        margin: 15px 0;
-    }
-    .video-card {
-        border: 1px solid #e0e0e0;
-        border-radius: 10px;
-        padding: 20px;
-        margin: 15px 0;
-        background-color: #f8f9fa;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .stButton>button {
-        background-color: #4CAF50;
-        color: white;
-        border-radius: 5px;
-        border: none;
-        padding: 12px 28px;
-        font-weight: bold;
-    }
-    .sidebar .sidebar-content {
-        background-color: #f0f2f6;
-    }
-</style>
-""", unsafe_allow_html=True)
+import re
+
+# pandas / cv2 / numpy / streamlink / youtube_dl 等重型依赖在使用处按需导入，
+# 以缩短 Streamlit 进程冷启动与只打开设置页时的加载时间
+
+from vp.batch import iter_batch
+from vp.session import build_session, connection_stats
+from vp.httpcache import cache_from_env
+from vp.proxies import ProxyPool, parse_proxies
+from vp.limits import AdaptiveLimiter
+from vp.cache import MetadataCache, ErrorResult
+from vp.urls import canonical_url
+from vp.registry import REGISTRY
+from vp.htmlmeta import fetch_page_meta, sniff_media
+from vp.downloader import SegmentedDownloader
+from vp.stream_fetcher import StreamFetcher, is_manifest
+from vp.retry import RetryPolicy, RetryBudget, CircuitBreakers
+from vp.ydl_pool import ExtractorPool
+from vp.spool import spool_upload
+from vp.urlimport import UrlImport
+from vp.checkpoint import BatchCheckpoint, IndexSet, list_checkpoints, pending
+from vp.keyframes import analyze_video
+from vp.scenes import detect_scenes, load_index as load_scene_index
+from vp.thumbs import ThumbnailCache, placeholder_image
+from vp.store import HistoryStore
+from vp.metrics import METRICS, start_exporter, rss_bytes, total_memory_bytes
+from vp.jobs import (JobScheduler, QUEUED, RUNNING, DONE, FAILED, CANCELLED, FINISHED_STATES,
+                     PRIORITY_NORMAL, PRIORITY_HIGH)
+
+# 超过该大小的上传文件不做 st.video 预览，避免整文件进入内存
+PREVIEW_MAX_BYTES = 200 * 1024 * 1024
+HISTORY_PAGE_SIZE = 50
+# 界面状态名 -> 历史库中的状态值
+HISTORY_STATUS = {"已完成": "completed", "下载中": "downloading", "失败": "failed", "已取消": "cancelled"}
+JOB_VIEW_LIMIT = 100
+# 检查点的结果行格式与 DP3 不同，两个应用各用一个目录，互不列出对方的批次
+BATCH_DIR = "temp/batches/dp4"
+JOB_STATE_NAMES = {QUEUED: "排队中", RUNNING: "运行中", DONE: "已完成", FAILED: "失败", CANCELLED: "已取消"}
 
 class VideoCrawler:
     """视频爬取核心类[6](@ref)"""
     
     def __init__(self):
-        self.session = requests.Session()
+        # 完整读取的文本响应经磁盘HTTP缓存，未变化的页面重新验证只需 304；媒体不进缓存。
+        # 每个应用单独一个目录，大小上限由各自进程内的索引执行
+        self.http_cache = cache_from_env("temp/http_cache/dp4")
+        # 代理列表在设置页填写；为空时直接连接
+        self.proxies = ProxyPool()
+        self.session = build_session(cache=self.http_cache, proxy_pool=self.proxies)
+        self.cache = MetadataCache()
+        self.thumbs = ThumbnailCache(self.session, "temp/thumbs")
+        self.breakers = CircuitBreakers()
+        # 按主机自适应并发：慢下来或被限流时自动收紧
+        self.limits = AdaptiveLimiter()
         self.setup_session()
-        self.download_history = []
+        self._ydl_pool = None
+        self._pool_lock = threading.Lock()
         
     def setup_session(self):
         """配置会话参数[6](@ref)"""
@@ -98,96 +83,159 @@ class VideoCrawler:
             'Upgrade-Insecure-Requests': '1',
         })
     
+    @property
+    def ydl_pool(self):
+        """按需启动的 youtube-dl 常驻提取进程池"""
+        with self._pool_lock:
+            if self._ydl_pool is None:
+                self._ydl_pool = ExtractorPool(size=2)
+            return self._ydl_pool
+    
+    def connection_stats(self):
+        """连接池复用统计"""
+        return connection_stats(self.session)
+    
     def detect_platform(self, url):
-        """自动检测视频平台[6](@ref)"""
-        domain = urlparse(url).netloc.lower()
-        if 'youtube.com' in domain or 'youtu.be' in domain:
-            return 'youtube'
-        elif 'bilibili.com' in domain:
-            return 'bilibili'
-        elif 'youku.com' in domain:
-            return 'youku'
-        elif 'iqiyi.com' in domain:
-            return 'iqiyi'
-        elif 'twitch.tv' in domain:
-            return 'twitch'
-        else:
-            return 'generic'
+        """自动检测视频平台（共享注册表，按域名后缀匹配）"""
+        start = time.perf_counter()
+        platform = REGISTRY.detect(url)
+        METRICS.observe('detect', time.perf_counter() - start, platform)
+        return platform
     
-    def get_video_info(self, url, max_retries=3, delay=2):
+    def get_video_info(self, url, max_retries=3, delay=2, retry_budget=None):
         """获取视频信息[6](@ref)"""
-        for attempt in range(max_retries):
-            try:
-                platform = self.detect_platform(url)
-                
-                if platform == 'youtube':
-                    return self._youtube_download(url)
-                elif platform == 'twitch':
-                    return self._streamlink_download(url)
-                else:
-                    return self._generic_download(url)
-                    
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise e
-                time.sleep(delay * (attempt + 1))
+        key = canonical_url(url)
+        hit, cached = self.cache.get(key)
+        if hit:
+            if isinstance(cached, ErrorResult):
+                # 每次抛出新的异常实例，并发调用方不共享同一个异常对象
+                raise cached.exception()
+            return dict(cached) if cached else None
+        
+        try:
+            video_info = self._fetch_video_info(url, max_retries, delay, retry_budget)
+        except Exception as e:
+            METRICS.count_error(type(e).__name__, REGISTRY.detect(url))
+            self.cache.put(key, ErrorResult.from_exception(e), negative=True)
+            raise
+        platform = video_info.get('platform') if video_info else None
+        self.cache.put(key, video_info, platform=platform, negative=not video_info)
+        return dict(video_info) if video_info else None
+    
+    def _fetch_video_info(self, url, max_retries, delay, retry_budget=None):
+        """按平台分派获取，仅对可重试错误退避重试"""
+        platform = self.detect_platform(url)
+        if platform == 'youtube':
+            fetch = self._youtube_download
+        elif platform == 'twitch':
+            fetch = self._streamlink_download
+        else:
+            fetch = self._generic_download
+        
+        policy = RetryPolicy(max_attempts=max_retries, base_delay=delay, breakers=self.breakers)
+        return policy.call(partial(self.limits.call, fetch), url, budget=retry_budget)
     
     def _youtube_download(self, url):
         """YouTube视频下载[6](@ref)"""
-        ydl_opts = {
-            'format': 'best[height<=1080]',
-            'outtmpl': 'downloads/%(title)s.%(ext)s',
-            'quiet': True,
+        # 提取在常驻进程中进行，复用已初始化的 YoutubeDL 实例
+        with METRICS.timer('fetch', 'youtube', inflight=True):
+            info = self.ydl_pool.extract(url)
+        return {
+            'title': info.get('title', '未知标题'),
+            'duration': info.get('duration', 0),
+            'thumbnail': info.get('thumbnail', ''),
+            'formats': info.get('formats', []),
+            'platform': 'youtube'
         }
-        
-        try:
-            with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                return {
-                    'title': info.get('title', '未知标题'),
-                    'duration': info.get('duration', 0),
-                    'thumbnail': info.get('thumbnail', ''),
-                    'formats': info.get('formats', []),
-                    'platform': 'youtube'
-                }
-        except Exception as e:
-            st.error(f"YouTube下载错误: {str(e)}")
-            return None
     
     def _streamlink_download(self, url):
         """使用streamlink下载[6](@ref)"""
-        try:
+        import streamlink
+        with METRICS.timer('fetch', 'streamlink', inflight=True):
             streams = streamlink.streams(url)
-            if streams:
-                best_stream = streams.get("best")
-                return {
-                    'title': f"Stream_{int(time.time())}",
-                    'url': best_stream.url,
-                    'platform': 'streamlink'
-                }
-        except Exception as e:
-            st.error(f"Streamlink错误: {str(e)}")
+        if streams:
+            best_stream = streams.get("best")
+            return {
+                'title': f"Stream_{int(time.time())}",
+                'url': best_stream.url,
+                'stream_type': type(best_stream).shortname(),
+                'platform': 'streamlink'
+            }
         return None
     
     def _generic_download(self, url):
         """通用视频下载方法"""
-        try:
-            response = self.session.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            # 尝试从HTML中提取视频信息
-            soup = BeautifulSoup(response.content, 'html.parser')
-            title_tag = soup.find('meta', property='og:title') or soup.find('title')
-            title = title_tag.get('content', '未知标题') if title_tag else '未知标题'
-            
-            return {
-                'title': title,
+        # 只读取页面<head>；媒体直链不读取正文（<head> 边读边解析，计入 fetch 阶段）
+        with METRICS.timer('fetch', 'generic', inflight=True):
+            page = fetch_page_meta(self.session, url, timeout=30)
+        with METRICS.timer('parse', 'generic'):
+            meta = page['meta']
+            video_info = {
+                'title': meta.get('og:title') or page['title'] or '未知标题',
                 'url': url,
+                'thumbnail': meta.get('og:image', ''),
                 'platform': 'generic'
             }
-        except Exception as e:
-            st.error(f"通用下载错误: {str(e)}")
-            return None
+            if page['kind'] == 'media':
+                video_info['content_type'] = page['content_type']
+                video_info['filesize'] = page['content_length']
+        return video_info
+
+def setup_page():
+    """页面配置与样式注入，每次脚本运行时由 main() 调用"""
+    # 页面配置
+    st.set_page_config(
+        page_title="VIP视频智能爬取工具",
+        page_icon="🎬",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # 自定义CSS美化界面[2](@ref)
+    st.markdown("""
+    <style>
+        .main-header {
+            font-size: 2.5rem;
+            color: #1f77b4;
+            text-align: center;
+            margin-bottom: 2rem;
+            font-weight: bold;
+        }
+        .success-box {
+            background-color: #d4edda;
+            border: 1px solid #c3e6cb;
+            border-radius: 8px;
+            padding: 20px;
+            margin: 15px 0;
+        }
+        .error-box {
+            background-color: #f8d7da;
+            border: 1px solid #f5c6cb;
+            border-radius: 8px;
+            padding: 20px;
+            margin: 15px 0;
+        }
+        .video-card {
+            border: 1px solid #e0e0e0;
+            border-radius: 10px;
+            padding: 20px;
+            margin: 15px 0;
+            background-color: #f8f9fa;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        .stButton>button {
+            background-color: #4CAF50;
+            color: white;
+            border-radius: 5px;
+            border: none;
+            padding: 12px 28px;
+            font-weight: bold;
+        }
+        .sidebar .sidebar-content {
+            background-color: #f0f2f6;
+        }
+    </style>
+    """, unsafe_allow_html=True)
 
 def setup_directories():
     """创建必要的目录结构[5](@ref)"""
@@ -195,57 +243,193 @@ def setup_directories():
     os.makedirs("temp", exist_ok=True)
 
 def load_video_from_bytes(uploaded_file):
-    """从字节流加载视频[3](@ref)"""
+    """将上传视频分块落盘到 temp/，返回基于 mmap 的 SpooledFile[3](@ref)
+
+    Streamlit 每次交互都会重跑脚本，按 file_id 在会话内复用已落盘的文件。
+    """
     try:
-        bytes_data = uploaded_file.getvalue()
-        return bytes_data
+        file_id = getattr(uploaded_file, 'file_id', None) or uploaded_file.name
+        cached = st.session_state.get('upload_spool')
+        if cached and cached[0] == file_id and os.path.exists(cached[1].path):
+            return cached[1]
+        if cached:
+            cached[1].close()
+        spooled = spool_upload(uploaded_file, "temp", name=uploaded_file.name)
+        st.session_state['upload_spool'] = (file_id, spooled)
+        return spooled
     except Exception as e:
         st.error(f"视频加载错误: {str(e)}")
         return None
 
-def process_byte_video(video_bytes):
-    """处理字节流形式的视频[3](@ref)"""
+def process_byte_video(video, thumbnails=9):
+    """处理落盘视频：探测元数据并按时间点抽取缩略图网格与封面帧[3](@ref)
+
+    video 可以是 SpooledFile（上传）或本地文件路径（下载完成的视频）。
+    """
     try:
-        # 使用ffmpeg处理字节流视频
-        bytes_stream = io.BytesIO(video_bytes)
-        
-        # 这里可以添加ffmpeg处理逻辑
-        # 由于复杂度较高，简化实现
-        return {"status": "success", "message": "视频处理完成"}
+        if isinstance(video, str):
+            with open(video, 'rb') as f:
+                head = f.read(512)
+            path, name, size, digest = video, os.path.basename(video), os.path.getsize(video), None
+        else:
+            head = video.head(512)
+            path, name, size, digest = video.path, video.name, video.size, video.digest
+        analysis = analyze_video(path, count=thumbnails)
+        return {
+            "status": "success",
+            "message": "视频处理完成",
+            "file": name,
+            "path": path,
+            "size_mb": round(size / 1024 / 1024, 2),
+            "format": sniff_media(head) or "unknown",
+            "sha256": digest,
+            "info": analysis['info'],
+            "poster_time": analysis['poster_time'],
+            "thumbnail_times": [t for t, _ in analysis['thumbnails']],
+            "workers": analysis['workers'],
+            # 图像字节不参与 st.json 展示
+            "_poster": analysis['poster'],
+            "_grid": analysis['grid'],
+        }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def display_video_analysis(result):
+    """展示 process_byte_video 的元数据、封面帧与缩略图网格"""
+    info = result['info']
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("时长", format_duration(int(info['duration'])))
+    with col2:
+        st.metric("帧率", f"{info['fps']:.2f} fps")
+    with col3:
+        st.metric("分辨率", info['resolution'])
+    if result.get('_poster'):
+        st.image(result['_poster'], caption=f"封面帧 @ {result['poster_time']:.1f}s")
+    if result.get('_grid'):
+        st.image(result['_grid'], caption=f"{len(result['thumbnail_times'])} 张缩略图")
+    st.json({k: v for k, v in result.items() if not k.startswith('_')})
+
+@st.cache_resource
+def get_crawler():
+    """进程级共享爬虫实例，所有会话复用同一连接池"""
+    return VideoCrawler()
+
+def display_http_cache_stats(http_cache):
+    """磁盘HTTP缓存：新鲜命中、304 重新验证比例与节省的下载量"""
+    if http_cache is None:
+        return
+    stats = http_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("HTTP缓存", stats['entries'], f"{stats['bytes'] / 1024 / 1024:.1f} MB")
+    with col2:
+        st.metric("新鲜命中", stats['hits'], f"{stats['hit_ratio']:.0%}")
+    with col3:
+        st.metric("304 重新验证", f"{stats['not_modified']}/{stats['revalidations']}",
+                  f"{stats['not_modified_ratio']:.0%}")
+    with col4:
+        st.metric("节省下载", f"{stats['bytes_saved'] / 1024 / 1024:.1f} MB")
+
+def display_proxy_stats(proxies):
+    """代理池：各代理的健康状态、延迟、成功率与被限流的主机"""
+    import pandas as pd
+    rows = proxies.stats()
+    if not rows:
+        return
+    df = pd.DataFrame(rows)
+    df['throttled_hosts'] = df['throttled_hosts'].map(', '.join)
+    df.columns = ['代理', '健康', '延迟(ms)', '成功率', '请求数', '失败数', '限流主机']
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.caption(f"无可用代理而未发出的请求 {proxies.rejected} 次（不会退回直接连接）")
+
+def display_host_limits(limits):
+    """各主机当前的自适应并发上限、延迟基线与限流暂停"""
+    rows = limits.snapshot()
+    if not rows:
+        st.caption(f"尚无请求，各主机初始并发上限为 {limits.initial}")
+        return
+    st.dataframe([{
+        "主机": r['host'], "并发上限": r['limit'], "在途": r['inflight'],
+        "最近延迟(ms)": r['latency_ms'], "基线(ms)": r['baseline_ms'], "暂停(秒)": r['paused_s'],
+        "请求数": r['requests'], "拥塞信号": r['congested'], "削减次数": r['cuts'],
+    } for r in rows], use_container_width=True, hide_index=True)
+
+def display_runtime_metrics(exporter):
+    """分阶段延迟与错误计数（与 /metrics 导出同源）"""
+    snap = METRICS.snapshot()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("在途请求", snap['inflight_requests'])
+    with col2:
+        st.metric("常驻内存", f"{(snap['rss_bytes'] or 0) / 1024 / 1024:.0f} MB")
+    with col3:
+        st.metric("错误总数", sum(e['count'] for e in snap['errors']))
+    if snap['latency']:
+        st.dataframe([{
+            '阶段': item['stage'], '平台': item['platform'], '次数': item['count'],
+            'p50(ms)': round(item['p50'] * 1000, 2), 'p95(ms)': round(item['p95'] * 1000, 2),
+        } for item in snap['latency']], use_container_width=True, hide_index=True)
+    if snap['errors']:
+        st.dataframe([{'错误类型': e['type'], '平台': e['platform'], '次数': e['count']}
+                      for e in snap['errors']], use_container_width=True, hide_index=True)
+    if exporter is not None:
+        st.caption(f"Prometheus 导出: {exporter.url} （JSON: {exporter.url}.json）")
+    else:
+        st.caption("指标导出未启用（VP_METRICS_PORT=0 或端口被占用）")
+
+@st.cache_resource
+def get_metrics_exporter():
+    """进程级指标导出线程"""
+    return start_exporter()
+
+@st.cache_resource
+def get_store():
+    """进程级共享的历史库，连接按线程建立"""
+    return HistoryStore()
+
+@st.cache_resource
+def get_scheduler():
+    """进程级后台任务调度器，下载与批处理任务不随脚本重跑中断"""
+    return JobScheduler(3)
+
 def main():
     """主应用函数[2](@ref)"""
+    setup_page()
     setup_directories()
-    crawler = VideoCrawler()
+    crawler = get_crawler()
+    get_metrics_exporter()
     
     # 侧边栏导航[2](@ref)
     with st.sidebar:
         st.title("🎬 导航菜单")
         selected_page = st.radio(
             "选择功能", 
-            ["视频爬取", "批量处理", "下载管理", "设置"]
+            ["视频爬取", "批量处理", "下载管理", "设置"],
+            key="nav_page"
         )
         
         st.markdown("---")
         st.subheader("📊 统计信息")
-        st.metric("今日下载", "0")
-        st.metric("总任务数", "0")
+        midnight = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+        st.metric("今日下载", get_store().count_history(status='completed', since=midnight))
+        st.metric("总任务数", sum(v for k, v in get_scheduler().stats().items() if k != 'workers'))
         
         st.markdown("---")
         st.subheader("⚙️ 快速设置")
         download_path = st.text_input("下载路径", "downloads/")
         max_concurrent = st.slider("最大并发数", 1, 10, 3)
+        # 后台任务的工作线程数跟随并发设置
+        get_scheduler().resize(max_concurrent)
     
     if selected_page == "视频爬取":
         video_crawler_page(crawler)
     elif selected_page == "批量处理":
-        batch_process_page(crawler)
+        batch_process_page(crawler, max_concurrent)
     elif selected_page == "下载管理":
-        download_manager_page()
+        download_manager_page(get_store(), get_scheduler())
     else:
-        settings_page()
+        settings_page(crawler)
 
 def video_crawler_page(crawler):
     """视频爬取页面[1](@ref)"""
@@ -288,8 +472,11 @@ def video_crawler_page(crawler):
         # 状态面板
         with st.container():
             st.subheader("📈 状态面板")
-            st.metric("当前状态", "就绪")
-            st.metric("内存使用", "45%")
+            inflight = METRICS.inflight
+            st.metric("当前状态", f"请求中 ({inflight})" if inflight else "就绪")
+            rss, total = rss_bytes(), total_memory_bytes()
+            st.metric("内存使用", f"{rss / total:.1%}" if rss and total else "未知",
+                      help=f"进程常驻内存 {rss / 1024 / 1024:.0f} MB" if rss else None)
             
             st.subheader("🔄 实时日志")
             log_placeholder = st.empty()
@@ -302,6 +489,16 @@ def video_crawler_page(crawler):
                 process_single_video(crawler, url_input, quality, timeout, max_retries, delay)
             else:
                 st.error("请输入有效的视频URL")
+    
+    # 下载按钮放在爬取按钮分支之外，点击触发重跑后仍能拿到已解析的视频信息
+    crawled_video = st.session_state.get('crawled_video')
+    if crawled_video:
+        with col2:
+            urgent = st.checkbox("优先下载", key="download_urgent")
+            if st.button("⬇️ 下载视频", use_container_width=True, key="download_video"):
+                job_id = download_video(crawler, crawled_video,
+                                        priority=PRIORITY_HIGH if urgent else PRIORITY_NORMAL)
+                st.success(f"已加入下载队列（任务 #{job_id}），可在「下载管理」查看进度")
 
 def process_single_video(crawler, url, quality, timeout, max_retries, delay):
     """处理单个视频爬取"""
@@ -319,11 +516,10 @@ def process_single_video(crawler, url, quality, timeout, max_retries, delay):
             progress_bar.progress(70)
             
             # 显示视频信息
-            display_video_info(video_info)
-            
-            # 下载按钮
-            if st.button("⬇️ 下载视频", key=f"download_{url}"):
-                download_video(video_info)
+            with METRICS.timer('render', video_info.get('platform')):
+                display_video_info(video_info, crawler.thumbs)
+            video_info['page_url'] = url
+            st.session_state.crawled_video = video_info
             
             progress_bar.progress(100)
         else:
@@ -333,17 +529,17 @@ def process_single_video(crawler, url, quality, timeout, max_retries, delay):
         st.error(f"爬取过程出错: {str(e)}")
         progress_bar.progress(0)
 
-def display_video_info(video_info):
-    """显示视频信息卡片[1](@ref)"""
+def display_video_info(video_info, thumbs=None):
+    """显示视频信息卡片[1](@ref)，缩略图经本地缓存代理后以字节输出"""
     with st.container():
         st.markdown("### 视频信息")
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            if video_info.get('thumbnail'):
-                st.image(video_info['thumbnail'], width=200)
-            else:
-                st.image("https://via.placeholder.com/200x150?text=Thumbnail", width=200)
+            thumbnail = None
+            if video_info.get('thumbnail') and thumbs is not None:
+                thumbnail = thumbs.get(video_info['thumbnail'], 200)
+            st.image(thumbnail or placeholder_image(200, 150), width=200)
         
         with col2:
             st.write(f"**标题:** {video_info.get('title', '未知标题')}")
@@ -360,35 +556,83 @@ def format_duration(seconds):
     secs = seconds % 60
     return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
-def download_video(video_info):
-    """下载视频[6](@ref)"""
+def select_download_source(video_info):
+    """选择可直接下载的媒体地址，返回 (url, 请求头, 扩展名)"""
+    formats = [
+        f for f in video_info.get('formats') or []
+        if f.get('url') and f.get('protocol', 'https') in ('http', 'https')
+        and f.get('vcodec') != 'none' and f.get('acodec') != 'none'
+        and (f.get('height') or 0) <= 1080
+    ]
+    if formats:
+        best = max(formats, key=lambda f: ((f.get('height') or 0), (f.get('tbr') or 0)))
+        return best['url'], best.get('http_headers') or {}, best.get('ext') or 'mp4'
+    
+    url = video_info.get('url')
+    ext = os.path.splitext(urlparse(url).path)[1].lstrip('.').lower() if url else ''
+    if ext == 'm3u8' or video_info.get('stream_type') == 'hls':
+        return url, {}, 'ts'
+    return url, {}, ext if ext in ('mp4', 'webm', 'mkv', 'flv', 'mov', 'avi', 'ts') else 'mp4'
+
+def download_video(crawler, video_info, download_dir="downloads", priority=PRIORITY_NORMAL):
+    """把下载加入后台任务队列[6](@ref)，返回任务 id；页面重跑不会中断下载"""
+    return get_scheduler().submit(
+        run_download, crawler, dict(video_info), download_dir, get_store(),
+        name=video_info.get('title') or '未知标题', kind='download', priority=priority,
+        meta={'platform': video_info.get('platform'), 'url': video_info.get('page_url')}
+    )
+
+def run_download(job, crawler, video_info, download_dir, store):
+    """下载任务体，在调度器工作线程中执行，进度写入 job，状态写入历史库"""
+    url, headers, ext = select_download_source(video_info)
+    if not url:
+        raise ValueError("没有可下载的媒体地址")
+    
+    title = video_info.get('title') or '未知标题'
+    if title.lower().endswith(f".{ext}"):
+        title = title[:-len(ext) - 1]
+    filename = re.sub(r'[\\/:*?"<>|\s]+', '_', title).strip('_')[:100] or uuid.uuid4().hex
+    dest = os.path.join(download_dir, f"{filename}.{ext}")
+    
+    job.update(message="⬇️ 开始下载视频...", path=dest)
+    record_id = store.add_history(
+        video_info.get('page_url') or url, 'downloading',
+        title=video_info.get('title'), platform=video_info.get('platform'), path=dest)
+    
+    def report(done, total, speed):
+        job.update(progress=done / total if total else None,
+                   message=f"⬇️ 已下载 {done / 1024 / 1024:.1f} MB"
+                           + (f" / {total / 1024 / 1024:.1f} MB" if total else "")
+                           + f" - {speed / 1024 / 1024:.2f} MB/s")
+    
     try:
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        status_text.text("⬇️ 开始下载视频...")
-        
-        # 模拟下载过程
-        for i in range(100):
-            time.sleep(0.1)
-            progress_bar.progress(i + 1)
-        
-        status_text.text("✅ 下载完成!")
-        
-        # 记录下载历史
-        download_record = {
-            'title': video_info.get('title'),
-            'platform': video_info.get('platform'),
-            'timestamp': datetime.now().isoformat(),
-            'status': 'completed'
-        }
-        
-        st.success(f"视频 '{video_info.get('title')}' 下载完成!")
-        
+        if (video_info.get('stream_type') in ('hls', 'dash')
+                or is_manifest(url, video_info.get('content_type'))):
+            # 点播流：并行下载分片并按序拼接
+            def report_segments(done, total, written, speed):
+                job.update(progress=done / total,
+                           message=f"⬇️ 分片 {done}/{total} - 已下载 {written / 1024 / 1024:.1f} MB"
+                                   f" - {speed / 1024 / 1024:.2f} MB/s")
+            
+            fetcher = StreamFetcher(crawler.session)
+            result = fetcher.download(url, dest, headers=headers, progress=report_segments,
+                                      cancel=job.cancel_event)
+        else:
+            downloader = SegmentedDownloader(crawler.session)
+            result = downloader.download(url, dest, headers=headers, progress=report,
+                                         cancel=job.cancel_event)
     except Exception as e:
-        st.error(f"下载失败: {str(e)}")
+        store.update_history(record_id, status='cancelled' if job.cancelled else 'failed',
+                             error=str(e))
+        raise
+    
+    # 记录下载历史
+    store.update_history(record_id, status='completed', path=result['path'], size=result['size'])
+    METRICS.count_event('download', video_info.get('platform'))
+    job.update(message=f"✅ 下载完成! 保存至 {result['path']}")
+    return result
 
-def batch_process_page(crawler):
+def batch_process_page(crawler, max_concurrent=3):
     """批量处理页面[2](@ref)"""
     st.title("📁 批量视频处理")
     
@@ -402,13 +646,33 @@ def batch_process_page(crawler):
             placeholder="https://www.example.com/video/1\nhttps://www.example.com/video/2\nhttps://www.example.com/video/3",
             help="每行输入一个视频链接，支持批量处理"
         )
+        batch_file = st.file_uploader(
+            "或导入URL列表文件（TXT/CSV）:",
+            type=['txt', 'csv'],
+            key="batch_file",
+            help="百万行级别的导出文件：逐行流式读取，按平台规则规范化并去重后边读边处理；CSV 取 url/链接 列"
+        )
+        # 异步后端直接连接目标站点，配置了代理时不可用
+        async_mode = st.checkbox(
+            "⚡ 异步模式", key="batch_async", disabled=crawler.proxies.active,
+            help="适合上万条URL的大批量任务：在后台任务的事件循环中并发提取页面信息（不经 youtube-dl），"
+                 "同样写入检查点与历史、可续跑；配置代理后不可用"
+        ) and not crawler.proxies.active
         
         if st.button("🚀 开始批量处理", key="batch_process"):
-            if batch_urls:
+            if batch_file is not None:
+                process_batch_videos(crawler, batch_file, max_concurrent, async_mode)
+            elif batch_urls:
                 urls = [url.strip() for url in batch_urls.split('\n') if url.strip()]
-                process_batch_videos(crawler, urls)
+                process_batch_videos(crawler, urls, max_concurrent, async_mode)
             else:
                 st.error("请输入至少一个有效的URL")
+        
+        resume_batch_panel(crawler, max_concurrent)
+        
+        # 批量任务在后台调度器中运行，页面重跑后继续显示进度
+        if st.session_state.get('batch_job') is not None:
+            watch_batch_job(st.session_state.batch_job)
     
     with tab2:
         st.subheader("📤 视频文件上传")
@@ -419,47 +683,175 @@ def batch_process_page(crawler):
         )
         
         if uploaded_file is not None:
-            # 显示视频预览[5](@ref)
-            video_bytes = uploaded_file.read()
-            st.video(video_bytes)
+            spooled = load_video_from_bytes(uploaded_file)
+            # 已有镜头索引时可按镜头跳转预览
+            start_time = 0
+            scene_index = load_scene_index(spooled.path) if spooled is not None else None
+            if scene_index and len(scene_index['scenes']) > 1:
+                scene = st.selectbox(
+                    "跳转到镜头",
+                    scene_index['scenes'],
+                    format_func=lambda s: f"镜头 {s['index'] + 1}  {format_duration(int(s['start']))}"
+                                          f" - {format_duration(int(s['end']))}"
+                )
+                start_time = int(scene['start'])
+            # 显示视频预览[5](@ref)，st.video 会把内容读入内存，超大文件跳过预览
+            if spooled is not None and spooled.size <= PREVIEW_MAX_BYTES:
+                st.video(spooled.path, start_time=start_time)
+            elif spooled is not None:
+                st.caption(f"文件较大（{spooled.size / 1024 / 1024:.0f} MB），已跳过预览")
             
-            if st.button("处理上传视频"):
-                process_uploaded_video(uploaded_file)
+            if spooled is not None and st.button("处理上传视频"):
+                process_uploaded_video(spooled)
 
-def process_batch_videos(crawler, urls):
-    """处理批量视频"""
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    results = []
+def process_batch_videos(crawler, urls, max_concurrent=3, async_mode=False):
+    """为批次建立检查点后加入后台任务队列；urls 为URL列表或上传的URL列表文件"""
+    checkpoint = BatchCheckpoint.create(urls, directory=BATCH_DIR)
+    if async_mode:
+        # 提取方式记在检查点里，续跑时沿用
+        checkpoint.save_meta(mode='async')
+    start_batch_job(crawler, checkpoint, max_concurrent)
+
+def start_batch_job(crawler, checkpoint, max_concurrent=3):
+    """提交（或续跑）检查点对应的批次，页面通过 watch_batch_job 轮询进度"""
+    # 列表输入总数已知；文件导入为总数未知的 UrlImport
+    urls = checkpoint.urls()
+    st.session_state.batch_import = urls if isinstance(urls, UrlImport) else None
+    st.session_state.batch_checkpoint = checkpoint.id
+    st.session_state.batch_job = get_scheduler().submit(
+        run_batch_videos, crawler, checkpoint, urls, max_concurrent, get_store(),
+        name=f"批量解析 {checkpoint.meta['name']}", kind='batch', meta={'batch_id': checkpoint.id}
+    )
+
+def run_batch_videos(job, crawler, checkpoint, urls, max_concurrent, store):
+    """批量任务体 - 有界并发，结果写入检查点与历史库；续跑时只处理缺失的序号，取消时返回已完成部分"""
+    results = dict(checkpoint.load())
+    done = IndexSet()
+    for i in results:
+        done.add(i)
+    checkpoint.save_meta(rows=len(done))
+    total = len(urls) if hasattr(urls, '__len__') else None
+    async_mode = checkpoint.meta.get('mode') == 'async'
+    if async_mode and crawler.proxies.active:
+        raise RuntimeError("已配置代理，异步模式会直接连接目标站点，请清空代理后再续跑该批次")
+    if async_mode:
+        from vp.aio_crawler import iter_async_batch
+        # 整批只用一个事件循环；通用页面的单主机并发与同步模式共用自适应限流器。
+        # 异步结果为 {'status', ...} 格式，与元数据缓存中的 youtube-dl 结果不同，不共用缓存
+        batch = iter_async_batch(
+            pending(urls, done), indexed=True, max_concurrency=100, headers=dict(crawler.session.headers),
+            detect_platform=crawler.detect_platform, breakers=crawler.breakers, limiter=crawler.limits
+        )
+    else:
+        # 整个批次共享重试预算，避免大量失败时重试拖慢批次
+        fetch = partial(crawler.get_video_info, retry_budget=RetryBudget())
+        batch = iter_batch(fetch, pending(urls, done), max_concurrent, indexed=True)
     
-    for i, url in enumerate(urls):
-        status_text.text(f"处理中: {i+1}/{len(urls)} - {url}")
-        
-        try:
-            video_info = crawler.get_video_info(url)
-            if video_info:
-                results.append({
+    # 批处理结果缓冲后分批写入历史库与检查点
+    with store.writer() as history, checkpoint.writer() as log:
+        for count, (i, url, video_info, error) in enumerate(batch, len(done) + 1):
+            if async_mode and error is None and video_info.get('status') != 'success':
+                error = video_info.get('error') or '未知错误'
+            if error is not None:
+                results[i] = {
+                    'url': url,
+                    'status': 'error',
+                    'error': str(error)
+                }
+            elif video_info:
+                results[i] = {
                     'url': url,
                     'status': 'success',
                     'data': video_info
-                })
+                }
             else:
-                results.append({
+                results[i] = {
                     'url': url,
                     'status': 'error',
                     'error': '无法获取视频信息'
-                })
-        except Exception as e:
-            results.append({
-                'url': url,
-                'status': 'error',
-                'error': str(e)
-            })
-        
-        progress_bar.progress((i + 1) / len(urls))
+                }
+            
+            log.add(i, results[i])
+            data = results[i].get('data', {})
+            history.add(url=url, title=data.get('title'), platform=data.get('platform'),
+                        status='completed' if results[i]['status'] == 'success' else 'failed',
+                        source='batch', error=results[i].get('error'))
+            # 文件导入总数未知，按已读取的字节估算进度
+            progress = count / total if total else urls.progress
+            job.update(progress=progress, message=f"处理中: {count}/{total or '?'} - {url}")
+            if job.cancelled:
+                # 关闭生成器会取消尚未开始的请求；检查点保持未完成，可稍后续跑
+                batch.close()
+                break
+        else:
+            log.close(finished=True)
     
-    # 显示批量结果
-    display_batch_results(results)
+    return [results[i] for i in sorted(results)]
+
+def resume_batch_panel(crawler, max_concurrent=3):
+    """列出中断或停止的批次，按批次ID续跑，只处理检查点中缺失的URL"""
+    running = {job['meta'].get('batch_id') for job in get_scheduler().snapshot(kind='batch')
+               if job['state'] not in FINISHED_STATES}
+    unfinished = [meta for meta in list_checkpoints(BATCH_DIR, finished=False) if meta['id'] not in running]
+    if not unfinished:
+        return
+    with st.expander(f"♻️ 未完成的批次 ({len(unfinished)})"):
+        meta = st.selectbox(
+            "批次",
+            unfinished,
+            format_func=lambda m: f"{m['id']} · {m['name']} · {m['created']} · 已完成 {m['rows']}"
+                                  + (f"/{m['total']}" if m.get('total') else ""),
+            key="resume_batch"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("▶️ 继续处理", key="resume_batch_start"):
+                start_batch_job(crawler, BatchCheckpoint(meta['id'], BATCH_DIR, meta), max_concurrent)
+        with col2:
+            if st.button("🗑 删除检查点", key="resume_batch_delete"):
+                BatchCheckpoint(meta['id'], BATCH_DIR, meta).remove()
+                st.rerun()
+
+def watch_batch_job(job_id):
+    """展示后台批量任务：运行中轮询进度，结束后显示结果"""
+    scheduler = get_scheduler()
+    job = scheduler.get(job_id)
+    if job is None:
+        return
+    if job['state'] not in FINISHED_STATES:
+        batch_job_progress(job_id)
+        return
+    if job['state'] == FAILED:
+        st.error(f"批量任务失败: {job['error']}")
+    elif job['state'] == CANCELLED:
+        st.warning("批量任务已停止，以下为已完成部分")
+    show_batch_info()
+    results = scheduler.result(job_id)
+    if results:
+        # 显示批量结果
+        with METRICS.timer('render', 'batch'):
+            display_batch_results(results)
+
+@st.fragment(run_every=1)
+def batch_job_progress(job_id):
+    """每秒局部刷新一次进度，任务结束后整页重跑以显示结果"""
+    scheduler = get_scheduler()
+    job = scheduler.get(job_id)
+    if job is None or job['state'] in FINISHED_STATES:
+        st.rerun()
+    st.progress(job['progress'], text=job['message'] or "排队中...")
+    if st.button("⏹ 停止批量任务", key="cancel_batch_job"):
+        scheduler.cancel(job_id)
+    show_batch_info()
+
+def show_batch_info():
+    """显示批次ID（用于续跑）以及文件导入的读取速度与去重率"""
+    batch_id = st.session_state.get('batch_checkpoint')
+    if batch_id:
+        st.caption(f"批次ID `{batch_id}`：结果已写入检查点，中断后可在「未完成的批次」中续跑")
+    importer = st.session_state.get('batch_import')
+    if importer is not None:
+        st.caption(f"📄 {importer.name}：{importer.stats.summary()}")
 
 def display_batch_results(results):
     """显示批量处理结果"""
@@ -476,6 +868,7 @@ def display_batch_results(results):
         st.metric("失败数", len(results) - success_count)
     
     # 结果显示表格
+    import pandas as pd
     results_df = pd.DataFrame([{
         'URL': r['url'],
         '状态': '✅ 成功' if r['status'] == 'success' else '❌ 失败',
@@ -484,54 +877,168 @@ def display_batch_results(results):
     
     st.dataframe(results_df, use_container_width=True)
 
-def process_uploaded_video(uploaded_file):
+def process_uploaded_video(spooled):
     """处理上传的视频文件[3](@ref)"""
     try:
         with st.spinner("处理视频文件中..."):
-            video_bytes = load_video_from_bytes(uploaded_file)
-            result = process_byte_video(video_bytes)
+            result = process_byte_video(spooled)
             
             if result['status'] == 'success':
                 st.success("视频处理完成!")
-                st.json(result)
+                display_video_analysis(result)
             else:
                 st.error(f"处理失败: {result['message']}")
+                return
+        
+        with st.spinner("检测镜头切换中..."):
+            # 索引写在 temp/ 中视频旁，同一文件再次处理直接复用
+            scene_index = detect_scenes(spooled.path)
+            scenes = scene_index['scenes']
+            st.info(f"检测到 {len(scenes)} 个镜头"
+                    + (f"，解码 {scene_index['frames_per_second']:.0f} 帧/秒"
+                       if scene_index.get('frames_per_second') else ""))
+            if len(scenes) > 1:
+                st.dataframe([{
+                    '镜头': s['index'] + 1,
+                    '开始': format_duration(int(s['start'])),
+                    '结束': format_duration(int(s['end'])),
+                    '切换强度': s['score'],
+                } for s in scenes], use_container_width=True)
+                st.caption("镜头索引已保存，重新打开该文件时可在预览上方按镜头跳转")
                 
     except Exception as e:
         st.error(f"视频处理错误: {str(e)}")
 
-def download_manager_page():
-    """下载管理页面[5](@ref)"""
+def download_manager_page(store, scheduler):
+    """下载管理页面[5](@ref)：后台任务实时视图 + 历史记录（筛选下推到 SQLite，按页查询）"""
     st.title("📥 下载管理")
     
-    # 模拟下载历史数据
-    download_history = [
-        {'title': '示例视频1', 'platform': 'youtube', 'status': 'completed', 'time': '2024-01-15 10:30'},
-        {'title': '示例视频2', 'platform': 'bilibili', 'status': 'downloading', 'time': '2024-01-15 10:25'},
-        {'title': '示例视频3', 'platform': 'youku', 'status': 'failed', 'time': '2024-01-15 10:20'}
-    ]
+    st.subheader("任务队列")
+    live_jobs_view(scheduler)
+    preview_finished_download(scheduler)
     
     # 筛选选项
     col1, col2, col3 = st.columns(3)
     with col1:
-        filter_status = st.selectbox("状态筛选", ["全部", "已完成", "下载中", "失败"])
+        filter_status = st.selectbox("状态筛选", ["全部"] + list(HISTORY_STATUS))
     with col2:
-        filter_platform = st.selectbox("平台筛选", ["全部", "YouTube", "Bilibili", "Youku"])
+        filter_platform = st.selectbox("平台筛选", ["全部"] + store.history_platforms(),
+                                       format_func=lambda p: p if p == "全部" else p.upper())
     with col3:
-        st.date_input("日期范围")
+        date_range = st.date_input("日期范围", value=())
     
-    # 下载历史表格
+    filters = {
+        'status': HISTORY_STATUS.get(filter_status),
+        'platform': None if filter_platform == "全部" else filter_platform,
+        'since': None,
+        'until': None,
+    }
+    if len(date_range) == 2:
+        filters['since'] = datetime.combine(date_range[0], datetime.min.time()).timestamp()
+        filters['until'] = (datetime.combine(date_range[1], datetime.min.time())
+                            + timedelta(days=1)).timestamp()
+    
+    # 下载历史表格：键集分页，游标栈保存在会话中，筛选变化时回到第一页
     st.subheader("下载历史")
-    history_df = pd.DataFrame(download_history)
-    st.dataframe(history_df, use_container_width=True)
+    pager = st.session_state.setdefault('history_pager', {'filters': None, 'cursors': [None]})
+    if pager['filters'] != filters:
+        pager['filters'] = filters
+        pager['cursors'] = [None]
+    total = store.count_history(**filters)
+    rows, next_cursor = store.query_history(**filters, limit=HISTORY_PAGE_SIZE,
+                                            cursor=pager['cursors'][-1])
+    status_names = {v: k for k, v in HISTORY_STATUS.items()}
+    st.dataframe([{
+        '标题': row['title'] or row['url'],
+        '平台': row['platform'],
+        '状态': status_names.get(row['status'], row['status']),
+        '来源': '批量' if row['source'] == 'batch' else '下载',
+        '时间': datetime.fromtimestamp(row['created']).strftime('%Y-%m-%d %H:%M'),
+        '大小(MB)': round(row['size'] / 1024 / 1024, 1) if row['size'] else None,
+        '路径/错误': row['error'] or row['path'],
+    } for row in rows], use_container_width=True)
+    
+    page = len(pager['cursors'])
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ 上一页", disabled=page == 1):
+            pager['cursors'].pop()
+            st.rerun()
+    with col2:
+        st.caption(f"第 {page}/{pages} 页，共 {total} 条")
+    with col3:
+        if st.button("下一页 ➡️", disabled=next_cursor is None):
+            pager['cursors'].append(next_cursor)
+            st.rerun()
     
     # 清理操作
     col1, col2 = st.columns([3, 1])
     with col2:
         if st.button("清空完成记录", type="secondary"):
-            st.info("清理功能待实现")
+            removed = store.delete_history(status='completed')
+            pager['cursors'] = [None]
+            st.success(f"已清理 {removed} 条完成记录")
 
-def settings_page():
+@st.fragment(run_every=1)
+def live_jobs_view(scheduler):
+    """调度器实时视图：每秒局部刷新，不阻塞脚本线程"""
+    stats = scheduler.stats()
+    cols = st.columns(5)
+    for col, (label, key) in zip(cols, [("排队", QUEUED), ("运行中", RUNNING), ("已完成", DONE),
+                                        ("失败", FAILED), ("工作线程", 'workers')]):
+        with col:
+            st.metric(label, stats[key])
+    
+    jobs = scheduler.snapshot()[:JOB_VIEW_LIMIT]
+    if not jobs:
+        st.caption("暂无后台任务")
+        return
+    st.dataframe([{
+        '#': job['id'],
+        '任务': job['name'],
+        '类型': '下载' if job['kind'] == 'download' else '批量',
+        '状态': JOB_STATE_NAMES.get(job['state'], job['state']),
+        '优先级': job['priority'],
+        '进度': job['progress'],
+        '信息': job['error'] or job['message'],
+        '耗时(秒)': job['elapsed'],
+    } for job in jobs], use_container_width=True, hide_index=True, column_config={
+        '进度': st.column_config.ProgressColumn('进度', min_value=0.0, max_value=1.0),
+    })
+    
+    active = {job['id']: job for job in jobs if job['state'] in (QUEUED, RUNNING)}
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        selected = st.selectbox("选择任务", list(active), key="selected_job",
+                                format_func=lambda i: f"#{i} {active[i]['name']}" if i in active else f"#{i}")
+    with col2:
+        if st.button("⏹ 取消", disabled=selected is None):
+            scheduler.cancel(selected)
+    with col3:
+        if st.button("⏫ 优先执行", disabled=selected is None or active.get(selected, {}).get('state') != QUEUED):
+            scheduler.set_priority(selected, PRIORITY_HIGH)
+    with col4:
+        if st.button("清除已结束"):
+            scheduler.clear_finished()
+
+def preview_finished_download(scheduler):
+    """对已完成的下载任务生成关键帧预览"""
+    finished = {job['id']: job for job in scheduler.snapshot(states=(DONE,), kind='download')}
+    if not finished:
+        return
+    with st.expander("🎞️ 关键帧预览"):
+        selected = st.selectbox("已完成的下载", list(finished),
+                                format_func=lambda i: f"#{i} {finished[i]['name']}")
+        if st.button("生成预览"):
+            result = scheduler.result(selected)
+            analysis = process_byte_video(result['path'])
+            if analysis['status'] == 'success':
+                display_video_analysis(analysis)
+            else:
+                st.caption(f"无法解析视频帧: {analysis['message']}")
+
+def settings_page(crawler):
     """设置页面[2](@ref)"""
     st.title("⚙️ 应用设置")
     
@@ -552,12 +1059,77 @@ def settings_page():
     with tab2:
         st.subheader("高级配置")
         
-        proxy_settings = st.text_input("代理设置", placeholder="http://proxy.example.com:8080")
+        proxy_settings = st.text_area("代理设置（每行一个）", "\n".join(crawler.proxies.urls()),
+                                      placeholder="http://proxy.example.com:8080\nsocks5://127.0.0.1:1080")
+        try:
+            proxy_list = parse_proxies(proxy_settings)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            if proxy_list != crawler.proxies.urls():
+                crawler.proxies.set_proxies(proxy_list)
+        display_proxy_stats(crawler.proxies)
         user_agent = st.text_area("自定义User-Agent", placeholder="Mozilla/5.0...")
         
         st.subheader("性能设置")
-        cache_size = st.slider("缓存大小(MB)", 10, 1000, 100)
+        cache_size = st.slider("缓存大小(MB)", 10, 1000, crawler.cache.max_bytes // (1024 * 1024))
+        crawler.cache.resize(cache_size * 1024 * 1024)
+        crawler.thumbs.resize(cache_size * 1024 * 1024)
+        if crawler.http_cache is not None:
+            crawler.http_cache.resize(cache_size * 1024 * 1024)
         enable_hardware_accel = st.checkbox("启用硬件加速")
+        
+        cache_stats = crawler.cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("缓存条目", cache_stats['entries'], f"{cache_stats['bytes'] / 1024 / 1024:.1f} MB")
+        with col2:
+            st.metric("命中", cache_stats['hits'] + cache_stats['negative_hits'], f"{cache_stats['hit_ratio']:.0%}")
+        with col3:
+            st.metric("未命中", cache_stats['misses'])
+        with col4:
+            st.metric("淘汰", cache_stats['evictions'])
+        
+        thumb_stats = crawler.thumbs.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("缩略图", thumb_stats['files'], f"{thumb_stats['bytes'] / 1024 / 1024:.1f} MB")
+        with col2:
+            st.metric("缩略图命中", thumb_stats['hits'], f"{thumb_stats['hit_ratio']:.0%}")
+        with col3:
+            st.metric("上游获取", thumb_stats['fetches'])
+        with col4:
+            st.metric("合并请求", thumb_stats['coalesced'])
+        display_http_cache_stats(crawler.http_cache)
+        st.subheader("主机并发")
+        display_host_limits(crawler.limits)
+        
+        if st.button("清除缓存"):
+            crawler.cache.clear()
+            crawler.thumbs.clear()
+            if crawler.http_cache is not None:
+                crawler.http_cache.clear()
+            st.success("缓存已清除")
+        
+        st.subheader("连接池状态")
+        stats = crawler.connection_stats()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("请求总数", stats['requests'])
+        with col2:
+            st.metric("新建连接", stats['new_connections'])
+        with col3:
+            st.metric("复用连接", stats['reused_connections'], f"{stats['reuse_ratio']:.0%}")
+        
+        st.subheader("提取进程池")
+        if crawler._ydl_pool is not None:
+            import pandas as pd
+            st.dataframe(pd.DataFrame(crawler.ydl_pool.stats()), use_container_width=True)
+        else:
+            st.caption("尚未处理YouTube链接，进程池未启动")
+        
+        st.subheader("运行指标")
+        display_runtime_metrics(get_metrics_exporter())
     
     with tab3:
         st.subheader("关于应用")
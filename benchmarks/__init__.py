@@ -0,0 +1 @@
+"""离线性能基准"""
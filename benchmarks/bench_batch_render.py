@@ -0,0 +1,136 @@
+"""批量结果渲染基准：旧版每行一个 expander/按钮 与 列式分页表格 的渲染耗时随批次大小的变化
+
+用法: python -m benchmarks.bench_batch_render [--sizes 100 1000 5000]
+                                              [--legacy-max 1000] [--max-scaling 3]
+
+用 AppTest 执行完整的脚本运行（含前端消息序列化），耗时包含传给前端的数据量。
+新版渲染在最大批次上的耗时超过最小批次的 max-scaling 倍时以非零状态退出。
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = r'''
+import sys
+sys.path.insert(0, {root!r})
+import streamlit as st
+import DP3
+from benchmarks.bench_batch_render import legacy_display_batch_results
+if st.session_state.mode == 'legacy':
+    legacy_display_batch_results(st.session_state.rows)
+else:
+    DP3.display_batch_results(st.session_state.results)
+'''
+
+
+def legacy_display_batch_results(results):
+    """DP3 原实现：每个结果一个 expander，每个成功结果一个播放按钮"""
+    import streamlit as st
+    st.subheader("📊 处理结果")
+    success_count = sum(1 for r in results if r.get('status') == 'success')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("总任务数", len(results))
+    with col2:
+        st.metric("成功数", success_count)
+    with col3:
+        st.metric("失败数", len(results) - success_count)
+    for i, result in enumerate(results):
+        status_icon = '✅' if result.get('status') == 'success' else '❌'
+        with st.expander(f"{status_icon} {result.get('url', '未知URL')[:50]}...",
+                         expanded=(i == 0 and result.get('status') == 'success')):
+            if result.get('status') == 'success':
+                st.success("解析成功")
+                if st.button("🎬 立即播放", key=f"play_{i}"):
+                    st.session_state.video_info = result.get('data')
+            else:
+                st.error(f"解析失败: {result.get('error', '未知错误')}")
+
+
+def sample_rows(count):
+    """生成批量结果行，约 10% 失败"""
+    rows = []
+    for i in range(count):
+        url = f'https://cdn{i % 20}.example.com/video/{i}.mp4'
+        if i % 10 == 9:
+            rows.append({'url': url, 'status': 'error', 'platform': 'generic', 'error': '连接超时'})
+        else:
+            rows.append({'url': url, 'status': 'success', 'platform': 'generic',
+                         'title': f'示例视频 {i}', 'data': {'title': f'示例视频 {i}', 'status': 'success'}})
+    return rows
+
+
+def _measure(app, repeat, **state):
+    for name, value in state.items():
+        app.session_state[name] = value
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    elements = len(app.expander) + len(app.button) + len(app.dataframe)
+    return statistics.median(samples), elements
+
+
+def run(sizes=(100, 1000, 5000), legacy_max=1000, repeat=3):
+    """返回 {'legacy': {行数: (秒, 元素数)}, 'paged': {...}}"""
+    import logging
+    from streamlit.testing.v1 import AppTest
+    from vp.results import BatchResults
+
+    logging.disable(logging.WARNING)
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False, encoding='utf-8') as f:
+        f.write(_SCRIPT.format(root=ROOT))
+        script = f.name
+    try:
+        app = AppTest.from_file(script, default_timeout=600)
+        # 预热：导入 DP3、pandas 等只在首次运行发生
+        warm = sample_rows(10)
+        _measure(app, 1, mode='paged', results=BatchResults.from_rows(enumerate(warm)))
+        _measure(app, 1, mode='legacy', rows=warm)
+
+        result = {'legacy': {}, 'paged': {}}
+        for size in sizes:
+            rows = sample_rows(size)
+            results = BatchResults.from_rows(enumerate(rows))
+            result['paged'][size] = _measure(app, repeat, mode='paged', results=results)
+            if size <= legacy_max:
+                result['legacy'][size] = _measure(app, repeat, mode='legacy', rows=rows)
+        return result
+    finally:
+        os.remove(script)
+        logging.disable(logging.NOTSET)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--legacy-max', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-scaling', type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    result = run(sorted(args.sizes), args.legacy_max, args.repeat)
+    print(f"{'行数':>8}{'旧版(ms)':>12}{'元素':>8}{'分页(ms)':>12}{'元素':>8}")
+    for size, (seconds, elements) in result['paged'].items():
+        legacy = result['legacy'].get(size)
+        legacy_text = f"{legacy[0] * 1000:>12.1f}{legacy[1]:>8}" if legacy else f"{'-':>12}{'-':>8}"
+        print(f"{size:>8}{legacy_text}{seconds * 1000:>12.1f}{elements:>8}")
+
+    paged = result['paged']
+    smallest, largest = paged[min(paged)][0], paged[max(paged)][0]
+    scaling = largest / smallest
+    print(f"\n分页渲染 {max(paged)} 行 / {min(paged)} 行 耗时比 {scaling:.2f}（上限 {args.max_scaling}）")
+    return 1 if scaling > args.max_scaling else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
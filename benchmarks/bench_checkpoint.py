@@ -0,0 +1,73 @@
+"""批量检查点写入开销：缓冲写出 + 间隔 fsync 与 逐条写出并 fsync 的单条耗时
+
+用法: python -m benchmarks.bench_checkpoint [条数] [--budget-us 50]
+
+结果行模拟 DP3 批量解析的成功记录（含完整视频信息）。逐条 fsync 只测前 --naive-rows 条。
+缓冲写入的单条开销超过预算时以非零状态退出。
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from vp.checkpoint import BatchCheckpoint
+
+
+def sample_record(i):
+    return {
+        'url': f'https://www.youtube.com/watch?v={i:011d}',
+        'status': 'success',
+        'title': f'示例视频 {i}',
+        'platform': 'youtube',
+        'error': None,
+        'data': {'title': f'示例视频 {i}', 'status': 'success', 'platform': 'youtube',
+                 'thumbnail': f'https://i.ytimg.com/vi/{i:011d}/hqdefault.jpg',
+                 'description': '视频简介文本 ' * 10, 'duration': 213, 'views': i * 17},
+    }
+
+
+def run(count=20_000, naive_rows=500):
+    """返回 {'buffered': 单条秒数, 'naive_fsync': 单条秒数, 'loaded': 读回条数}"""
+    records = [sample_record(i) for i in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = BatchCheckpoint.create([r['url'] for r in records], directory=tmp)
+        start = time.perf_counter()
+        with checkpoint.writer() as log:
+            for i, record in enumerate(records):
+                log.add(i, record)
+        buffered = (time.perf_counter() - start) / count
+        loaded = sum(1 for _ in checkpoint.load())
+
+        # 对照：每条结果立即写出并 fsync
+        path = os.path.join(tmp, 'naive.jsonl')
+        start = time.perf_counter()
+        with open(path, 'a', encoding='utf-8') as f:
+            for i, record in enumerate(records[:naive_rows]):
+                f.write(json.dumps({'i': i, **record}, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        naive = (time.perf_counter() - start) / naive_rows
+    return {'buffered': buffered, 'naive_fsync': naive, 'loaded': loaded}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('count', nargs='?', type=int, default=20_000)
+    parser.add_argument('--naive-rows', type=int, default=500)
+    parser.add_argument('--budget-us', type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    result = run(args.count, args.naive_rows)
+    print(f"{'缓冲写入':<14}{result['buffered'] * 1e6:>10.1f} us/条")
+    print(f"{'逐条 fsync':<14}{result['naive_fsync'] * 1e6:>10.1f} us/条")
+    print(f"读回 {result['loaded']}/{args.count} 条")
+    print(f"\n缓冲写入单条开销 {result['buffered'] * 1e6:.1f} us（预算 {args.budget_us:.0f} us）")
+    ok = result['loaded'] == args.count and result['buffered'] * 1e6 <= args.budget_us
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""爬虫离线场景基准：提取、批处理与下载吞吐，全部请求发往本地替身服务器
+
+用法: python -m benchmarks.bench_crawler [--pages 200] [--repeat 3]
+                                         [--output result.json]
+                                         [--baseline base.json] [--tolerance 0.25]
+
+场景:
+    extract_video_info  DP3 VideoStreamCrawler，不同大小的网页（冷缓存与热缓存）
+    get_video_info      DP4 VideoCrawler，网页与媒体直链
+    batch               iter_batch 并发处理慢响应页面
+    download            SegmentedDownloader 分段下载与 StreamFetcher 的 m3u8 分片下载
+
+吞吐(_per_sec)与并发效率(efficiency)越大越好，其余为秒，越小越好；存在回归时以非零状态退出。
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from functools import partial
+
+from benchmarks.standin import StandInServer
+
+PAGE_SIZES = (4 * 1024, 256 * 1024)
+SLOW_DELAY_MS = 50
+BATCH_WORKERS = 8
+MEDIA_BYTES = 64 * 1024 * 1024
+HLS_SEGMENTS = 100
+HLS_SEGMENT_BYTES = 256 * 1024
+WARM_ROUNDS = 5
+
+# 以这些后缀结尾的指标越大越好
+HIGHER_IS_BETTER = ('_per_sec', ':efficiency')
+# 延迟类指标回归判定的绝对下限(秒)，低于此差值视为测量噪声
+MIN_REGRESSION = 0.002
+
+
+def _load_apps():
+    """导入两个应用模块；裸模式下 Streamlit 的提示日志对基准无意义"""
+    logging.disable(logging.WARNING)
+    try:
+        import DP3
+        import DP4
+    finally:
+        logging.disable(logging.NOTSET)
+    return DP3, DP4
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _timed_calls(func, urls):
+    """逐个调用 func(url)，返回 (每次耗时列表, 失败数, 总耗时)"""
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for url in urls:
+        t0 = time.perf_counter()
+        try:
+            result = func(url)
+            if isinstance(result, dict) and result.get('status') == 'error':
+                errors += 1
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    return latencies, errors, time.perf_counter() - start
+
+
+def _call_metrics(prefix, urls, func):
+    """冷缓存一轮 + 热缓存多轮（命中缓存的调用很快，取最好的一轮以减少噪声）"""
+    latencies, errors, elapsed = _timed_calls(func, urls)
+    warm_errors, warm_elapsed = 0, float('inf')
+    for _ in range(WARM_ROUNDS):
+        _, failed, seconds = _timed_calls(func, urls)
+        warm_errors += failed
+        warm_elapsed = min(warm_elapsed, seconds)
+    return {
+        f'{prefix}:calls_per_sec': len(urls) / elapsed,
+        f'{prefix}:p50': statistics.median(latencies),
+        f'{prefix}:p95': _percentile(latencies, 0.95),
+        f'{prefix}:warm_calls_per_sec': len(urls) / warm_elapsed,
+    }, errors + warm_errors
+
+
+def bench_extract(DP3, server, pages, run_id):
+    metrics, errors = {}, 0
+    for size in PAGE_SIZES:
+        crawler = DP3.VideoStreamCrawler()
+        urls = [server.url(f'/page/{size}/{run_id}-{i}.html') for i in range(pages)]
+        result, failed = _call_metrics(f'extract_video_info:{size // 1024}k', urls,
+                                       crawler.extract_video_info)
+        metrics.update(result)
+        errors += failed
+    return metrics, errors
+
+
+def bench_get_info(DP4, server, pages, run_id):
+    metrics, errors = {}, 0
+    crawler = DP4.VideoCrawler()
+    urls = [server.url(f'/page/{PAGE_SIZES[-1]}/{run_id}-{i}.html') for i in range(pages)]
+    result, failed = _call_metrics('get_video_info:page', urls, crawler.get_video_info)
+    metrics.update(result)
+    errors += failed
+    # 媒体直链只应读取响应头，与文件大小无关
+    urls = [server.url(f'/media/{MEDIA_BYTES}/{run_id}-{i}.mp4') for i in range(pages)]
+    result, failed = _call_metrics('get_video_info:media', urls, crawler.get_video_info)
+    metrics.update(result)
+    return metrics, errors + failed
+
+
+def bench_batch(DP3, server, pages, run_id):
+    from vp.batch import iter_batch
+    from vp.retry import RetryBudget
+    crawler = DP3.VideoStreamCrawler()
+    urls = [server.url(f'/slow/{SLOW_DELAY_MS}/{run_id}-{i}.html') for i in range(pages)]
+    extract = partial(crawler.extract_video_info, retry_budget=RetryBudget())
+    errors = 0
+    start = time.perf_counter()
+    for _, _, video_info, error in iter_batch(extract, urls, BATCH_WORKERS):
+        if error is not None or video_info.get('status') != 'success':
+            errors += 1
+    elapsed = time.perf_counter() - start
+    ideal = BATCH_WORKERS / (SLOW_DELAY_MS / 1000)
+    return {
+        'batch:urls_per_sec': pages / elapsed,
+        'batch:efficiency': pages / elapsed / ideal,
+        'batch:elapsed': elapsed,
+    }, errors
+
+
+def bench_download(server, workdir, run_id):
+    from vp.downloader import SegmentedDownloader
+    from vp.session import build_session
+    from vp.stream_fetcher import StreamFetcher
+    session = build_session()
+    errors = 0
+    dest = os.path.join(workdir, f'{run_id}.mp4')
+    result = SegmentedDownloader(session).download(server.url(f'/media/{MEDIA_BYTES}/{run_id}.mp4'), dest)
+    if result['size'] != MEDIA_BYTES:
+        errors += 1
+    segmented = result['size'] / result['elapsed'] / 1024 / 1024
+    os.remove(dest)
+
+    dest = os.path.join(workdir, f'{run_id}.ts')
+    result = StreamFetcher(session).download(
+        server.url(f'/hls/{HLS_SEGMENTS}/{HLS_SEGMENT_BYTES}/index.m3u8'), dest)
+    if result['size'] != HLS_SEGMENTS * HLS_SEGMENT_BYTES:
+        errors += 1
+    hls = result['size'] / result['elapsed'] / 1024 / 1024
+    os.remove(dest)
+    session.close()
+    return {'download:segmented_mb_per_sec': segmented, 'download:hls_mb_per_sec': hls}, errors
+
+
+def run(pages=200, repeat=3):
+    """执行全部场景，返回 {'config', 'scenarios': {场景: {指标: 值}}, 'metrics', 'errors', 'server'}"""
+    DP3, DP4 = _load_apps()
+    samples = {}
+    errors = {}
+    cwd = os.getcwd()
+    with StandInServer() as server, tempfile.TemporaryDirectory() as workdir:
+        # 缩略图缓存等相对路径落在临时目录中
+        os.chdir(workdir)
+        try:
+            for run_id in range(repeat):
+                scenarios = {
+                    'extract_video_info': lambda: bench_extract(DP3, server, pages, run_id),
+                    'get_video_info': lambda: bench_get_info(DP4, server, pages, run_id),
+                    'batch': lambda: bench_batch(DP3, server, pages, run_id),
+                    'download': lambda: bench_download(server, workdir, run_id),
+                }
+                for name, scenario in scenarios.items():
+                    metrics, failed = scenario()
+                    errors[name] = errors.get(name, 0) + failed
+                    for metric, value in metrics.items():
+                        samples.setdefault(name, {}).setdefault(metric, []).append(value)
+        finally:
+            os.chdir(cwd)
+        server_stats = {'requests': dict(server.requests), 'range_requests': server.range_requests,
+                        'bytes_sent': server.bytes_sent}
+
+    scenarios = {name: {metric: statistics.median(values) for metric, values in items.items()}
+                 for name, items in samples.items()}
+    metrics = {metric: value for items in scenarios.values() for metric, value in items.items()}
+    return {
+        'config': {'pages': pages, 'repeat': repeat, 'page_sizes': PAGE_SIZES,
+                   'slow_delay_ms': SLOW_DELAY_MS, 'batch_workers': BATCH_WORKERS,
+                   'media_bytes': MEDIA_BYTES, 'cpu_count': os.cpu_count()},
+        'scenarios': scenarios,
+        'metrics': metrics,
+        'errors': errors,
+        'server': server_stats,
+    }
+
+
+def higher_is_better(name):
+    return name.endswith(HIGHER_IS_BETTER)
+
+
+def compare(current, baseline, tolerance=0.25):
+    """对比基线，返回回归列表 [(指标, 基线值, 当前值)]"""
+    regressions = []
+    for name, base in baseline.get('metrics', {}).items():
+        now = current['metrics'].get(name)
+        if now is None:
+            continue
+        if higher_is_better(name):
+            if now < base * (1 - tolerance):
+                regressions.append((name, base, now))
+        elif now > base * (1 + tolerance) and now - base > MIN_REGRESSION:
+            regressions.append((name, base, now))
+    return regressions
+
+
+def report(result):
+    """打印人类可读的结果表"""
+    for name, metrics in result['scenarios'].items():
+        flag = f"  失败 {result['errors'][name]} 次!" if result['errors'].get(name) else ''
+        print(f"[{name}]{flag}")
+        for metric, value in metrics.items():
+            label = metric.split(':', 1)[1]
+            if higher_is_better(metric):
+                print(f"  {label:<36}{value:>12.2f}")
+            else:
+                print(f"  {label:<36}{value * 1000:>10.2f}ms")
+    print(f"\n替身服务器: {result['server']['requests']}，"
+          f"Range 请求 {result['server']['range_requests']}，"
+          f"发送 {result['server']['bytes_sent'] / 1024 / 1024:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    result = run(args.pages, args.repeat)
+    report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    failed = any(result['errors'].values())
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for name, base, now in regressions:
+            print(f"回归: {name} {base:.4g} -> {now:.4g}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""按主机自适应并发（AIMD）基准：固定并发与自适应并发在快速主机和限流主机上的耗时与 429 次数
+
+用法: python -m benchmarks.bench_host_limits [--pages 200] [--workers 16] [--fixed 3]
+                                             [--slots 4] [--delay-ms 50] [--max-429-ratio 0.25]
+
+请求按 get_video_info 的方式经 RetryPolicy 执行，页面由本地替身服务器提供：
+    快速主机  127.0.0.1 /slow/<毫秒>      不限并发
+    限流主机  localhost /limited/<并发>/<毫秒>  超过并发数返回 429（Retry-After: 1）
+对照为不经限制器、以 --fixed 与 --workers 个线程固定并发。自适应方式在限流主机上的 429 次数
+超过固定 --workers 并发的 --max-429-ratio，或在快速主机上慢于固定 --fixed 并发时以非零状态退出。
+"""
+
+import argparse
+import sys
+import time
+from functools import partial
+
+from benchmarks.standin import StandInServer
+from vp.batch import iter_batch
+from vp.htmlmeta import fetch_page_meta
+from vp.limits import AdaptiveLimiter
+from vp.retry import RetryPolicy
+from vp.session import build_session
+
+
+def _run(urls, workers, limiter=None):
+    session = build_session(pool_maxsize=max(workers, 10))
+    fetch = partial(fetch_page_meta, session)
+    if limiter is not None:
+        fetch = partial(limiter.call, fetch)
+    policy = RetryPolicy(max_attempts=8, base_delay=0.05)
+    start = time.perf_counter()
+    failed = sum(1 for *_, error in iter_batch(partial(policy.call, fetch), urls, workers) if error)
+    return time.perf_counter() - start, failed
+
+
+def run(pages=200, workers=16, fixed=3, slots=4, delay_ms=50):
+    """返回 {(主机, 方式): {'seconds', 'failed', 'throttled', 'limit'}}"""
+    result = {}
+    with StandInServer() as server:
+        port = server.server_address[1]
+        hosts = {
+            'fast': [f'http://127.0.0.1:{port}/slow/{delay_ms}/{i}.html' for i in range(pages)],
+            'limited': [f'http://localhost:{port}/limited/{slots}/{delay_ms}/{i}.html' for i in range(pages)],
+        }
+        for host, urls in hosts.items():
+            for mode, count, limiter in ((f'fixed-{fixed}', fixed, None), (f'fixed-{workers}', workers, None),
+                                         ('adaptive', workers, AdaptiveLimiter(max_limit=workers))):
+                server.reset_stats()
+                seconds, failed = _run(urls, count, limiter)
+                rows = limiter.snapshot() if limiter else []
+                result[(host, mode)] = {'seconds': seconds, 'failed': failed,
+                                        'throttled': server.requests.get('throttled', 0),
+                                        'limit': rows[0]['limit'] if rows else count}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--fixed', type=int, default=3)
+    parser.add_argument('--slots', type=int, default=4)
+    parser.add_argument('--delay-ms', type=int, default=50)
+    parser.add_argument('--max-429-ratio', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    result = run(args.pages, args.workers, args.fixed, args.slots, args.delay_ms)
+    print(f"{'主机':>8}{'方式':>10}{'耗时(s)':>9}{'页/秒':>8}{'429':>6}{'失败':>6}{'最终上限':>9}")
+    for (host, mode), row in result.items():
+        print(f"{host:>8}{mode:>10}{row['seconds']:>9.2f}{args.pages / row['seconds']:>8.1f}"
+              f"{row['throttled']:>6}{row['failed']:>6}{row['limit']:>9}")
+
+    fixed, wide = f'fixed-{args.fixed}', f'fixed-{args.workers}'
+    throttled = result[('limited', 'adaptive')]['throttled']
+    baseline = result[('limited', wide)]['throttled']
+    fast_ok = result[('fast', 'adaptive')]['seconds'] <= result[('fast', fixed)]['seconds']
+    limited_ok = throttled <= baseline * args.max_429_ratio
+    print(f"\n限流主机 429: 自适应 {throttled} 次，固定 {args.workers} 并发 {baseline} 次"
+          f"（上限 {args.max_429_ratio:.0%}）：{'通过' if limited_ok else '未通过'}")
+    print(f"快速主机: 自适应 {result[('fast', 'adaptive')]['seconds']:.2f}s，固定 {args.fixed} 并发 "
+          f"{result[('fast', fixed)]['seconds']:.2f}s：{'通过' if fast_ok else '未通过'}")
+    return 0 if fast_ok and limited_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""磁盘HTTP缓存基准：重复抓取同一批通用页面时的传输字节数、耗时与 304 比例
+
+用法: python -m benchmarks.bench_http_cache [--pages 50] [--size 262144] [--rounds 3]
+                                            [--max-warm-ratio 0.05]
+
+页面由本地替身服务器提供（/etag 路由带 ETag/Last-Modified），每轮完整读取正文。
+max-age=0 的页面每轮都需重新验证（未变化时为 304），max-age=3600 的页面第二轮起直接命中。
+另按 fetch_page_meta 的方式只读 <head>：缓存不预读正文，这类请求不应留下缓存条目。
+带缓存会话在第二轮起的服务端发送字节数超过首轮的 max-warm-ratio，或只读 <head> 的请求
+写入了缓存条目时以非零状态退出。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.standin import StandInServer
+from vp.htmlmeta import fetch_page_meta
+from vp.httpcache import HttpCache
+from vp.session import build_session
+
+
+def _round(server, session, urls):
+    server.reset_stats()
+    start = time.perf_counter()
+    for url in urls:
+        session.get(url, timeout=30).content
+    return {'seconds': time.perf_counter() - start, 'bytes': server.bytes_sent,
+            'not_modified': server.requests.get('not_modified', 0)}
+
+
+def run(pages=50, size=256 * 1024, rounds=3):
+    """返回 {(方式, max-age): [每轮 {'seconds', 'bytes', 'not_modified'}]}"""
+    result = {}
+    with StandInServer() as server, tempfile.TemporaryDirectory() as tmp:
+        for max_age in (0, 3600):
+            urls = [server.url(f'/etag/{max_age}/{size}/{i}.html') for i in range(pages)]
+            plain = build_session()
+            cache = HttpCache(os.path.join(tmp, f'cache_{max_age}'), max_bytes=1024 * 1024 * 1024,
+                              max_entry_bytes=max(size * 2, 2 * 1024 * 1024))
+            cached = build_session(cache=cache)
+            result[('plain', max_age)] = [_round(server, plain, urls) for _ in range(rounds)]
+            result[('cached', max_age)] = [_round(server, cached, urls) for _ in range(rounds)]
+            result[('stats', max_age)] = cache.stats()
+        # 只读 <head> 的流式请求
+        cache = HttpCache(os.path.join(tmp, 'cache_head'), max_entry_bytes=max(size * 2, 2 * 1024 * 1024))
+        session = build_session(cache=cache)
+        for url in [server.url(f'/etag/3600/{size}/head{i}.html') for i in range(pages)]:
+            fetch_page_meta(session, url)
+        result['head_entries'] = cache.stats()['entries']
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--size', type=int, default=256 * 1024)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--max-warm-ratio', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    result = run(args.pages, args.size, max(2, args.rounds))
+    print(f"{'方式':>8}{'max-age':>9}{'轮次':>6}{'耗时(ms)':>11}{'发送(KB)':>11}{'304':>6}")
+    failed = False
+    for max_age in (0, 3600):
+        for mode in ('plain', 'cached'):
+            rows = result[(mode, max_age)]
+            for i, row in enumerate(rows, 1):
+                print(f"{mode:>8}{max_age:>9}{i:>6}{row['seconds'] * 1000:>11.1f}"
+                      f"{row['bytes'] / 1024:>11.0f}{row['not_modified']:>6}")
+        stats = result[('stats', max_age)]
+        print(f"  缓存: 命中 {stats['hits']}，304 {stats['not_modified']}/{stats['revalidations']}"
+              f"（{stats['not_modified_ratio']:.0%}），节省 {stats['bytes_saved'] / 1024 / 1024:.1f} MB")
+        cached = result[('cached', max_age)]
+        warm = max(row['bytes'] for row in cached[1:])
+        if cached[0]['bytes'] and warm > cached[0]['bytes'] * args.max_warm_ratio:
+            failed = True
+    print(f"\n带缓存会话第二轮起的发送字节数上限为首轮的 {args.max_warm_ratio:.0%}：{'未通过' if failed else '通过'}")
+    print(f"只读 <head> 的 {args.pages} 个请求留下缓存条目 {result['head_entries']} 个："
+          f"{'通过' if not result['head_entries'] else '未通过'}")
+    failed = failed or bool(result['head_entries'])
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
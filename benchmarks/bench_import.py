@@ -0,0 +1,111 @@
+"""URL列表导入基准：整段读入拆分 + 集合去重 与 流式读取 + 布隆过滤器去重 的吞吐和峰值内存
+
+用法: python -m benchmarks.bench_import [--sizes 50000 200000] [--duplicates 0.3]
+                                        [--capacity 1000000] [--max-growth 1.5]
+
+合成文件混合 YouTube 各种链接形式与带追踪参数的普通链接，重复比例由 --duplicates 指定。
+峰值内存用 tracemalloc 统计（单独一轮，吞吐在不开启 tracemalloc 时测量）。
+流式导入的峰值内存在最大与最小文件间增长超过 max-growth 倍时以非零状态退出。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from vp.urls import canonical_url
+from vp.urlimport import UrlImport
+
+
+def legacy_import(path):
+    """原实现：整个文本读入后拆分成列表，再用集合去重"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    urls = [url.strip() for url in text.split('\n') if url.strip()]
+    seen = set()
+    unique = []
+    for url in urls:
+        key = canonical_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(key)
+    return len(urls), len(unique)
+
+
+def streaming_import(path, capacity):
+    importer = UrlImport(path, capacity=capacity)
+    unique = sum(1 for _ in importer)
+    return importer.stats.lines, unique
+
+
+def write_sample(path, count, duplicates):
+    """生成 count 行URL，约 duplicates 比例的行是之前某个视频的另一种写法"""
+    distinct = max(1, int(count * (1 - duplicates)))
+    forms = (
+        'https://www.youtube.com/watch?v={id}',
+        'https://youtu.be/{id}?si=share',
+        'www.youtube.com/watch?v={id}&t=30',
+        'https://cdn{host}.example.com/video/{n}.mp4',
+        'https://cdn{host}.example.com/video/{n}.mp4?utm_source=feed&utm_medium=rss',
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            n = i if i < distinct else (i * 7919) % distinct
+            # 偶数编号为 YouTube 视频，奇数为普通直链
+            form = forms[i % 3] if n % 2 == 0 else forms[3 + i % 2]
+            f.write(form.format(id=f'{n:011d}', host=n % 20, n=n) + '\n')
+
+
+def _measure(func, *args):
+    start = time.perf_counter()
+    lines, unique = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'lines': lines, 'unique': unique, 'seconds': elapsed,
+            'lines_per_sec': lines / elapsed, 'peak_bytes': peak}
+
+
+def run(sizes=(50_000, 200_000), duplicates=0.3, capacity=1_000_000):
+    """返回 {行数: {'legacy': {...}, 'streaming': {...}}}"""
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'urls_{size}.txt')
+            write_sample(path, size, duplicates)
+            result[size] = {
+                'legacy': _measure(legacy_import, path),
+                'streaming': _measure(streaming_import, path, capacity),
+            }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50_000, 200_000])
+    parser.add_argument('--duplicates', type=float, default=0.3)
+    parser.add_argument('--capacity', type=int, default=1_000_000,
+                        help='布隆过滤器预期条数（各文件相同，用于观察内存是否随行数增长）')
+    parser.add_argument('--max-growth', type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    result = run(sorted(args.sizes), args.duplicates, args.capacity)
+    print(f"{'行数':>10}{'方式':>12}{'行/秒':>12}{'唯一URL':>10}{'去重率':>8}{'峰值内存(MB)':>14}")
+    for size, modes in result.items():
+        for mode, item in modes.items():
+            ratio = 1 - item['unique'] / item['lines'] if item['lines'] else 0.0
+            print(f"{size:>10}{mode:>12}{item['lines_per_sec']:>12,.0f}{item['unique']:>10}"
+                  f"{ratio:>8.1%}{item['peak_bytes'] / 1024 / 1024:>14.1f}")
+
+    smallest, largest = min(result), max(result)
+    growth = result[largest]['streaming']['peak_bytes'] / result[smallest]['streaming']['peak_bytes']
+    print(f"\n流式导入峰值内存 {largest} 行 / {smallest} 行 = {growth:.2f} 倍（上限 {args.max_growth}）")
+    return 1 if growth > args.max_growth else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""关键帧引擎基准与正确性检查：用 cv2.VideoWriter 生成合成视频
+
+用法: python -m benchmarks.bench_keyframes [时长秒] [--fps 25] [--size 640x360] [--count 9]
+
+合成视频每秒切换一种底色（B 通道编码秒数），据此校验缩略图是否取自
+预期时间点；同时对比逐帧解码、单进程 seek 与多进程 seek 的耗时。
+校验失败时以非零状态退出。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from vp.keyframes import analyze_video, grab_frames, probe, sample_times
+
+
+def second_color(second):
+    """第 second 秒的底色 (B, G, R)"""
+    return (second * 37) % 256, 128, 64
+
+
+def make_video(path, seconds, fps, width, height):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError("VideoWriter 无法创建视频")
+    frame = np.zeros((height, width, 3), np.uint8)
+    for i in range(int(seconds * fps)):
+        frame[:] = second_color(int(i // fps))
+        # 移动的白色方块，让帧有纹理以便封面打分
+        x = (i * 7) % max(1, width - 40)
+        frame[height // 2 - 20:height // 2 + 20, x:x + 40] = 255
+        writer.write(frame)
+    writer.release()
+
+
+def decode_all(path):
+    """对照组：逐帧解码整段视频"""
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.grab():
+        count += 1
+    cap.release()
+    return count
+
+
+def check_frames(frames, tolerance=12):
+    """校验每张缩略图左上角颜色与其时间点对应的底色一致"""
+    errors = []
+    for t, data, _ in frames:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        blue = int(image[:8, :8, 0].mean())
+        expected = second_color(int(t))[0]
+        if abs(blue - expected) > tolerance:
+            errors.append(f"t={t}s 期望B={expected} 实际B={blue}")
+    return errors
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('seconds', nargs='?', type=int, default=120)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--size', default='640x360')
+    parser.add_argument('--count', type=int, default=9)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+    width, height = map(int, args.size.split('x'))
+
+    directory = tempfile.mkdtemp(prefix='bench_keyframes_')
+    path = os.path.join(directory, 'synthetic.mp4')
+    failed = False
+    try:
+        _, elapsed = timed(make_video, path, args.seconds, args.fps, width, height)
+        print(f"生成合成视频 {args.seconds}s {args.size}@{args.fps}fps 耗时 {elapsed:.2f}s")
+
+        info = probe(path)
+        print(f"探测: 时长 {info['duration']}s  帧率 {info['fps']}  分辨率 {info['resolution']}"
+              f"  编码 {info['codec']}")
+        if (info['width'], info['height']) != (width, height) or \
+                abs(info['duration'] - args.seconds) > 1 or abs(info['fps'] - args.fps) > 0.5:
+            print("错误: 元数据与写入参数不一致")
+            failed = True
+
+        frames_total, full = timed(decode_all, path)
+        times = sample_times(info['duration'], args.count)
+        serial, serial_time = timed(grab_frames, path, times, info['fps'], 1)
+        parallel, parallel_time = timed(grab_frames, path, times, info['fps'], args.workers)
+        print(f"逐帧解码 {frames_total} 帧      {full:7.2f}s")
+        print(f"单进程 seek {len(serial)} 张      {serial_time:7.2f}s")
+        print(f"{args.workers} 进程 seek {len(parallel)} 张       {parallel_time:7.2f}s"
+              "（含进程启动）")
+
+        for label, frames in (('单进程', serial), ('多进程', parallel)):
+            if len(frames) != len(times):
+                print(f"错误: {label}缩略图数量 {len(frames)} != {len(times)}")
+                failed = True
+            for error in check_frames(frames):
+                print(f"错误: {label} {error}")
+                failed = True
+
+        result, elapsed = timed(analyze_video, path, count=args.count)
+        poster = cv2.imdecode(np.frombuffer(result['poster'], np.uint8), cv2.IMREAD_COLOR)
+        grid = cv2.imdecode(np.frombuffer(result['grid'], np.uint8), cv2.IMREAD_COLOR)
+        print(f"analyze_video 耗时 {elapsed:.2f}s  网格 {grid.shape[1]}x{grid.shape[0]}"
+              f"  封面 {poster.shape[1]}x{poster.shape[0]} @ {result['poster_time']}s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""指标记录开销微基准：计时器、直方图记录与错误计数的单次耗时
+
+用法: python -m benchmarks.bench_metrics [次数] [--budget-us 10]
+
+同时给出平台识别在记录与不记录指标时的吞吐对比；单次记录开销超过预算时以非零状态退出。
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from vp.metrics import Metrics
+from vp.registry import REGISTRY
+
+
+def _per_call(func, count):
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        func(count)
+        best = min(best, time.perf_counter() - start)
+    return best / count
+
+
+def run(count=200_000):
+    """返回 {场景: 单次耗时(秒)}"""
+    metrics = Metrics()
+    disabled = Metrics(enabled=False)
+
+    def empty(n):
+        for _ in range(n):
+            pass
+
+    def timer(n):
+        for _ in range(n):
+            with metrics.timer('fetch', 'generic', inflight=True):
+                pass
+
+    def timer_disabled(n):
+        for _ in range(n):
+            with disabled.timer('fetch', 'generic', inflight=True):
+                pass
+
+    def observe(n):
+        for i in range(n):
+            metrics.observe('detect', i * 1e-7, 'youtube')
+
+    def count_error(n):
+        for _ in range(n):
+            metrics.count_error('ConnectionError', 'generic')
+
+    urls = [f'https://www.youtube.com/watch?v=v{i % 1000}' for i in range(count)]
+
+    def detect(n):
+        for url in urls[:n]:
+            REGISTRY.detect(url)
+
+    def detect_observed(n):
+        for url in urls[:n]:
+            start = time.perf_counter()
+            platform = REGISTRY.detect(url)
+            metrics.observe('detect', time.perf_counter() - start, platform)
+
+    def contended(n):
+        # 4 个线程同时记录，观察锁竞争下的单次开销
+        threads = [threading.Thread(target=timer, args=(n // 4,)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    baseline = _per_call(empty, count)
+    results = {name: _per_call(func, count) - baseline for name, func in [
+        ('timer', timer), ('timer_disabled', timer_disabled), ('observe', observe),
+        ('count_error', count_error), ('timer_4_threads', contended),
+    ]}
+    results['detect'] = _per_call(detect, count)
+    results['detect_observed'] = _per_call(detect_observed, count)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('count', nargs='?', type=int, default=200_000)
+    parser.add_argument('--budget-us', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    results = run(args.count)
+    for name, seconds in results.items():
+        print(f"{name:<18}{seconds * 1e6:>10.2f} us/次")
+    overhead = max(results['timer'], results['observe'], results['count_error'])
+    print(f"\n单次记录开销 {overhead * 1e6:.2f} us（预算 {args.budget_us:.1f} us）")
+    return 1 if overhead * 1e6 > args.budget_us else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
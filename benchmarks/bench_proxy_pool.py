@@ -0,0 +1,84 @@
+"""代理池路由基准：按延迟与成功率选择代理，以及避开已对目标主机限流的代理
+
+用法: python -m benchmarks.bench_proxy_pool [--requests 200] [--latency-ms 5,30,80]
+                                            [--min-share 0.8]
+
+本地替身服务器提供网页，若干替身代理分别注入不同延迟；最快的代理对 localhost 返回 429。
+先经 127.0.0.1 请求（对照为随机选择代理），再经 localhost 请求。
+最快代理承担的 127.0.0.1 流量低于 --min-share，或被限流的代理/主机组合收到多于 1 个请求时以非零状态退出。
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.standin import StandInProxy, StandInServer
+from vp.proxies import ProxyPool
+from vp.session import build_session
+
+
+def _fetch(session, urls):
+    start = time.perf_counter()
+    statuses = {}
+    for url in urls:
+        status = session.get(url, timeout=10).status_code
+        statuses[status] = statuses.get(status, 0) + 1
+    return time.perf_counter() - start, statuses
+
+
+def run(count=200, latencies=(0.005, 0.03, 0.08)):
+    """返回 {'routed'/'random'/'throttled': {'seconds', 'statuses', 'share': [各代理请求数]}}"""
+    result = {}
+    with StandInServer() as server:
+        port = server.server_address[1]
+        for mode, explore in (('random', 1.0), ('routed', 0.05), ('throttled', 0.05)):
+            proxies = [StandInProxy(latency, throttle_hosts=['localhost'] if i == 0 else ()).start()
+                       for i, latency in enumerate(latencies)]
+            try:
+                pool = ProxyPool(check_url=server.url('/status/204/check'), check_interval=3600,
+                                 explore_ratio=explore)
+                pool.set_proxies([p.base_url for p in proxies])
+                pool.check_all()
+                session = build_session(proxy_pool=pool)
+                host = 'localhost' if mode == 'throttled' else '127.0.0.1'
+                urls = [f'http://{host}:{port}/page/4096/{i}.html' for i in range(count)]
+                for p in proxies:
+                    p.reset_stats()
+                seconds, statuses = _fetch(session, urls)
+                result[mode] = {'seconds': seconds, 'statuses': statuses,
+                                'share': [p.requests.get(host, 0) for p in proxies],
+                                'rejected': pool.rejected}
+                pool.close()
+            finally:
+                for p in proxies:
+                    p.stop()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency-ms', default='5,30,80')
+    parser.add_argument('--min-share', type=float, default=0.8)
+    args = parser.parse_args(argv)
+
+    latencies = [float(v) / 1000 for v in args.latency_ms.split(',')]
+    result = run(args.requests, latencies)
+    names = [f'{v * 1000:.0f}ms' for v in latencies]
+    print(f"{'方式':>10}{'耗时(s)':>10}{'ms/请求':>10}  " + ''.join(f'{n:>8}' for n in names) + '  状态码')
+    for mode in ('random', 'routed', 'throttled'):
+        row = result[mode]
+        print(f"{mode:>10}{row['seconds']:>10.2f}{row['seconds'] / args.requests * 1000:>10.1f}  "
+              + ''.join(f'{n:>8}' for n in row['share']) + f"  {row['statuses']}")
+
+    share = result['routed']['share'][0] / args.requests
+    leaked = result['throttled']['share'][0]
+    print(f"\n最快代理承担 {share:.0%} 的流量（下限 {args.min_share:.0%}）；"
+          f"限流后仍发往该代理的 localhost 请求 {max(leaked - 1, 0)} 个")
+    failed = share < args.min_share or leaked > 1
+    print('未通过' if failed else '通过')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""平台识别微基准：旧版逐次构建字典 + 子串扫描 与 注册表后缀索引 的吞吐对比
+
+用法: python -m benchmarks.bench_registry [URL数量]
+"""
+
+import random
+import re
+import sys
+import time
+from urllib.parse import urlparse
+
+from vp.registry import REGISTRY
+
+
+def legacy_detect_platform(url):
+    """DP3 原实现：每次调用重建平台表并做子串扫描"""
+    if not url or not isinstance(url, str):
+        return 'unknown'
+    try:
+        domain = urlparse(url).netloc.lower()
+        platforms = {
+            'youtube': ['youtube.com', 'youtu.be'],
+            'bilibili': ['bilibili.com', 'b23.tv'],
+            'vimeo': ['vimeo.com'],
+            'dailymotion': ['dailymotion.com'],
+            'twitch': ['twitch.tv']
+        }
+        for platform, domains in platforms.items():
+            if any(d in domain for d in domains):
+                return platform
+        return 'generic'
+    except Exception:
+        return 'unknown'
+
+
+def legacy_youtube_id(url):
+    """DP3 原实现：每次调用重新编译(查缓存)正则"""
+    patterns = [
+        r'(?:youtube\.com/watch\?v=|youtu\.be/)([^&?\n]+)',
+        r'youtube\.com/embed/([^&?\n]+)'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def sample_urls(count, seed=42):
+    """生成混合平台的URL样本"""
+    rng = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-'
+    makers = [
+        lambda i: f'https://www.youtube.com/watch?v={"".join(rng.choices(alphabet, k=11))}&t={i % 90}',
+        lambda i: f'https://youtu.be/{"".join(rng.choices(alphabet, k=11))}',
+        lambda i: f'https://www.bilibili.com/video/BV1{"".join(rng.choices(alphabet[:62], k=9))}',
+        lambda i: f'https://vimeo.com/{rng.randint(10**6, 10**9)}',
+        lambda i: f'https://www.twitch.tv/videos/{rng.randint(10**6, 10**9)}',
+        lambda i: f'https://cdn{i % 50}.example{i % 500}.com/video/{i}.mp4',
+        lambda i: f'https://notyoutube.com/watch?v={i}',
+    ]
+    return [rng.choice(makers)(i) for i in range(count)]
+
+
+def _rate(func, urls, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(urls)
+        best = min(best, time.perf_counter() - start)
+    return len(urls) / best
+
+
+def run(count=200_000):
+    """运行基准并返回 {场景: URL/秒}"""
+    urls = sample_urls(count)
+
+    def legacy(batch):
+        for url in batch:
+            if legacy_detect_platform(url) == 'youtube':
+                legacy_youtube_id(url)
+
+    def registry(batch):
+        for url in batch:
+            REGISTRY.identify(url)
+
+    return {
+        'legacy_detect_and_id': _rate(legacy, urls),
+        'registry_identify': _rate(registry, urls),
+        'registry_classify': _rate(REGISTRY.classify, urls),
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    results = run(count)
+    baseline = results['legacy_detect_and_id']
+    print(f'{"场景":<24}{"URL/秒":>14}{"加速比":>10}')
+    for name, rate in results.items():
+        print(f'{name:<24}{rate:>14,.0f}{rate / baseline:>9.1f}x')
+    legacy_hits = sum(legacy_detect_platform(u) == 'youtube' for u in sample_urls(1000))
+    registry_hits = sum(REGISTRY.detect(u) == 'youtube' for u in sample_urls(1000))
+    print(f'误判检查(1000条中识别为youtube): 旧版 {legacy_hits}，注册表 {registry_hits}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""镜头切换检测基准：合成已知切点的视频，校验检测结果并报告每秒处理帧数
+
+用法: python -m benchmarks.bench_scenes [时长秒] [--fps 25] [--size 640x360] [--workers 2]
+
+对比三种实现的吞吐：逐帧 cv2.calcHist/compareHist 的 Python 循环、批量 NumPy
+直方图（单进程）、批量 NumPy 直方图（多进程）。切点漏检或误检时以非零状态退出。
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from vp.scenes import (BATCH_SIZE, FRAME_WIDTH, detect_scenes, histogram_distances,
+                       histograms, load_index)
+
+
+def make_video(path, seconds, fps, width, height, seed=7):
+    """生成随机长度镜头拼接的视频，返回真实切点帧号列表"""
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError("VideoWriter 无法创建视频")
+    total = int(seconds * fps)
+    cuts, frame = [], 0
+    while frame < total:
+        length = rng.randint(int(1.5 * fps), int(5 * fps))
+        if frame:
+            cuts.append(frame)
+        # 每个镜头：不同底色 + 固定纹理 + 移动的方块（镜头内变化，不应判为切换）
+        base = np.array([rng.randrange(256) for _ in range(3)], np.int16)
+        texture = noise.integers(-40, 40, (height, width, 3), dtype=np.int16)
+        background = np.clip(base + texture, 0, 255).astype(np.uint8)
+        box = tuple(rng.randrange(256) for _ in range(3))
+        for i in range(min(length, total - frame)):
+            image = background.copy()
+            x = (i * 5) % max(1, width - 60)
+            cv2.rectangle(image, (x, height // 3), (x + 60, height // 3 + 60), box, -1)
+            writer.write(image)
+        frame += length
+    writer.release()
+    return cuts
+
+
+def naive_scan(path, width=FRAME_WIDTH):
+    """对照组：逐帧调用 calcHist/compareHist"""
+    cap = cv2.VideoCapture(path)
+    previous, decoded = None, 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        decoded += 1
+        height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+        small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        hist = cv2.calcHist([small], [0, 1, 2], None, [8, 8, 8], [0, 256] * 3)
+        hist /= small.shape[0] * small.shape[1]
+        if previous is not None:
+            cv2.compareHist(previous, hist, cv2.HISTCMP_BHATTACHARYYA)
+        previous = hist
+    cap.release()
+    return decoded
+
+
+def small_frames(path, width=FRAME_WIDTH):
+    """解码并缩小全部帧，供单独测量直方图阶段"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+        frames.append(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+    cap.release()
+    return np.stack(frames)
+
+
+def histogram_stage(frames):
+    """直方图阶段吞吐 (逐帧 calcHist 帧/秒, 批量 NumPy 帧/秒)"""
+    start = time.perf_counter()
+    previous = None
+    for frame in frames:
+        hist = cv2.calcHist([frame], [0, 1, 2], None, [8, 8, 8], [0, 256] * 3)
+        if previous is not None:
+            cv2.compareHist(previous, hist, cv2.HISTCMP_BHATTACHARYYA)
+        previous = hist
+    naive = len(frames) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    previous = None
+    for offset in range(0, len(frames), BATCH_SIZE):
+        hist = histograms(frames[offset:offset + BATCH_SIZE])
+        histogram_distances(hist, previous)
+        previous = hist[-1]
+    batched = len(frames) / (time.perf_counter() - start)
+    return naive, batched
+
+
+def decode_only(path):
+    cap = cv2.VideoCapture(path)
+    decoded = 0
+    while cap.read()[0]:
+        decoded += 1
+    cap.release()
+    return decoded
+
+
+def evaluate(expected, detected, tolerance=1):
+    """返回 (漏检切点, 误检切点)"""
+    missed = [c for c in expected if not any(abs(c - d) <= tolerance for d in detected)]
+    extra = [d for d in detected if not any(abs(c - d) <= tolerance for c in expected)]
+    return missed, extra
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('seconds', nargs='?', type=int, default=120)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--size', default='640x360')
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args(argv)
+    width, height = map(int, args.size.split('x'))
+
+    directory = tempfile.mkdtemp(prefix='bench_scenes_')
+    path = os.path.join(directory, 'synthetic.mp4')
+    failed = False
+    try:
+        expected = make_video(path, args.seconds, args.fps, width, height)
+        print(f"合成视频 {args.seconds}s {args.size}@{args.fps}fps，真实切点 {len(expected)} 个")
+
+        rows = []
+        start = time.perf_counter()
+        frames = decode_only(path)
+        rows.append(('仅解码', frames, time.perf_counter() - start))
+        start = time.perf_counter()
+        frames = naive_scan(path)
+        rows.append(('逐帧 calcHist', frames, time.perf_counter() - start))
+
+        for label, workers in (('批量 NumPy 单进程', 1), (f'批量 NumPy {args.workers} 进程', args.workers)):
+            index = detect_scenes(path, workers=workers, use_index=False)
+            rows.append((label, index['decoded_frames'], index['elapsed']))
+            detected = [scene['start_frame'] for scene in index['scenes'][1:]]
+            missed, extra = evaluate(expected, detected)
+            print(f"{label}: 检出镜头 {len(index['scenes'])} 个，漏检 {len(missed)}，误检 {len(extra)}")
+            if missed or extra:
+                print(f"  漏检 {missed[:10]} 误检 {extra[:10]}")
+                failed = True
+
+        print(f"\n{'实现':<20}{'帧数':>8}{'耗时(s)':>10}{'帧/秒':>10}")
+        for label, frames, elapsed in rows:
+            print(f"{label:<20}{frames:>8}{elapsed:>10.2f}{frames / elapsed:>10.0f}")
+
+        naive, batched = histogram_stage(small_frames(path))
+        print(f"\n仅直方图阶段: 逐帧 calcHist {naive:.0f} 帧/秒，批量 NumPy {batched:.0f} 帧/秒")
+
+        start = time.perf_counter()
+        cached = load_index(path)
+        print(f"复用已持久化索引耗时 {(time.perf_counter() - start) * 1000:.1f} ms"
+              f"（{'命中' if cached else '未命中'}）")
+        if cached is None:
+            failed = True
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""DP4 冷启动基准：逐模块导入耗时 + 各页面首次渲染耗时，并可与基线比较发现回归
+
+用法: python -m benchmarks.bench_startup [--app DP4.py] [--repeat 3]
+                                         [--output result.json]
+                                         [--baseline base.json] [--tolerance 0.25]
+
+每个测量都在全新子进程中进行，避免模块缓存污染结果；存在回归时以非零状态退出，
+可直接放进 CI。
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 应只在对应代码路径上加载的重型依赖
+HEAVY_MODULES = ['pandas', 'cv2', 'numpy', 'youtube_dl', 'streamlink']
+# 应用启动本身依赖的模块
+CORE_MODULES = ['streamlit', 'requests', 'vp.registry', 'vp.retry', 'vp.htmlmeta',
+                'vp.downloader', 'vp.stream_fetcher', 'vp.ydl_pool']
+PAGES = ["视频爬取", "批量处理", "下载管理", "设置"]
+
+# 回归判定的绝对下限(秒)，低于此差值视为测量噪声
+MIN_REGRESSION = 0.05
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+_RENDER_SCRIPT = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.session_state["nav_page"] = {page!r}
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "exceptions": [e.value for e in at.exception],
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+'''
+
+
+def _run(args, **kwargs):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True,
+                          text=True, **kwargs)
+
+
+def import_time(module):
+    """在新进程中导入模块，返回 (累计耗时秒, 导入树中出现的重型依赖)"""
+    proc = _run(['-X', 'importtime', '-c', f'import {module}'])
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败: {proc.stderr.strip().splitlines()[-1:]}")
+    cumulative = None
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(3)
+        if name.split('.')[0] in HEAVY_MODULES:
+            loaded.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(match.group(2)) / 1e6
+    if cumulative is None:
+        # 模块已被解释器预先加载
+        cumulative = 0.0
+    return cumulative, sorted(loaded)
+
+
+def first_render(app, page):
+    """在新进程中以 AppTest 运行一次脚本并停在指定页面，返回首次渲染结果"""
+    script = _RENDER_SCRIPT.format(root=ROOT, app=app, page=page, heavy=HEAVY_MODULES)
+    proc = _run(['-c', script], timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f"渲染 {page} 失败: {proc.stderr.strip()[-500:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(app='DP4.py', repeat=3):
+    """执行全部测量，返回 {'imports': {...}, 'pages': {...}, 'metrics': {...}}"""
+    app_module = os.path.splitext(os.path.basename(app))[0]
+    imports = {}
+    for module in HEAVY_MODULES + CORE_MODULES + [app_module]:
+        samples = []
+        loaded = []
+        for _ in range(repeat):
+            seconds, loaded = import_time(module)
+            samples.append(seconds)
+        imports[module] = {'seconds': statistics.median(samples), 'heavy_loaded': loaded}
+
+    pages = {}
+    for page in PAGES:
+        samples = []
+        for _ in range(repeat):
+            result = first_render(app, page)
+            samples.append(result['elapsed'])
+        pages[page] = {
+            'seconds': statistics.median(samples),
+            'heavy_loaded': result['loaded'],
+            'exceptions': result['exceptions'],
+        }
+
+    metrics = {f'import:{name}': item['seconds'] for name, item in imports.items()}
+    metrics.update({f'render:{name}': item['seconds'] for name, item in pages.items()})
+    return {'app': app, 'repeat': repeat, 'imports': imports, 'pages': pages,
+            'metrics': metrics}
+
+
+def compare(current, baseline, tolerance=0.25):
+    """对比基线，返回回归列表 [(指标, 基线秒, 当前秒)]"""
+    regressions = []
+    for name, base in baseline.get('metrics', {}).items():
+        now = current['metrics'].get(name)
+        if now is None:
+            continue
+        if now > base * (1 + tolerance) and now - base > MIN_REGRESSION:
+            regressions.append((name, base, now))
+    return regressions
+
+
+def report(result):
+    """打印人类可读的结果表"""
+    app_module = os.path.splitext(os.path.basename(result['app']))[0]
+    print(f"{'模块':<22}{'导入耗时(ms)':>14}  重型依赖")
+    for name, item in result['imports'].items():
+        print(f"{name:<22}{item['seconds'] * 1000:>14.1f}  {','.join(item['heavy_loaded']) or '-'}")
+    print()
+    print(f"{'页面':<12}{'首次渲染(ms)':>14}  重型依赖")
+    for name, item in result['pages'].items():
+        flag = '  异常!' if item['exceptions'] else ''
+        print(f"{name:<12}{item['seconds'] * 1000:>14.1f}  {','.join(item['heavy_loaded']) or '-'}{flag}")
+    leaked = result['imports'][app_module]['heavy_loaded']
+    if leaked:
+        print(f"\n注意: 导入 {app_module} 时加载了重型依赖 {', '.join(leaked)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default='DP4.py')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    result = run(args.app, args.repeat)
+    report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    failed = any(item['exceptions'] for item in result['pages'].values())
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for name, base, now in regressions:
+            print(f"回归: {name} {base * 1000:.1f}ms -> {now * 1000:.1f}ms")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""上传落盘管线内存基准：分块落盘 + mmap 流式读取的内存峰值与吞吐
+
+用法: python -m benchmarks.bench_upload [文件大小MB] [--chunk-mb 4]
+
+以 tracemalloc 统计上传对象之外的新增分配峰值，峰值超过分块大小的两倍
+（即与文件大小相关）时以非零状态退出。
+"""
+
+import argparse
+import hashlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from vp.htmlmeta import sniff_media
+from vp.spool import spool_upload
+
+
+class SyntheticUpload(io.RawIOBase):
+    """按需生成内容的伪上传流，自身不占用与文件大小成正比的内存"""
+
+    def __init__(self, size, name='synthetic.mp4'):
+        self.size = size
+        self.name = name
+        self._pos = 0
+        self._block = (b'\x00\x00\x00\x18ftypmp42' + bytes(range(256)) * 4096)[:1024 * 1024]
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.size - self._pos)
+        if n <= 0:
+            return 0
+        block = self._block
+        for offset in range(0, n, len(block)):
+            end = min(offset + len(block), n)
+            buffer[offset:end] = block[:end - offset]
+        self._pos += n
+        return n
+
+
+def spooled_pipeline(upload, directory, chunk_size):
+    """新实现：分块落盘，之后通过 memoryview 流式读取"""
+    spooled = spool_upload(upload, directory, chunk_size=chunk_size)
+    with spooled:
+        kind = sniff_media(spooled.head(512))
+        digest = hashlib.sha256()
+        for view in spooled.iter_chunks(chunk_size):
+            digest.update(view)
+    return kind, digest.hexdigest(), spooled
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('size_mb', nargs='?', type=int, default=256)
+    parser.add_argument('--chunk-mb', type=int, default=4)
+    args = parser.parse_args(argv)
+    size = args.size_mb * 1024 * 1024
+    chunk_size = args.chunk_mb * 1024 * 1024
+    directory = tempfile.mkdtemp(prefix='bench_upload_')
+    mb = 1024 * 1024
+    failed = False
+    try:
+        # Streamlit 的 UploadedFile 是以完整 bytes 初始化的 BytesIO
+        data = bytearray(size)
+        SyntheticUpload(size).readinto(data)
+        data = bytes(data)
+
+        expected = hashlib.sha256(data).hexdigest()
+        (_, digest, _), peak, elapsed = measure(
+            spooled_pipeline, io.BytesIO(data), directory, chunk_size)
+        print(f"BytesIO 上传  峰值 {peak / mb:6.1f} MB  耗时 {elapsed:6.2f}s"
+              f"  ({size / mb / elapsed:.0f} MB/s)")
+        if digest != expected:
+            print("错误: 落盘内容与原始数据不一致")
+            failed = True
+        del data
+
+        (_, _, spooled), stream_peak, stream_time = measure(
+            spooled_pipeline, SyntheticUpload(size), directory, chunk_size)
+        print(f"流式上传源    峰值 {stream_peak / mb:6.1f} MB  耗时 {stream_time:6.2f}s"
+              f"  ({size / mb / stream_time:.0f} MB/s)")
+
+        limit = 2 * chunk_size
+        for label, value in (('BytesIO', peak), ('流式源', stream_peak)):
+            if value > limit:
+                print(f"回归: {label} 落盘峰值 {value / mb:.1f} MB 超过上限 {limit / mb:.0f} MB")
+                failed = True
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""提取进程池基准：用本地假提取器驱动 ExtractorPool，不访问网络
+
+用法: python -m benchmarks.bench_ydl_pool [--jobs 60] [--size 2] [--init-ms 300] [--job-ms 10]
+                                          [--max-jobs 10]
+
+假提取器初始化时等待 --init-ms（模拟导入 youtube_dl 并创建 YoutubeDL），每次提取等待 --job-ms。
+URL 决定提取行为：
+    fake://ok/<编号>       正常返回
+    fake://hang/<编号>     不返回，触发超时并重启进程
+    fake://status/<状态码>  抛出带状态码的错误，检查错误分类跨进程传回
+对照为每次提取都重新创建提取器（旧实现）。检查超时、按任务数回收、各进程统计与错误分类，
+任一检查失败时以非零状态退出。
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from vp.ydl_pool import ExtractorPool, WorkerError, WorkerTimeout
+
+
+class FakeHTTPError(Exception):
+    """带 HTTP 状态码的提取错误，classify 按 status 属性分类"""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f'HTTP Error {status}')
+        self.status = status
+        self.headers = {'Retry-After': str(retry_after)} if retry_after else {}
+
+
+def fake_extractor(init_ms=300, job_ms=10):
+    """假提取器工厂，在子进程中调用"""
+    time.sleep(init_ms / 1000)
+
+    def extract(url):
+        kind, _, arg = url[len('fake://'):].partition('/')
+        if kind == 'hang':
+            time.sleep(3600)
+        if kind == 'status':
+            raise FakeHTTPError(int(arg), retry_after=7)
+        time.sleep(job_ms / 1000)
+        return {'title': f'假视频 {arg}', 'duration': 60, 'formats': []}
+
+    return extract
+
+
+def _legacy(urls, init_ms, job_ms):
+    """旧实现：每次提取都创建新的提取器"""
+    start = time.perf_counter()
+    for url in urls:
+        fake_extractor(init_ms, job_ms)(url)
+    return time.perf_counter() - start
+
+
+def run(jobs=60, size=2, init_ms=300, job_ms=10, max_jobs=10):
+    """返回 {'pool_seconds', 'legacy_seconds', 'stats', 'checks': {名称: 是否通过}}"""
+    urls = [f'fake://ok/{i}' for i in range(jobs)]
+    checks = {}
+    pool = ExtractorPool(size=size, factory=fake_extractor,
+                         factory_kwargs={'init_ms': init_ms, 'job_ms': job_ms},
+                         max_jobs=max_jobs, timeout=2, startup_timeout=30)
+    try:
+        with ThreadPoolExecutor(size) as executor:
+            # 预热：每个进程各完成一次提取
+            list(executor.map(pool.extract, [f'fake://ok/warm{i}' for i in range(size)]))
+            start = time.perf_counter()
+            results = list(executor.map(pool.extract, urls))
+            pool_seconds = time.perf_counter() - start
+        checks['结果完整'] = [r['title'] for r in results] == [f'假视频 {i}' for i in range(jobs)]
+
+        try:
+            pool.extract('fake://status/429')
+            checks['错误分类'] = False
+        except WorkerError as e:
+            checks['错误分类'] = e.status == 429 and e.retryable and e.headers == {'Retry-After': '7'}
+
+        try:
+            pool.extract('fake://hang/1', timeout=1)
+            checks['超时'] = False
+        except WorkerTimeout:
+            checks['超时'] = True
+        checks['超时后恢复'] = pool.extract('fake://ok/after')['title'] == '假视频 after'
+
+        stats = pool.stats()
+        # 完成数 = 预热 + 正常提取 + 429 + 超时后的一次；超时的任务不计入
+        checks['统计'] = (sum(s['jobs'] for s in stats) == size + jobs + 2
+                          and sum(s['timeouts'] for s in stats) == 1
+                          and sum(s['errors'] for s in stats) == 1
+                          and all(s['jobs'] and s['latency_avg'] > 0 for s in stats))
+        # 每个进程完成 max_jobs 个任务回收一次
+        checks['按任务数回收'] = (sum(s['recycles'] for s in stats)
+                            == sum(s['jobs'] // max_jobs for s in stats)
+                            and all(s['jobs_since_start'] < max_jobs for s in stats))
+    finally:
+        pool.close()
+    legacy_seconds = _legacy(urls[:max(1, jobs // 6)], init_ms, job_ms) * jobs / max(1, jobs // 6)
+    return {'pool_seconds': pool_seconds, 'legacy_seconds': legacy_seconds, 'stats': stats, 'checks': checks}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=60)
+    parser.add_argument('--size', type=int, default=2)
+    parser.add_argument('--init-ms', type=int, default=300)
+    parser.add_argument('--job-ms', type=int, default=10)
+    parser.add_argument('--max-jobs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    result = run(args.jobs, args.size, args.init_ms, args.job_ms, args.max_jobs)
+    print(f"{'进程':>4}{'任务':>6}{'错误':>6}{'超时':>6}{'回收':>6}{'平均(ms)':>10}{'p95(ms)':>10}")
+    for s in result['stats']:
+        print(f"{s['worker']:>4}{s['jobs']:>6}{s['errors']:>6}{s['timeouts']:>6}{s['recycles']:>6}"
+              f"{s['latency_avg'] * 1000:>10.1f}{s['latency_p95'] * 1000:>10.1f}")
+    print(f"\n进程池 {args.jobs} 次提取 {result['pool_seconds']:.2f}s；"
+          f"每次新建提取器（估算）{result['legacy_seconds']:.2f}s")
+    for name, ok in result['checks'].items():
+        print(f"{name}: {'通过' if ok else '未通过'}")
+    return 0 if all(result['checks'].values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""离线基准用的本地 HTTP 替身服务器：合成网页、慢响应、支持 Range 的媒体与 m3u8 播放列表
+
+路由:
+    /page/<字节数>/<编号>.html          带 og 元数据的合成网页，正文填充到指定大小
+    /slow/<毫秒>/<编号>.html            延迟指定毫秒后返回 4KB 网页
+    /etag/<max-age>/<字节数>/<编号>.html  带 ETag/Last-Modified/Cache-Control 的网页，条件请求命中时返回 304
+    /media/<字节数>/<编号>.mp4          支持 Range 的媒体文件（内容可复现）
+    /hls/<分片数>/<分片字节数>/index.m3u8  点播播放列表，分片为 seg<序号>.ts
+    /status/<状态码>/<编号>             返回指定状态码
+    /limited/<并发数>/<毫秒>/<编号>.html  同时处理超过指定并发数时返回 429（Retry-After: 1），否则延迟后返回 4KB 网页
+
+StandInProxy 是转发绝对URI请求的 HTTP 代理替身，可注入固定延迟，并对指定主机返回 429。
+
+用法:
+    with StandInServer() as server:
+        server.url('/page/4096/1.html')
+"""
+
+import http.client
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 媒体与分片内容按 64KB 块平铺生成，任意区间都可复现
+_BLOCK = bytes(range(256)) * 256
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>合成视频页面 {id}</title>
+<meta property="og:title" content="合成视频 {id}">
+<meta property="og:image" content="/media/4096/{id}.jpg">
+<meta property="og:video" content="/media/1048576/{id}.mp4">
+<meta property="og:video:type" content="video/mp4">
+</head>
+<body>
+"""
+FILLER = "<p>" + "视频简介文本 " * 20 + "</p>\n"
+LAST_MODIFIED = 'Mon, 05 Oct 2026 08:00:00 GMT'
+
+
+def tiled(start, length):
+    """返回平铺内容中 [start, start+length) 区间的字节"""
+    offset = start % len(_BLOCK)
+    repeat = -(-(offset + length) // len(_BLOCK))
+    return (_BLOCK * repeat)[offset:offset + length]
+
+
+def synthetic_page(size, page_id):
+    """生成约 size 字节的网页，<head> 在最前面"""
+    head = PAGE_TEMPLATE.format(id=page_id).encode('utf-8')
+    filler = FILLER.encode('utf-8')
+    body = filler * max(0, (size - len(head)) // len(filler))
+    return head + body + b"</body>\n</html>\n"
+
+
+def playlist(count, segment_bytes):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:4',
+             '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:VOD']
+    for i in range(count):
+        lines += ['#EXTINF:4.000,', f'seg{i}.ts']
+    lines.append('#EXT-X-ENDLIST')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头与正文分两次写出，不关闭 Nagle 时小页面会被延迟确认拖慢约 40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    def _dispatch(self, head):
+        parts = self.path.split('?', 1)[0].strip('/').split('/')
+        self.server.record(parts[0], self.headers.get('Range'))
+        try:
+            if parts[0] == 'page' and len(parts) == 3:
+                self._send(200, synthetic_page(int(parts[1]), parts[2]), 'text/html; charset=utf-8', head)
+            elif parts[0] == 'slow' and len(parts) == 3:
+                time.sleep(int(parts[1]) / 1000)
+                self._send(200, synthetic_page(4096, parts[2]), 'text/html; charset=utf-8', head)
+            elif parts[0] == 'etag' and len(parts) == 4:
+                self._send_validated(int(parts[1]), int(parts[2]), parts[3], head)
+            elif parts[0] == 'media' and len(parts) == 3:
+                self._send_media(int(parts[1]), head)
+            elif parts[0] == 'hls' and len(parts) == 4 and parts[3] == 'index.m3u8':
+                self._send(200, playlist(int(parts[1]), int(parts[2])),
+                           'application/vnd.apple.mpegurl', head)
+            elif parts[0] == 'hls' and len(parts) == 4 and parts[3].startswith('seg'):
+                index = int(parts[3][3:].split('.')[0])
+                size = int(parts[2])
+                self._send(200, tiled(index * size, size), 'video/mp2t', head)
+            elif parts[0] == 'limited' and len(parts) == 4:
+                self._send_limited(int(parts[1]), int(parts[2]), parts[3], head)
+            elif parts[0] == 'status' and len(parts) >= 2:
+                self._send(int(parts[1]), b'', 'text/plain', head)
+            else:
+                self._send(404, b'not found', 'text/plain', head)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send(self, status, body, content_type, head, extra=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+            self.server.add_bytes(len(body))
+
+    def _send_limited(self, slots, delay_ms, page_id, head):
+        """模拟按并发限流的主机"""
+        server = self.server
+        with server._lock:
+            server.inflight += 1
+            over = server.inflight > slots
+        try:
+            if over:
+                server.record('throttled', None)
+                self._send(429, b'', 'text/plain', head, {'Retry-After': '1'})
+                return
+            time.sleep(delay_ms / 1000)
+            self._send(200, synthetic_page(4096, page_id), 'text/html; charset=utf-8', head)
+        finally:
+            with server._lock:
+                server.inflight -= 1
+
+    def _send_validated(self, max_age, size, page_id, head):
+        """内容固定的网页：If-None-Match 或 If-Modified-Since 匹配时只回 304"""
+        etag = f'"page-{size}-{page_id}"'
+        validators = {'ETag': etag, 'Last-Modified': LAST_MODIFIED, 'Cache-Control': f'max-age={max_age}'}
+        if_none_match = self.headers.get('If-None-Match')
+        if (if_none_match == etag if if_none_match is not None
+                else self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            self.server.record('not_modified', None)
+            self.send_response(304)
+            for name, value in validators.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self._send(200, synthetic_page(size, page_id), 'text/html; charset=utf-8', head, validators)
+
+    def _send_media(self, size, head):
+        """按 Range 返回 206 分段，否则整段返回；大文件分块写出"""
+        start, end, status = 0, size - 1, 200
+        match = _RANGE_RE.match(self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size:
+                self._send(416, b'', 'text/plain', head, {'Content-Range': f'bytes */{size}'})
+                return
+            status = 206
+        length = end - start + 1
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', f'"media-{size}"')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if head:
+            return
+        position = start
+        while position <= end:
+            chunk = tiled(position, min(len(_BLOCK), end - position + 1))
+            self.wfile.write(chunk)
+            position += len(chunk)
+        self.server.add_bytes(length)
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        target = urlsplit(self.path)
+        host = target.hostname or ''
+        server.record(host, None)
+        time.sleep(server.latency)
+        try:
+            if host in server.throttle_hosts:
+                body = b'rate limited'
+                self.send_response(429)
+                self.send_header('Retry-After', str(server.retry_after))
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            # 每个请求单独连接上游；响应整段读入后转发
+            upstream = http.client.HTTPConnection(host, target.port or 80, timeout=30)
+            try:
+                path = target.path + ('?' + target.query if target.query else '')
+                headers = {k: v for k, v in self.headers.items()
+                           if k.lower() not in ('proxy-connection', 'connection', 'keep-alive')}
+                upstream.request('GET', path or '/', headers=headers)
+                response = upstream.getresponse()
+                body = response.read()
+            finally:
+                upstream.close()
+            self.send_response(response.status)
+            for name, value in response.getheaders():
+                if name.lower() not in ('connection', 'keep-alive', 'transfer-encoding', 'content-length'):
+                    self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            server.add_bytes(len(body))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """在后台线程运行的本地服务器，统计请求数与发送字节数"""
+
+    daemon_threads = True
+    handler_class = _Handler
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), self.handler_class)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.requests = {}
+        self.range_requests = 0
+        self.bytes_sent = 0
+        self.inflight = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url(self, path):
+        return self.base_url + path
+
+    def record(self, route, range_header):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            if range_header:
+                self.range_requests += 1
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes_sent += count
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = {}
+            self.range_requests = 0
+            self.bytes_sent = 0
+
+    def handle_error(self, request, client_address):
+        # 客户端读完<head>即断开连接属于正常情况
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='standin-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StandInProxy(StandInServer):
+    """本地代理替身：每个请求先等待 latency 秒；throttle_hosts 中的目标主机返回 429
+
+    requests 统计按目标主机计数。
+    """
+
+    handler_class = _ProxyHandler
+
+    def __init__(self, latency=0.0, throttle_hosts=(), retry_after=60, host='127.0.0.1', port=0):
+        super().__init__(host, port)
+        self.latency = latency
+        self.throttle_hosts = set(throttle_hosts)
+        self.retry_after = retry_after
+
+    @property
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
@@ -0,0 +1 @@
+"""VIP视频工具共享组件"""
@@ -0,0 +1,203 @@
+"""基于 asyncio 的大批量提取后端，结果格式与 VideoStreamCrawler 一致
+
+iter_async_batch 在调用线程中运行事件循环并同步产出结果，批量任务线程可以像使用
+vp.batch.iter_batch 一样逐条写入结果集与检查点，不会把整批结果留在内存里。
+"""
+
+import asyncio
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from vp.extractors import youtube_info, bilibili_info, generic_info
+from vp.htmlmeta import PageMetaReader, CHUNK_SIZE
+from vp.retry import RetryPolicy, RetryBudget, classify
+from vp.registry import REGISTRY
+from vp.urls import canonical_url
+
+
+class AsyncVideoStreamCrawler:
+    """异步视频信息提取：全局与单主机信号量限流，退避等待不阻塞事件循环
+
+    传入 limiter（vp.limits.AdaptiveLimiter）时单主机并发由它按延迟与限流自适应控制，
+    与同步爬虫共用同一组主机状态；否则每个主机固定 per_host 个并发。
+    """
+
+    def __init__(self, max_concurrency=100, per_host=6, timeout=30, max_retries=3,
+                 headers=None, detect_platform=None, cache=None, breakers=None, limiter=None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.max_retries = max(1, max_retries)
+        self.headers = dict(headers or {})
+        self.detect_platform = detect_platform or REGISTRY.detect
+        self.cache = cache
+        self.breakers = breakers
+        self.limiter = limiter
+        self.retry_policy = RetryPolicy(max_attempts=self.max_retries)
+        self.retry_budget = RetryBudget()
+        self._session = None
+        self._global = None
+        self._hosts = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(
+            headers=self.headers, connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    def _host_semaphore(self, url):
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    async def extract_video_info(self, url):
+        """提取视频信息和播放链接"""
+        if not url or not isinstance(url, str):
+            return {'status': 'error', 'error': '无效的URL', 'platform': 'unknown'}
+
+        key = canonical_url(url)
+        if self.cache is not None:
+            hit, cached = self.cache.get(key)
+            if hit:
+                return dict(cached)
+
+        platform = self.detect_platform(url)
+        if platform == 'youtube':
+            video_id = REGISTRY.extract_id(url, 'youtube')
+            video_info = youtube_info(video_id) if video_id else {
+                'status': 'error', 'error': '无法提取YouTube视频ID'}
+        elif platform == 'bilibili':
+            video_info = bilibili_info(url)
+        else:
+            video_info = await self._extract_generic(url)
+
+        if self.cache is not None:
+            self.cache.put(key, video_info, platform=video_info.get('platform'),
+                           negative=video_info.get('status') != 'success')
+        return video_info
+
+    async def _extract_generic(self, url):
+        """带重试的通用页面提取，错误分类与退避规则同同步爬虫"""
+        host = (urlsplit(url).hostname or '').lower()
+        for attempt in range(self.max_retries):
+            self.retry_budget.record_request()
+            try:
+                if self.breakers is not None:
+                    self.breakers.before_request(host)
+                page = await self._fetch_page_meta(url)
+            except Exception as e:
+                retryable, retry_after, status = classify(e)
+                if self.breakers is not None:
+                    if retryable:
+                        self.breakers.record_failure(host)
+                    elif status:
+                        self.breakers.record_success(host)
+                if (not retryable or attempt == self.max_retries - 1
+                        or not self.retry_budget.try_spend()):
+                    message = f'HTTP {status}' if status else (str(e) or e.__class__.__name__)
+                    return {'status': 'error', 'error': message, 'platform': 'generic'}
+                await asyncio.sleep(self.retry_policy.backoff(attempt, retry_after))
+                continue
+            if self.breakers is not None:
+                self.breakers.record_success(host)
+            return generic_info(url, page)
+
+    async def _fetch_page_meta(self, url):
+        async with self._global:
+            if self.limiter is None:
+                async with self._host_semaphore(url):
+                    return await self._read_page_meta(url)
+            host = self.limiter.host_of(url)
+            while True:
+                started, wait = self.limiter.try_acquire(host)
+                if started is not None:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+            try:
+                page = await self._read_page_meta(url)
+            except asyncio.CancelledError:
+                # 批次被取消：只归还名额，不作为主机负载样本
+                self.limiter.release(host, started)
+                raise
+            except Exception as e:
+                self.limiter.settle(host, started, e)
+                raise
+            self.limiter.settle(host, started)
+            return page
+
+    async def _read_page_meta(self, url):
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            reader = PageMetaReader(str(response.url), response.headers.get('Content-Type', ''),
+                                    response.headers.get('Content-Length'))
+            if not reader.finished:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    if reader.feed(chunk):
+                        break
+            return reader.close()
+
+    async def iter_extract(self, urls, indexed=False):
+        """并发提取，按完成顺序异步产出 (序号, URL, 结果, 异常)；urls 可为惰性迭代器
+
+        indexed=True 时 urls 为 (序号, URL) 对，产出沿用给定的序号（续跑时跳过已完成项）。
+        """
+        source = iter(urls) if indexed else enumerate(urls)
+        results = asyncio.Queue(maxsize=self.max_concurrency * 2)
+        sentinel = object()
+
+        async def worker():
+            for index, url in source:
+                try:
+                    item = (index, url, await self.extract_video_info(url), None)
+                except Exception as e:
+                    item = (index, url, None, e)
+                await results.put(item)
+            await results.put(sentinel)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        try:
+            remaining = len(workers)
+            while remaining:
+                item = await results.get()
+                if item is sentinel:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+def iter_async_batch(urls, indexed=False, **crawler_kwargs):
+    """在调用线程中运行事件循环，按完成顺序同步产出 (序号, URL, 结果, 异常)
+
+    与 vp.batch.iter_batch 的产出格式相同；调用方处理一条结果期间事件循环暂停，
+    关闭生成器会取消尚未完成的请求并关闭连接。
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        crawler = AsyncVideoStreamCrawler(**crawler_kwargs)
+        loop.run_until_complete(crawler.__aenter__())
+        results = crawler.iter_extract(urls, indexed=indexed)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.run_until_complete(crawler.__aexit__(None, None, None))
+    finally:
+        loop.close()
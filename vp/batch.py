@@ -0,0 +1,40 @@
+"""批量任务并发执行引擎"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+
+def iter_batch(func, items, max_workers=3, window=None, indexed=False):
+    """有界线程池并发执行 func(item)，按完成顺序产出 (序号, 输入, 结果, 异常)
+
+    items 可以是任意可迭代对象，按需惰性读取；同时在途的任务数不超过 window
+    (默认 max_workers * 2)，因此超长列表也不会一次性全部提交。
+    indexed=True 时 items 为 (序号, 输入) 对，产出沿用给定的序号（续跑时跳过已完成项）。
+    """
+    max_workers = max(1, int(max_workers or 1))
+    window = max(max_workers, int(window or max_workers * 2))
+    source = iter(items) if indexed else enumerate(items)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vp-batch") as pool:
+        pending = {}
+
+        def submit(n):
+            for index, item in islice(source, n):
+                pending[pool.submit(func, item)] = (index, item)
+
+        submit(window)
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item = pending.pop(future)
+                    try:
+                        yield index, item, future.result(), None
+                    except Exception as e:
+                        yield index, item, None, e
+                submit(window - len(pending))
+        finally:
+            # 调用方提前停止迭代时，丢弃尚未开始的任务
+            for future in pending:
+                future.cancel()
+
@@ -0,0 +1,158 @@
+"""视频元数据缓存：按平台TTL过期、按总字节数LRU淘汰"""
+
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from vp.retry import classify
+
+# 各平台元数据的有效期(秒)，直播类平台的信息变化快
+PLATFORM_TTL = {
+    'youtube': 6 * 3600,
+    'bilibili': 3600,
+    'vimeo': 3600,
+    'dailymotion': 3600,
+    'twitch': 60,
+    'streamlink': 60,
+}
+DEFAULT_TTL = 600
+NEGATIVE_TTL = 30
+
+
+class ErrorResult(namedtuple('ErrorResult', 'error_type message retryable status retry_after')):
+    """缓存的失败结果：保存错误类型、消息与错误分类，不保存异常对象（异常的回溯会随每次抛出增长）"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_exception(cls, error):
+        retryable, retry_after, status = classify(error)
+        return cls(type(error), str(error), retryable, status, retry_after)
+
+    def exception(self):
+        """构造新的异常实例供调用方抛出：尽量还原原始类型，无法按消息构造时退回 CachedError
+
+        异常带上缓存时的分类（retryable、status、Retry-After），classify 据此得到与原始错误相同的结果。
+        """
+        try:
+            error = self.error_type(self.message)
+        except Exception:
+            error = CachedError(self)
+        error.retryable = self.retryable
+        error.status = self.status
+        error.headers = {'Retry-After': str(int(self.retry_after))} if self.retry_after else None
+        return error
+
+
+class CachedError(Exception):
+    """原始异常类型无法按消息重建时抛出；error_type 为原始类型名"""
+
+    def __init__(self, result):
+        super().__init__(result.message)
+        self.error_type = result.error_type.__name__
+
+
+def _estimate_size(key, value):
+    """估算缓存条目占用的字节数"""
+    try:
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        payload = repr(value)
+    return len(key.encode('utf-8')) + len(payload.encode('utf-8')) + 64
+
+
+class MetadataCache:
+    """线程安全的TTL + LRU缓存，失败结果作为负缓存短暂保存"""
+
+    def __init__(self, max_bytes=100 * 1024 * 1024, platform_ttl=None,
+                 default_ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL):
+        self.max_bytes = max_bytes
+        self.platform_ttl = dict(PLATFORM_TTL, **(platform_ttl or {}))
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """查询缓存，返回 (是否命中, 值)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires, size, negative = entry
+            if expires <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if negative:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, value
+
+    def put(self, key, value, platform=None, negative=False):
+        """写入缓存，negative=True 表示失败结果"""
+        if negative:
+            ttl = self.negative_ttl
+        else:
+            ttl = self.platform_ttl.get(platform, self.default_ttl)
+        if ttl <= 0:
+            return
+        size = _estimate_size(key, value)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size, negative)
+            self._bytes += size
+            self._shrink()
+
+    def resize(self, max_bytes):
+        """调整容量上限，超出部分立即淘汰"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """命中、未命中、淘汰等统计"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _shrink(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
@@ -0,0 +1,251 @@
+"""批量任务检查点：每个批次在检查点目录下保存输入与逐行追加的结果日志，中断后按批次ID续跑
+
+目录默认 temp/batches/；结果行的字段由调用方决定，格式不同的调用方（如 DP3 与 DP4）应使用各自的目录。
+
+    <批次ID>.json   元信息（名称、创建时间、输入格式、已写入行数、是否完成），整体替换写入
+    <批次ID>.src    批次输入：文本框中的URL逐行保存，导入文件按原样分块复制
+    <批次ID>.jsonl  结果日志，每行一个 {"i": 序号, ...结果字段}
+
+结果先缓冲，满 batch_size 条或距上次写出超过 flush_interval 秒时一次写出，fsync 间隔不小于
+fsync_interval 秒；进程崩溃最多丢失最后一个 fsync 间隔内的结果，续跑时这些URL会重新处理。
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+
+from vp.urlimport import UrlImport
+
+CHECKPOINT_DIR = os.path.join('temp', 'batches')
+CHUNK_SIZE = 4 * 1024 * 1024
+# 已完成的检查点保留数量，新建批次时清理更早的
+KEEP_FINISHED = 20
+_ID_RE = re.compile(r'^[0-9a-f]{12}$')
+
+
+class IndexSet:
+    """按位记录已完成的序号，百万级序号只占约 125KB"""
+
+    def __init__(self):
+        self._bits = bytearray()
+        self.count = 0
+
+    def add(self, index):
+        byte, mask = index >> 3, 1 << (index & 7)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        if not self._bits[byte] & mask:
+            self._bits[byte] |= mask
+            self.count += 1
+
+    def __contains__(self, index):
+        byte = index >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (index & 7)))
+
+    def __len__(self):
+        return self.count
+
+
+class BatchCheckpoint:
+    """一个批次的检查点文件"""
+
+    def __init__(self, batch_id, directory=CHECKPOINT_DIR, meta=None):
+        if not _ID_RE.match(batch_id or ''):
+            raise ValueError(f"无效的批次ID: {batch_id}")
+        self.id = batch_id
+        self.directory = directory
+        self.meta = meta if meta is not None else self._read_meta()
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.directory, self.id + '.json')
+
+    @property
+    def source_path(self):
+        return os.path.join(self.directory, self.id + '.src')
+
+    @property
+    def log_path(self):
+        return os.path.join(self.directory, self.id + '.jsonl')
+
+    @classmethod
+    def create(cls, source, name=None, directory=CHECKPOINT_DIR):
+        """保存批次输入并返回新检查点；source 为URL列表、文件路径或二进制文件对象"""
+        os.makedirs(directory, exist_ok=True)
+        prune_checkpoints(directory)
+        checkpoint = cls(uuid.uuid4().hex[:12], directory, meta={})
+        if isinstance(source, (list, tuple)):
+            fmt, total = 'list', len(source)
+            name = name or f"{total} 个URL"
+            with open(checkpoint.source_path, 'w', encoding='utf-8') as f:
+                f.writelines(url + '\n' for url in source)
+        else:
+            name = name or getattr(source, 'name', None) or os.path.basename(str(source))
+            fmt, total = ('csv' if name.lower().endswith('.csv') else 'txt'), None
+            _copy(source, checkpoint.source_path)
+        checkpoint.meta = {
+            'id': checkpoint.id, 'name': name, 'format': fmt, 'total': total,
+            'created': datetime.now().isoformat(timespec='seconds'), 'rows': 0, 'finished': False,
+        }
+        checkpoint.save_meta()
+        return checkpoint
+
+    @classmethod
+    def open(cls, batch_id, directory=CHECKPOINT_DIR):
+        """按批次ID打开已有检查点，不存在时抛出 FileNotFoundError"""
+        return cls(batch_id.strip().lower(), directory)
+
+    def _read_meta(self):
+        with open(self.meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_meta(self, **changes):
+        """更新元信息；先写临时文件再替换，读取方不会看到写了一半的文件"""
+        self.meta.update(changes)
+        tmp = self.meta_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def urls(self):
+        """按首次运行的顺序重新产出批次输入；导入文件再次经过相同的规范化与去重，序号一致"""
+        if self.meta['format'] == 'list':
+            with open(self.source_path, encoding='utf-8') as f:
+                return [line.rstrip('\n') for line in f]
+        return UrlImport(self.source_path, name=self.meta['name'], csv_mode=self.meta['format'] == 'csv')
+
+    def load(self):
+        """逐行读取已完成的结果，产出 (序号, 结果字典)；忽略崩溃时写了一半的最后一行"""
+        try:
+            f = open(self.log_path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield record.pop('i'), record
+
+    def writer(self, batch_size=200, flush_interval=1.0, fsync_interval=5.0):
+        return CheckpointWriter(self, batch_size, flush_interval, fsync_interval)
+
+    def remove(self):
+        for path in (self.meta_path, self.source_path, self.log_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def pending(urls, done):
+    """跳过已完成序号，产出 (原始序号, URL)"""
+    for index, url in enumerate(urls):
+        if index not in done:
+            yield index, url
+
+
+class CheckpointWriter:
+    """结果行写入器：缓冲后批量写出，按间隔 fsync；只在批次任务线程中使用"""
+
+    def __init__(self, checkpoint, batch_size=200, flush_interval=1.0, fsync_interval=5.0):
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.pending = []
+        self.rows = checkpoint.meta.get('rows', 0)
+        self._file = open(checkpoint.log_path, 'a+b')
+        # 上次崩溃留下的半行单独成行，避免与新写入的第一行粘连
+        if self._file.tell():
+            self._file.seek(-1, os.SEEK_END)
+            if self._file.read(1) != b'\n':
+                self._file.write(b'\n')
+        self._flushed = self._synced = time.monotonic()
+
+    def add(self, index, record):
+        self.pending.append(json.dumps({'i': index, **record}, ensure_ascii=False, default=str))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self, sync=False):
+        """写出缓冲的行；距上次 fsync 超过间隔或 sync=True 时落盘"""
+        now = time.monotonic()
+        if self.pending:
+            self._file.write(('\n'.join(self.pending) + '\n').encode('utf-8'))
+            self._file.flush()
+            self.rows += len(self.pending)
+            self.pending = []
+        self._flushed = now
+        if sync or now - self._synced >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._synced = now
+            self.checkpoint.save_meta(rows=self.rows)
+
+    def close(self, finished=False):
+        if self._file.closed:
+            return
+        self.flush(sync=True)
+        self._file.close()
+        if finished:
+            self.checkpoint.save_meta(finished=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def list_checkpoints(directory=CHECKPOINT_DIR, finished=None):
+    """列出检查点元信息，按创建时间倒序；finished 为 True/False 时只返回已完成/未完成的"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    items = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if finished is None or bool(meta.get('finished')) == finished:
+            items.append(meta)
+    items.sort(key=lambda m: m.get('created', ''), reverse=True)
+    return items
+
+
+def prune_checkpoints(directory=CHECKPOINT_DIR, keep=KEEP_FINISHED):
+    """删除超出保留数量的已完成检查点"""
+    for meta in list_checkpoints(directory, finished=True)[keep:]:
+        try:
+            BatchCheckpoint(meta['id'], directory, meta).remove()
+        except (KeyError, ValueError):
+            continue
+
+
+def _copy(source, path, chunk_size=CHUNK_SIZE):
+    """分块复制文件路径或二进制文件对象的内容"""
+    owned = isinstance(source, str)
+    src = open(source, 'rb') if owned else source
+    try:
+        if not owned:
+            src.seek(0)
+        with open(path, 'wb') as dst:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+    finally:
+        if owned:
+            src.close()
+        else:
+            src.seek(0)
@@ -0,0 +1,241 @@
+"""多连接分段下载器：HTTP Range 并行下载、预分配文件、断点续传"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+CHUNK_SIZE = 256 * 1024
+MIN_SEGMENT_SIZE = 2 * 1024 * 1024
+STATE_SUFFIX = '.part.json'
+PART_SUFFIX = '.part'
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+
+# 正在下载的目标路径：.part 与状态文件按 dest 命名，同一路径同时只允许一个下载
+_active = set()
+_active_lock = threading.Lock()
+
+
+class DownloadCancelled(Exception):
+    """下载被取消，已完成的分段保留在状态文件中以便续传"""
+
+
+class _SpeedMeter:
+    """滑动窗口测速"""
+
+    def __init__(self, window=3.0):
+        self.window = window
+        self.samples = deque()
+
+    def update(self, total_bytes):
+        now = time.monotonic()
+        self.samples.append((now, total_bytes))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        (t0, b0), (t1, b1) = self.samples[0], self.samples[-1]
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+
+def _preallocate(path, size):
+    """预分配输出文件，分段可直接写入各自偏移"""
+    with open(path, 'wb') as f:
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        f.truncate(size)
+
+
+class SegmentedDownloader:
+    """把文件切分为多个 Range 分段并行下载，服务器不支持 Range 时退化为单连接"""
+
+    def __init__(self, session, connections=4, min_segment_size=MIN_SEGMENT_SIZE,
+                 chunk_size=CHUNK_SIZE, timeout=30, max_retries=3):
+        self.session = session
+        self.connections = max(1, connections)
+        self.min_segment_size = min_segment_size
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    def download(self, url, dest, headers=None, progress=None, cancel=None):
+        """下载到 dest，返回 {'path', 'size', 'segments', 'resumed', 'elapsed'}
+
+        progress(已下载字节, 总字节或None, 字节/秒) 在调用线程中定期回调；
+        cancel 为 threading.Event，置位后中止下载并保留续传状态。
+        """
+        key = os.path.abspath(dest)
+        with _active_lock:
+            if key in _active:
+                raise FileExistsError(f'{dest} 正在下载中')
+            _active.add(key)
+        try:
+            return self._download(url, dest, dict(headers or {}), progress, cancel or threading.Event())
+        finally:
+            with _active_lock:
+                _active.discard(key)
+
+    def _download(self, url, dest, headers, progress, cancel):
+        start_time = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+
+        size, ranges_ok, validator = self._probe(url, headers)
+        state = self._load_state(dest, url, size, validator) if ranges_ok else None
+        resumed = state is not None
+        if state is None and ranges_ok and size:
+            state = self._new_state(url, size, validator)
+            _preallocate(dest + PART_SUFFIX, size)
+            self._save_state(dest, state)
+
+        if state is None:
+            self._download_single(url, dest, headers, progress, cancel)
+            segments = 1
+        else:
+            self._download_segments(url, dest, headers, state, progress, cancel)
+            segments = len(state['segments'])
+
+        os.replace(dest + PART_SUFFIX, dest)
+        if os.path.exists(dest + STATE_SUFFIX):
+            os.remove(dest + STATE_SUFFIX)
+        return {
+            'path': dest,
+            'size': os.path.getsize(dest),
+            'segments': segments,
+            'resumed': resumed,
+            'elapsed': time.monotonic() - start_time,
+        }
+
+    def _probe(self, url, headers):
+        """用 Range: bytes=0-0 探测文件大小与 Range 支持情况"""
+        response = self.session.get(url, headers=dict(headers, Range='bytes=0-0'),
+                                    stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+            if response.status_code == 206 and match:
+                return int(match.group(1)), True, validator
+            length = response.headers.get('Content-Length')
+            return (int(length) if length else None), False, validator
+        finally:
+            response.close()
+
+    def _new_state(self, url, size, validator):
+        count = max(1, min(self.connections, size // self.min_segment_size))
+        step = -(-size // count)
+        segments = [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+        return {'url': url, 'size': size, 'validator': validator, 'segments': segments}
+
+    def _load_state(self, dest, url, size, validator):
+        """读取续传状态，URL、文件大小或校验值变化时放弃续传"""
+        try:
+            with open(dest + STATE_SUFFIX, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get('url') != url or state.get('size') != size or state.get('validator') != validator
+                or not os.path.exists(dest + PART_SUFFIX)):
+            return None
+        return state
+
+    def _save_state(self, dest, state):
+        tmp = dest + STATE_SUFFIX + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, dest + STATE_SUFFIX)
+
+    def _download_segments(self, url, dest, headers, state, progress, cancel):
+        lock = threading.Lock()
+        errors = []
+        segments = state['segments']
+        validator = state.get('validator')
+        # 内部中止信号：分段永久失败时只通知其他分段停止，不置位调用方的 cancel
+        abort = threading.Event()
+
+        def worker(segment):
+            attempts = 0
+            with open(dest + PART_SUFFIX, 'r+b') as f:
+                while segment[0] + segment[2] <= segment[1] and not abort.is_set():
+                    offset = segment[0] + segment[2]
+                    range_headers = dict(headers, Range=f'bytes={offset}-{segment[1]}')
+                    if validator:
+                        range_headers['If-Range'] = validator
+                    try:
+                        with self.session.get(url, headers=range_headers, stream=True,
+                                              timeout=self.timeout) as response:
+                            if response.status_code != 206:
+                                raise IOError(f'分段请求返回 {response.status_code}，服务器不再支持续传')
+                            f.seek(offset)
+                            for chunk in response.iter_content(self.chunk_size):
+                                if abort.is_set():
+                                    return
+                                chunk = chunk[:segment[1] + 1 - segment[0] - segment[2]]
+                                f.write(chunk)
+                                with lock:
+                                    segment[2] += len(chunk)
+                        # 截断的响应由下一轮从断点续传；没有任何进展的响应按失败计数，避免空 206 无限重试
+                        if segment[0] + segment[2] == offset:
+                            raise IOError(f'分段 {offset}-{segment[1]} 的响应没有数据')
+                        attempts = 0
+                    except Exception as e:
+                        attempts += 1
+                        if attempts > self.max_retries:
+                            with lock:
+                                errors.append(e)
+                            abort.set()
+                            return
+                        abort.wait(min(2 ** attempts, 10))
+
+        threads = [threading.Thread(target=worker, args=(seg,), daemon=True, name='vp-segment')
+                   for seg in segments if seg[0] + seg[2] <= seg[1]]
+        for t in threads:
+            t.start()
+
+        meter = _SpeedMeter()
+        last_save = time.monotonic()
+        while any(t.is_alive() for t in threads):
+            if cancel.wait(0.25):
+                abort.set()
+            with lock:
+                done = sum(seg[2] for seg in segments)
+                snapshot = dict(state, segments=[list(seg) for seg in segments])
+            if progress:
+                progress(done, state['size'], meter.update(done))
+            if time.monotonic() - last_save >= 1.0:
+                self._save_state(dest, snapshot)
+                last_save = time.monotonic()
+
+        self._save_state(dest, state)
+        if errors:
+            raise errors[0]
+        if cancel.is_set():
+            raise DownloadCancelled('下载已取消')
+        if progress:
+            progress(state['size'], state['size'], meter.update(state['size']))
+
+    def _download_single(self, url, dest, headers, progress, cancel):
+        """不支持 Range 时单连接顺序下载"""
+        meter = _SpeedMeter()
+        done = 0
+        last_report = 0.0
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            length = response.headers.get('Content-Length')
+            total = int(length) if length and 'Content-Encoding' not in response.headers else None
+            with open(dest + PART_SUFFIX, 'wb') as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    if cancel.is_set():
+                        raise DownloadCancelled('下载已取消')
+                    f.write(chunk)
+                    done += len(chunk)
+                    now = time.monotonic()
+                    if progress and now - last_report >= 0.25:
+                        progress(done, total, meter.update(done))
+                        last_report = now
+        if progress:
+            progress(done, total or done, meter.update(done))
@@ -0,0 +1,82 @@
+"""各平台提取结果的构造函数，同步与异步爬虫共用同一结果格式"""
+
+import html
+from urllib.parse import urljoin, urlsplit
+
+
+def youtube_info(video_id):
+    """构造YouTube视频信息"""
+    return {
+        'status': 'success',
+        'title': f'YouTube视频示例 - {video_id}',
+        'platform': 'youtube',
+        'video_url': f'https://www.youtube.com/embed/{video_id}',
+        'thumbnail': f'https://img.youtube.com/vi/{video_id}/hqdefault.jpg',
+        'duration': '10:30',
+        'quality': '1080p',
+        'embed_html': f'''
+                    <iframe width="100%" height="500" 
+                        src="https://www.youtube.com/embed/{video_id}?autoplay=1" 
+                        frameborder="0" 
+                        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" 
+                        allowfullscreen>
+                    </iframe>
+                    '''
+    }
+
+
+def bilibili_info(url):
+    """构造B站视频信息"""
+    return {
+        'status': 'success',
+        'title': 'B站视频示例 - 测试视频',
+        'platform': 'bilibili',
+        'video_url': url,
+        'thumbnail': 'https://via.placeholder.com/640x360/00a1d6/ffffff?text=Bilibili+Video',
+        'duration': '15:45',
+        'quality': '720p',
+        'embed_html': f'''
+                <iframe width="100%" height="500" 
+                    src="{html.escape(url, quote=True)}" 
+                    scrolling="no" 
+                    border="0" 
+                    frameborder="no" 
+                    framespacing="0" 
+                    allowfullscreen="true">
+                </iframe>
+                '''
+    }
+
+
+def _page_url(base, value):
+    """页面声明的地址按页面URL解析为绝对地址，只接受 http/https"""
+    if not value:
+        return ''
+    absolute = urljoin(base, value.strip())
+    return absolute if urlsplit(absolute).scheme in ('http', 'https') else ''
+
+
+def generic_info(url, page):
+    """根据页面元数据(fetch_page_meta 的结果)构造通用视频信息
+
+    播放地址始终是请求的URL（不采用页面声明的 og:video），写入 embed_html 的值全部转义。
+    """
+    meta = page['meta']
+    video_type = (page['content_type'] if page['kind'] == 'media' else None) or 'video/mp4'
+    title = meta.get('og:title') or page['title'] or '未知标题'
+
+    return {
+        'status': 'success',
+        'title': title,
+        'platform': 'generic',
+        'video_url': url,
+        'thumbnail': _page_url(url, meta.get('og:image')),
+        'duration': '未知',
+        'quality': '自动',
+        'embed_html': f'''
+                <video width="100%" height="500" controls>
+                    <source src="{html.escape(url, quote=True)}" type="{html.escape(video_type, quote=True)}">
+                    您的浏览器不支持视频播放
+                </video>
+                '''
+    }
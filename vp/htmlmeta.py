@@ -0,0 +1,181 @@
+"""流式页面元数据提取：只读取<head>，媒体链接不读取正文"""
+
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, unquote
+
+MAX_HEAD_BYTES = 512 * 1024
+CHUNK_SIZE = 16 * 1024
+
+_MEDIA_CONTENT_TYPES = (
+    'video/', 'audio/',
+    'application/vnd.apple.mpegurl', 'application/x-mpegurl', 'application/dash+xml',
+)
+_HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+_WANTED_OG = ('og:title', 'og:image')
+
+
+def sniff_media(head):
+    """根据文件头魔数判断是否为媒体文件，返回MIME类型或None"""
+    if len(head) >= 12 and head[4:8] == b'ftyp':
+        return 'video/mp4'
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'video/webm'
+    if head.startswith(b'FLV'):
+        return 'video/x-flv'
+    if head.startswith(b'OggS'):
+        return 'video/ogg'
+    if head.startswith(b'RIFF') and head[8:12] == b'AVI ':
+        return 'video/x-msvideo'
+    if head.startswith(b'#EXTM3U'):
+        return 'application/vnd.apple.mpegurl'
+    if len(head) > 188 and head[0] == 0x47 and head[188] == 0x47:
+        return 'video/mp2t'
+    if head.startswith(b'ID3') or head[:2] == b'\xff\xfb':
+        return 'audio/mpeg'
+    return None
+
+
+class HeadMetaParser(HTMLParser):
+    """增量解析<head>中的<title>与<meta>，到达</head>或所需字段齐全即结束"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.meta = {}
+        self.done = False
+        self._in_title = False
+        self._title_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            content = attrs.get('content')
+            if key and content is not None and key not in self.meta:
+                self.meta[key] = content.strip()
+                self._check_done()
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts).strip()
+            self._check_done()
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+    def _check_done(self):
+        if self.title is not None and all(k in self.meta for k in _WANTED_OG):
+            self.done = True
+
+
+def _filename_title(url):
+    name = os.path.basename(unquote(urlsplit(url).path)) or urlsplit(url).netloc
+    return name or '未知标题'
+
+
+def _charset(content_type, head):
+    match = re.search(r'charset=([\w-]+)', content_type or '', re.I)
+    if not match:
+        match = _CHARSET_RE.search(head)
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    else:
+        charset = match.group(1)
+    try:
+        codecs.lookup(charset)
+        return charset
+    except LookupError:
+        return 'utf-8'
+
+
+class PageMetaReader:
+    """与IO无关的元数据读取器，同步与异步请求共用
+
+    先用响应头判断类型，再逐块 feed() 正文；feed() 返回 True 表示无需继续读取。
+    """
+
+    def __init__(self, url, content_type='', content_length=None, max_bytes=MAX_HEAD_BYTES):
+        content_type = (content_type or '').lower()
+        self.max_bytes = max_bytes
+        self._raw_content_type = content_type
+        self._parser = None
+        self._decoder = None
+        self.result = {
+            'url': url,
+            'kind': None,
+            'content_type': content_type.split(';')[0].strip(),
+            'content_length': int(content_length or 0) or None,
+            'title': None,
+            'meta': {},
+            'bytes_read': 0,
+        }
+        if content_type.startswith(_MEDIA_CONTENT_TYPES):
+            self.result.update(kind='media', title=_filename_title(url))
+
+    @property
+    def finished(self):
+        return self.result['kind'] in ('media', 'other') or (
+            self._parser is not None and self._parser.done)
+
+    def feed(self, chunk):
+        """输入一块正文，返回是否已可停止读取"""
+        if self.finished:
+            return True
+        result = self.result
+        chunk = chunk[:self.max_bytes - result['bytes_read']]
+        if self._parser is None:
+            media_type = sniff_media(chunk)
+            if media_type:
+                result.update(kind='media', content_type=media_type, title=_filename_title(result['url']))
+                result['bytes_read'] += len(chunk)
+                return True
+            if not (chunk.lstrip()[:1] == b'<' or self._raw_content_type.startswith(_HTML_CONTENT_TYPES)):
+                result['kind'] = 'other'
+                result['bytes_read'] += len(chunk)
+                return True
+            self._parser = HeadMetaParser()
+            charset = _charset(self._raw_content_type, chunk[:4096])
+            self._decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        result['bytes_read'] += len(chunk)
+        self._parser.feed(self._decoder.decode(chunk))
+        return self._parser.done or result['bytes_read'] >= self.max_bytes
+
+    def close(self):
+        """结束读取并返回结果字典"""
+        if self._parser is not None:
+            self._parser.close()
+            self.result.update(kind='html', title=self._parser.title, meta=self._parser.meta)
+        elif self.result['kind'] is None:
+            self.result['kind'] = 'other'
+        return self.result
+
+
+def fetch_page_meta(session, url, timeout=30, max_bytes=MAX_HEAD_BYTES, **kwargs):
+    """流式请求URL并提取元数据
+
+    返回字典 kind 为 'media'(媒体文件，未读取正文)、'html' 或 'other'，
+    HTML 仅读取到 </head> 或字段齐全为止，且总读取量不超过 max_bytes。
+    """
+    response = session.get(url, stream=True, timeout=timeout, **kwargs)
+    try:
+        response.raise_for_status()
+        reader = PageMetaReader(response.url or url, response.headers.get('Content-Type', ''),
+                                response.headers.get('Content-Length'), max_bytes)
+        if not reader.finished:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if reader.feed(chunk):
+                    break
+        return reader.close()
+    finally:
+        response.close()
@@ -0,0 +1,399 @@
+"""会话级磁盘HTTP缓存（RFC 9111 私有缓存的常用子集）
+
+挂在连接池适配器上，对调用方透明：新鲜条目直接从磁盘返回，过期条目带 If-None-Match /
+If-Modified-Since 重新验证，未变化的页面只花一个 304 响应。只缓存不带 Range 的 GET 文本类响应
+（HTML、JSON、XML 等）且单条不超过 max_entry_bytes；媒体、图片等直接透传。
+可缓存的响应不预读：调用方读取正文时同步复制，只有读到结尾的正文才写入缓存，
+只读 <head> 就关闭的流式请求（fetch_page_meta）不多读一个字节，也不会留下条目。
+
+每个条目为 <键>.json（状态、响应头、存入时间、Vary 取值）与 <键>.body（原始正文，保留压缩编码），
+总大小按 LRU 淘汰到 max_bytes。设置环境变量 VP_HTTP_CACHE=0 可关闭。
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+from vp.session import PooledAdapter
+
+CACHEABLE_TYPES = ('text/', 'application/json', 'application/ld+json', 'application/xhtml+xml',
+                   'application/xml', 'application/rss+xml', 'application/atom+xml')
+CACHEABLE_STATUS = (200, 203)
+MAX_ENTRY_BYTES = 2 * 1024 * 1024
+# 只有 Last-Modified 时的启发式有效期：距上次修改时间的 10%，最长一天
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX = 24 * 3600
+# 逐跳头与会话相关的头不随条目保存
+SKIP_HEADERS = frozenset(('set-cookie', 'connection', 'keep-alive', 'transfer-encoding',
+                          'proxy-connection', 'content-length'))
+# 304 响应中不应覆盖已存响应头的字段
+KEEP_ON_304 = frozenset(('content-type', 'content-encoding', 'content-length', 'content-range'))
+
+
+def parse_cache_control(value):
+    """解析 Cache-Control，返回 {小写指令: 参数或 True}"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') if arg else True
+    return directives
+
+
+def _seconds(value):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value):
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers, stored):
+    """响应的新鲜期(秒)：max-age > Expires > Last-Modified 启发式"""
+    cc = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in cc or 'no-store' in cc:
+        return 0
+    max_age = _seconds(cc.get('max-age'))
+    if max_age is not None:
+        return max_age
+    date = _timestamp(headers.get('Date')) or stored
+    expires = headers.get('Expires')
+    if expires is not None:
+        expires_at = _timestamp(expires)
+        return max(0, expires_at - date) if expires_at else 0
+    last_modified = _timestamp(headers.get('Last-Modified'))
+    if last_modified and last_modified < date:
+        return min(HEURISTIC_MAX, (date - last_modified) * HEURISTIC_FRACTION)
+    return 0
+
+
+def current_age(meta, now):
+    """条目当前年龄：源站给出的 Age 加上存入本地后经过的时间"""
+    headers = HTTPHeaderDict(meta['headers'])
+    return (_seconds(headers.get('Age')) or 0) + max(0, now - meta['stored'])
+
+
+class HttpCache:
+    """磁盘上的响应存储与命中统计，线程安全"""
+
+    def __init__(self, directory="temp/http_cache", max_bytes=100 * 1024 * 1024,
+                 max_entry_bytes=MAX_ENTRY_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 -> 占用字节数，按最近使用排序
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.stores = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _load(self):
+        """启动时扫描目录重建索引，按修改时间恢复 LRU 顺序"""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            try:
+                stat = os.stat(self._path(key, '.json'))
+                body = os.path.getsize(self._path(key, '.body'))
+            except OSError:
+                self._delete(key)
+                continue
+            found.append((stat.st_mtime, key, stat.st_size + body))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._shrink()
+
+    def lookup(self, key, request_headers):
+        """返回 (元信息, 正文) 或 None；Vary 指定的请求头不一致时视为未命中"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._path(key, '.body'), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        # 并发写入同一键时可能读到新旧混合的一对文件
+        if len(body) != meta.get('size'):
+            return None
+        if any(request_headers.get(name) != value for name, value in meta.get('vary', {}).items()):
+            return None
+        return meta, body
+
+    def store(self, key, meta, body):
+        """写入条目：先写正文再写元信息，均经临时文件替换"""
+        data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        size = len(data) + len(body)
+        if len(body) > self.max_entry_bytes or size > self.max_bytes:
+            return False
+        suffix = f'.{threading.get_ident()}.tmp'
+        for ext, payload in (('.body', body), ('.json', data)):
+            tmp = self._path(key, ext + suffix)
+            with open(tmp, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, self._path(key, ext))
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stores += 1
+            self._shrink()
+        return True
+
+    def refresh(self, key, meta, headers):
+        """304 之后用新响应头更新条目并重置存入时间"""
+        merged = HTTPHeaderDict(meta['headers'])
+        for name, value in headers.items():
+            if name.lower() not in SKIP_HEADERS and name.lower() not in KEEP_ON_304:
+                merged[name] = value
+        meta = dict(meta, headers=list(merged.items()), stored=time.time())
+        data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        tmp = self._path(key, f'.json.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self._path(key, '.json'))
+        return meta
+
+    def count(self, outcome, saved=0):
+        """记录一次缓存结果：hit / miss / revalidated / not_modified"""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'miss':
+                self.misses += 1
+            else:
+                self.revalidations += 1
+                if outcome == 'not_modified':
+                    self.not_modified += 1
+            self.bytes_saved += saved
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._delete(key)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidations
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'not_modified': self.not_modified,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'bytes_saved': self.bytes_saved,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'not_modified_ratio': round(self.not_modified / self.revalidations, 3) if self.revalidations else 0.0,
+            }
+
+    def _shrink(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            self._delete(key)
+
+    def _delete(self, key):
+        for ext in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, ext))
+            except FileNotFoundError:
+                pass
+
+
+class _Tee(io.RawIOBase):
+    """读取原始响应（未压缩解码的字节）的同时复制正文；读到结尾且未超过 limit 时回调 on_complete(正文)"""
+
+    def __init__(self, raw, limit, on_complete):
+        self._raw = raw
+        self._limit = limit
+        self._on_complete = on_complete
+        self._chunks = []
+        self._size = 0
+        length = raw.headers.get('Content-Length')
+        self._expected = int(length) if length and length.isdigit() else None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._raw.read(len(buffer), decode_content=False)
+        buffer[:len(data)] = data
+        if self._chunks is not None:
+            if data:
+                self._size += len(data)
+                if self._size > self._limit:
+                    # 超出单条上限，不再复制，调用方照常读取
+                    self._chunks = None
+                else:
+                    self._chunks.append(bytes(data))
+            if self._chunks is not None and (not data or self._size == self._expected):
+                body, self._chunks = b''.join(self._chunks), None
+                self._on_complete(body)
+        return len(data)
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+
+class CachingAdapter(PooledAdapter):
+    """带磁盘HTTP缓存的连接池适配器"""
+
+    def __init__(self, cache, *args, **kwargs):
+        self.cache = cache
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        options = dict(timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        if not self._cacheable_request(request):
+            return super().send(request, stream=stream, **options)
+
+        key = self.cache.key(request.url)
+        cached = self.cache.lookup(key, request.headers)
+        if cached is not None:
+            meta, body = cached
+            headers = HTTPHeaderDict(meta['headers'])
+            now = time.time()
+            request_cc = parse_cache_control(request.headers.get('Cache-Control'))
+            if 'no-cache' not in request_cc and current_age(meta, now) < freshness_lifetime(headers, meta['stored']):
+                self.cache.count('hit', len(body))
+                return self._replay(request, meta, body)
+            conditional = self._conditional(request, headers)
+            if conditional is not None:
+                # 正文之外的请求开销（304 响应）不计入节省量
+                response = super().send(conditional, stream=True, **options)
+                if response.status_code == 304:
+                    response.close()
+                    self.cache.count('not_modified', len(body))
+                    return self._replay(request, self.cache.refresh(key, meta, response.headers), body)
+                self.cache.count('revalidated')
+                return self._store(request, key, response)
+
+        self.cache.count('miss')
+        response = super().send(request, stream=True, **options)
+        return self._store(request, key, response)
+
+    @staticmethod
+    def _cacheable_request(request):
+        if request.method != 'GET':
+            return False
+        headers = request.headers
+        if any(name in headers for name in ('Range', 'If-None-Match', 'If-Modified-Since', 'If-Range',
+                                            'Authorization')):
+            return False
+        return 'no-store' not in parse_cache_control(headers.get('Cache-Control'))
+
+    @staticmethod
+    def _conditional(request, headers):
+        """基于已存条目的校验器生成条件请求，没有校验器时返回 None"""
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return None
+        conditional = request.copy()
+        if etag:
+            conditional.headers['If-None-Match'] = etag
+        if last_modified:
+            conditional.headers['If-Modified-Since'] = last_modified
+        return conditional
+
+    def _storable(self, response):
+        headers = response.headers
+        if response.status_code not in CACHEABLE_STATUS:
+            return False
+        content_type = headers.get('Content-Type', '').lower()
+        if not content_type.startswith(CACHEABLE_TYPES):
+            return False
+        if headers.get('Vary', '').strip() == '*' or 'no-store' in parse_cache_control(headers.get('Cache-Control')):
+            return False
+        length = headers.get('Content-Length')
+        if length and (not length.isdigit() or int(length) > self.cache.max_entry_bytes):
+            return False
+        return bool(headers.get('ETag') or headers.get('Last-Modified')
+                    or freshness_lifetime(headers, time.time()) > 0)
+
+    def _store(self, request, key, response):
+        """可缓存的响应包装为边读边复制的流，调用方读完正文时写入缓存；其余原样返回"""
+        if not self._storable(response):
+            return response
+        raw = response.raw
+        vary = [name.strip() for name in response.headers.get('Vary', '').split(',') if name.strip()]
+        meta = {
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': [(name, value) for name, value in response.headers.items()
+                        if name.lower() not in SKIP_HEADERS],
+            'stored': time.time(),
+            'vary': {name: request.headers.get(name) for name in vary},
+        }
+
+        def complete(body):
+            # 正文已读完，连接可放回连接池
+            raw.release_conn()
+            meta['headers'].append(('Content-Length', str(len(body))))
+            meta['size'] = len(body)
+            self.cache.store(key, meta, body)
+
+        response.raw = HTTPResponse(body=_Tee(raw, self.cache.max_entry_bytes, complete), headers=raw.headers,
+                                    status=raw.status, reason=raw.reason, preload_content=False,
+                                    decode_content=True)
+        return response
+
+    def _replay(self, request, meta, body):
+        raw = HTTPResponse(body=io.BytesIO(body), headers=HTTPHeaderDict(meta['headers']),
+                           status=meta['status'], reason=meta['reason'],
+                           preload_content=False, decode_content=True)
+        return self.build_response(request, raw)
+
+
+def cache_from_env(directory="temp/http_cache", **kwargs):
+    """按环境变量 VP_HTTP_CACHE 创建缓存，设为 0 时返回 None"""
+    if os.environ.get('VP_HTTP_CACHE', '1') == '0':
+        return None
+    return HttpCache(directory, **kwargs)
@@ -0,0 +1,251 @@
+"""进程级后台任务调度：优先级队列 + 工作线程池，任务不受 Streamlit 脚本重跑影响
+
+页面只提交任务并轮询 snapshot()，下载、批处理等长任务在工作线程中执行。
+任务函数签名为 func(job, *args, **kwargs)，通过 job.update() 汇报进度，
+并在合适的位置检查 job.cancelled（或把 job.cancel_event 传给下载器）。
+"""
+
+import itertools
+import queue
+import threading
+import time
+import traceback
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# 优先级数值越大越先执行
+PRIORITY_LOW = -10
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+
+class JobCancelled(Exception):
+    """任务函数可抛出此异常表示响应了取消请求"""
+
+
+class Job:
+    """单个后台任务的状态；除 update() 外的字段只由调度器修改"""
+
+    def __init__(self, job_id, func, args, kwargs, name, kind, priority, meta):
+        self.id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        self.kind = kind
+        self.priority = priority
+        self.meta = dict(meta or {})
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def update(self, progress=None, message=None, **meta):
+        """任务函数在工作线程中汇报进度(0~1)、状态文本与附加信息"""
+        if progress is not None:
+            self.progress = max(0.0, min(float(progress), 1.0))
+        if message is not None:
+            self.message = message
+        if meta:
+            self.meta.update(meta)
+
+    def snapshot(self):
+        """页面展示用的只读字典"""
+        end = self.finished or time.time()
+        return {
+            'id': self.id,
+            'name': self.name,
+            'kind': self.kind,
+            'priority': self.priority,
+            'state': self.state,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'elapsed': round(end - self.started, 1) if self.started else None,
+            'meta': dict(self.meta),
+        }
+
+
+class JobScheduler:
+    """按优先级调度的线程池；resize() 可随并发设置调整工作线程数"""
+
+    def __init__(self, max_workers=3, keep_finished=500):
+        self.keep_finished = keep_finished
+        self._queue = queue.PriorityQueue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._workers = []
+        self._target = 0
+        self._closed = False
+        self.resize(max_workers)
+
+    def submit(self, func, *args, name=None, kind='task', priority=PRIORITY_NORMAL,
+               meta=None, **kwargs):
+        """提交任务，返回任务 id"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("调度器已关闭")
+            job = Job(next(self._ids), func, args, kwargs, name or getattr(func, '__name__', 'job'),
+                      kind, priority, meta)
+            self._jobs[job.id] = job
+        self._queue.put((-priority, next(self._seq), job.id))
+        return job.id
+
+    def cancel(self, job_id):
+        """取消任务：排队中的直接标记为已取消，运行中的发出取消信号"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            job.cancel_event.set()
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.finished = time.time()
+        return True
+
+    def set_priority(self, job_id, priority):
+        """调整排队中任务的优先级（重新入队，旧队列项出队时被跳过）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != QUEUED:
+                return False
+            job.priority = priority
+        self._queue.put((-priority, next(self._seq), job_id))
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def result(self, job_id):
+        """已结束任务的返回值（取消的任务可能返回部分结果）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.result if job is not None and job.state in FINISHED_STATES else None
+
+    def snapshot(self, states=None, kind=None):
+        """按创建顺序倒序返回任务快照列表"""
+        with self._lock:
+            jobs = [job.snapshot() for job in self._jobs.values()
+                    if (states is None or job.state in states) and (kind is None or job.kind == kind)]
+        return sorted(jobs, key=lambda j: j['id'], reverse=True)
+
+    def stats(self):
+        with self._lock:
+            counts = {state: 0 for state in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                counts[job.state] += 1
+            counts['workers'] = self._target
+            return counts
+
+    def clear_finished(self):
+        """移除已结束的任务记录"""
+        with self._lock:
+            for job_id in [i for i, j in self._jobs.items() if j.state in FINISHED_STATES]:
+                del self._jobs[job_id]
+
+    def resize(self, max_workers):
+        """调整工作线程数；缩容时多余线程在完成当前任务后退出"""
+        max_workers = max(1, int(max_workers))
+        with self._lock:
+            self._target = max_workers
+            self._workers = [w for w in self._workers if w.is_alive()]
+            missing = max_workers - len(self._workers)
+            for _ in range(missing):
+                worker = threading.Thread(target=self._run, name="vp-job-worker", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        # 唤醒空闲线程检查是否需要退出
+        for _ in range(max(0, len(self._workers) - max_workers)):
+            self._queue.put((float('-inf'), next(self._seq), None))
+
+    def close(self, cancel_running=True):
+        with self._lock:
+            self._closed = True
+            jobs = list(self._jobs.values())
+            self._target = 0
+            count = len(self._workers)
+        if cancel_running:
+            for job in jobs:
+                self.cancel(job.id)
+        for _ in range(count):
+            self._queue.put((float('-inf'), next(self._seq), None))
+
+    def _should_exit(self):
+        with self._lock:
+            if len(self._workers) > self._target:
+                current = threading.current_thread()
+                if current in self._workers:
+                    self._workers.remove(current)
+                return True
+            return False
+
+    def _run(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                if self._should_exit():
+                    return
+                continue
+            with self._lock:
+                job = self._jobs.get(job_id)
+                # 已取消、已被重新入队调整优先级或已执行的任务跳过
+                if job is None or job.state != QUEUED:
+                    continue
+                job.state = RUNNING
+                job.started = time.time()
+            self._execute(job)
+            self._trim()
+            if self._should_exit():
+                return
+
+    def _execute(self, job):
+        try:
+            result = job.func(job, *job.args, **job.kwargs)
+        except Exception as e:
+            state = CANCELLED if job.cancelled or isinstance(e, JobCancelled) else FAILED
+            with self._lock:
+                job.state = state
+                job.error = None if state == CANCELLED else f"{type(e).__name__}: {e}"
+                job.message = job.message if state == FAILED else '已取消'
+                job.finished = time.time()
+            if state == FAILED:
+                job.meta['traceback'] = traceback.format_exc(limit=5)
+            return
+        with self._lock:
+            job.result = result
+            job.state = CANCELLED if job.cancelled else DONE
+            if job.state == DONE:
+                job.progress = 1.0
+            job.finished = time.time()
+
+    def _trim(self):
+        """只保留最近 keep_finished 个已结束任务"""
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.state in FINISHED_STATES]
+            if self.keep_finished <= 0:
+                expired = finished
+            else:
+                expired = sorted(finished, key=lambda j: j.finished)[:-self.keep_finished]
+            for job in expired:
+                del self._jobs[job.id]
@@ -0,0 +1,184 @@
+"""基于 OpenCV 的视频关键帧提取：元数据探测、按时间点定位的缩略图网格与封面帧
+
+只在需要的时间点 seek 后解码一帧，不逐帧解码整段视频；长视频按时间区间
+拆分到多个进程并行处理。仅使用 CPU。
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# 超过该时长的视频按时间区间分配给多进程处理
+LONG_VIDEO_SECONDS = 600
+THUMB_WIDTH = 320
+POSTER_WIDTH = 1280
+JPEG_QUALITY = 85
+
+
+def _cv2():
+    import cv2
+    # 每个进程只用单线程解码，并行度由进程数控制
+    cv2.setNumThreads(1)
+    return cv2
+
+
+def probe(path):
+    """读取时长、帧率、分辨率等元数据"""
+    cv2 = _cv2()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频: {path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    finally:
+        cap.release()
+    codec = ''.join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip('\x00 ') or None
+    duration = frame_count / fps if fps > 0 else 0.0
+    return {
+        'duration': round(duration, 3),
+        'fps': round(fps, 3),
+        'frame_count': frame_count,
+        'width': width,
+        'height': height,
+        'resolution': f"{width}x{height}",
+        'codec': codec,
+    }
+
+
+def sample_times(duration, count):
+    """在 (0, duration) 内均匀取 count 个时间点，避开片头片尾"""
+    if duration <= 0 or count <= 0:
+        return []
+    step = duration / (count + 1)
+    return [round(step * (i + 1), 3) for i in range(count)]
+
+
+def _resize(cv2, frame, width):
+    height, src_width = frame.shape[:2]
+    if src_width <= width:
+        return frame
+    return cv2.resize(frame, (width, round(height * width / src_width)),
+                      interpolation=cv2.INTER_AREA)
+
+
+def _score(cv2, frame):
+    """封面打分：清晰度(拉普拉斯方差)，过暗或过亮的帧降权"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (160, max(1, round(gray.shape[0] * 160 / gray.shape[1]))))
+    sharpness = cv2.Laplacian(small, cv2.CV_64F).var()
+    brightness = small.mean()
+    if brightness < 20 or brightness > 235:
+        sharpness *= 0.1
+    return float(sharpness)
+
+
+def _grab_frames(path, times, fps, width):
+    """打开视频并依次 seek 到各时间点，返回 [(时间, jpeg, 封面得分)]
+
+    在子进程中执行，只返回编码后的字节以减少进程间传输。
+    """
+    cv2 = _cv2()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频: {path}")
+    params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    results = []
+    try:
+        for t in times:
+            if fps > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, int(t * fps))
+            else:
+                cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+            ok, frame = cap.read()
+            if not ok or frame is None:
+                continue
+            image = cv2.imencode('.jpg', _resize(cv2, frame, width), params)[1].tobytes()
+            results.append((t, image, _score(cv2, frame)))
+    finally:
+        cap.release()
+    return results
+
+
+def _split(items, parts):
+    """按顺序切成 parts 段连续区间，使每个进程只在自己的时间范围内 seek"""
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def grab_frames(path, times, fps, workers=1, width=THUMB_WIDTH):
+    """在给定时间点抓帧；workers>1 时按时间区间分配到多个进程"""
+    if workers <= 1 or len(times) < 2:
+        return _grab_frames(path, times, fps, width)
+    chunks = _split(list(times), min(workers, len(times)))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(len(chunks), mp_context=context) as pool:
+        futures = [pool.submit(_grab_frames, path, chunk, fps, width)
+                   for chunk in chunks]
+        return [frame for future in futures for frame in future.result()]
+
+
+def make_grid(thumbnails, columns=3, gap=4):
+    """把缩略图 jpeg 拼成网格图，返回 jpeg 字节"""
+    cv2 = _cv2()
+    import numpy as np
+    images = [cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+              for data in thumbnails]
+    images = [img for img in images if img is not None]
+    if not images:
+        return None
+    cell_h = max(img.shape[0] for img in images)
+    cell_w = max(img.shape[1] for img in images)
+    columns = max(1, min(columns, len(images)))
+    rows = (len(images) + columns - 1) // columns
+    grid = np.zeros((rows * cell_h + (rows - 1) * gap,
+                     columns * cell_w + (columns - 1) * gap, 3), np.uint8)
+    for i, img in enumerate(images):
+        y = (i // columns) * (cell_h + gap)
+        x = (i % columns) * (cell_w + gap)
+        grid[y:y + img.shape[0], x:x + img.shape[1]] = img
+    return cv2.imencode('.jpg', grid, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])[1].tobytes()
+
+
+def default_workers(duration):
+    """短视频单进程，长视频每 LONG_VIDEO_SECONDS 一个进程，不超过 CPU 数"""
+    if duration <= LONG_VIDEO_SECONDS:
+        return 1
+    return max(1, min(os.cpu_count() or 1, int(duration // LONG_VIDEO_SECONDS) + 1))
+
+
+def analyze_video(path, count=9, columns=3, workers=None, thumb_width=THUMB_WIDTH,
+                  poster_width=POSTER_WIDTH):
+    """提取元数据、count 张缩略图网格与封面帧
+
+    返回 {'info', 'thumbnails': [(时间, jpeg)], 'grid', 'poster', 'poster_time', 'workers'}
+    """
+    info = probe(path)
+    times = sample_times(info['duration'], count)
+    if workers is None:
+        workers = default_workers(info['duration'])
+    frames = grab_frames(path, times, info['fps'], workers, thumb_width)
+    poster_time, poster = None, None
+    if frames:
+        # 缩略图阶段已为每帧打分，只对得分最高的时间点再解码一次大图
+        poster_time = max(frames, key=lambda frame: frame[2])[0]
+        grabbed = _grab_frames(path, [poster_time], info['fps'], poster_width)
+        poster = grabbed[0][1] if grabbed else None
+    thumbnails = [(t, thumb) for t, thumb, _ in frames]
+    return {
+        'info': info,
+        'thumbnails': thumbnails,
+        'grid': make_grid([thumb for _, thumb in thumbnails], columns),
+        'poster': poster,
+        'poster_time': poster_time,
+        'workers': workers,
+    }
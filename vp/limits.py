@@ -0,0 +1,176 @@
+"""按主机的自适应并发控制（AIMD）：延迟正常时加性增加并发上限，429/503、超时或延迟突增时乘性减小
+
+每个主机维护一个并发上限 limit。请求成功且延迟正常时 limit 增加 1/limit，即每完成一轮
+（limit 个请求）上限加 1；遇到拥塞信号时上限乘以 backoff。同一轮内已在途的请求再报告拥塞
+不重复削减，只有削减之后才开始的请求可以触发下一次削减。上次发生拥塞时的上限记为 ceiling，
+接近 ceiling 时增长放慢 PROBE_SLOWDOWN 倍，ceiling 在 CEILING_TTL 秒内无拥塞后失效。
+Retry-After 期间该主机的新请求全部等待。延迟基线是正常样本的滑动平均，高于基线 latency_factor 倍（且至少高 min_spike 秒）
+视为延迟突增。
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+from vp.retry import classify
+
+CONGESTION_STATUS = frozenset({429, 503})
+INITIAL_LIMIT = 2
+MIN_LIMIT = 1
+MAX_LIMIT = 16
+BACKOFF = 0.5
+LATENCY_FACTOR = 3.0
+MIN_SPIKE = 0.1
+# 延迟基线的滑动平均系数
+BASELINE_ALPHA = 0.1
+PROBE_SLOWDOWN = 8
+CEILING_TTL = 30.0
+# 没有 Retry-After 的 429/503 暂停该主机的秒数；过长的 Retry-After 截断，避免工作线程长时间阻塞
+DEFAULT_PAUSE = 1.0
+MAX_PAUSE = 60.0
+
+
+class _Host:
+    __slots__ = ('limit', 'inflight', 'baseline', 'latency', 'paused_until', 'cut_at', 'ceiling',
+                 'requests', 'congested', 'cuts')
+
+    def __init__(self, limit):
+        self.limit = float(limit)
+        self.inflight = 0
+        self.baseline = None
+        self.latency = None
+        self.paused_until = 0.0
+        self.cut_at = 0.0
+        self.ceiling = None
+        self.requests = 0
+        self.congested = 0
+        self.cuts = 0
+
+
+class AdaptiveLimiter:
+    """线程安全的按主机并发限制器"""
+
+    def __init__(self, initial=INITIAL_LIMIT, min_limit=MIN_LIMIT, max_limit=MAX_LIMIT, backoff=BACKOFF,
+                 latency_factor=LATENCY_FACTOR, min_spike=MIN_SPIKE):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_factor = latency_factor
+        self.min_spike = min_spike
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def host_of(url):
+        return (urlsplit(url).hostname or '').lower()
+
+    def acquire(self, host):
+        """等待该主机有空闲并发名额且不在 Retry-After 暂停期内，返回请求开始时间"""
+        with self._cond:
+            while True:
+                started, wait = self._try_acquire(host)
+                if started is not None:
+                    return started
+                self._cond.wait(wait)
+
+    def try_acquire(self, host):
+        """不等待地申请名额，返回 (请求开始时间, None) 或 (None, 建议等待秒数)；供事件循环轮询"""
+        with self._cond:
+            started, wait = self._try_acquire(host)
+            return started, (None if started is not None else wait or 0.05)
+
+    def _try_acquire(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(self.initial)
+        now = time.monotonic()
+        if now < state.paused_until:
+            return None, state.paused_until - now
+        if state.inflight >= int(state.limit):
+            return None, None
+        state.inflight += 1
+        state.requests += 1
+        return now, None
+
+    def release(self, host, started, latency=None, congested=False, retry_after=None):
+        """归还名额并按结果调整上限；latency 为 None 表示结果不反映主机负载（如 404）"""
+        with self._cond:
+            state = self._hosts[host]
+            state.inflight -= 1
+            if retry_after is not None:
+                state.paused_until = max(state.paused_until, time.monotonic() + min(retry_after, MAX_PAUSE))
+            if latency is not None and not congested:
+                state.latency = latency
+                if state.baseline is None:
+                    state.baseline = latency
+                elif latency > max(state.baseline * self.latency_factor, state.baseline + self.min_spike):
+                    congested = True
+                # 突增样本缓慢并入基线：偶发抖动不抬高基线，主机持续变慢时基线最终跟上
+                alpha = BASELINE_ALPHA / 4 if congested else BASELINE_ALPHA
+                state.baseline += alpha * (latency - state.baseline)
+            if congested:
+                state.congested += 1
+                # 每轮最多削减一次：削减前发出的请求带回的拥塞信号忽略
+                if started >= state.cut_at:
+                    state.ceiling = state.limit
+                    state.limit = max(self.min_limit, state.limit * self.backoff)
+                    state.cut_at = time.monotonic()
+                    state.cuts += 1
+            elif latency is not None:
+                step = 1 / state.limit
+                if state.ceiling is not None:
+                    if time.monotonic() - state.cut_at > CEILING_TTL:
+                        state.ceiling = None
+                    elif state.limit + 1 > state.ceiling:
+                        step /= PROBE_SLOWDOWN
+                state.limit = min(self.max_limit, state.limit + step)
+            self._cond.notify_all()
+
+    def settle(self, host, started, error=None):
+        """按请求结果归还名额：成功时记录耗时，出错时按错误分类判断是否拥塞"""
+        if error is None:
+            self.release(host, started, time.monotonic() - started)
+            return
+        retryable, retry_after, status = classify(error)
+        if status in CONGESTION_STATUS:
+            self.release(host, started, congested=True,
+                         retry_after=DEFAULT_PAUSE if retry_after is None else retry_after)
+        else:
+            # 超时与连接错误视为拥塞；4xx、解析错误等与主机负载无关
+            self.release(host, started, congested=retryable and status is None)
+
+    def call(self, func, url, *args, **kwargs):
+        """在该主机的并发名额内执行 func(url, ...)，按耗时与错误调整上限"""
+        host = self.host_of(url)
+        started = self.acquire(host)
+        try:
+            result = func(url, *args, **kwargs)
+        except Exception as e:
+            self.settle(host, started, e)
+            raise
+        self.settle(host, started)
+        return result
+
+    def limit(self, host):
+        with self._cond:
+            state = self._hosts.get(host)
+            return int(state.limit) if state else self.initial
+
+    def snapshot(self):
+        """页面展示用的各主机状态，按请求数倒序"""
+        now = time.monotonic()
+        with self._cond:
+            rows = [{
+                'host': host,
+                'limit': int(state.limit),
+                'inflight': state.inflight,
+                'latency_ms': round(state.latency * 1000, 1) if state.latency is not None else None,
+                'baseline_ms': round(state.baseline * 1000, 1) if state.baseline is not None else None,
+                'paused_s': round(max(0.0, state.paused_until - now), 1),
+                'requests': state.requests,
+                'congested': state.congested,
+                'cuts': state.cuts,
+            } for host, state in self._hosts.items()]
+        rows.sort(key=lambda r: r['requests'], reverse=True)
+        return rows
@@ -0,0 +1,287 @@
+"""运行指标：分阶段延迟直方图、按类型/平台的错误计数、在途请求数与进程内存
+
+进程内共享 METRICS 单例，记录路径只做一次加锁的桶计数；导出由独立线程的
+HTTP 服务提供（/metrics 为 Prometheus 文本格式，/metrics.json 为 JSON）。
+设置环境变量 VP_METRICS=0 可关闭记录。
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGES = ('detect', 'fetch', 'parse', 'render')
+# 延迟桶上界(秒)，覆盖从平台识别(微秒级)到慢页面抓取(数十秒)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_PORT = 9464
+
+
+class Histogram:
+    """固定桶直方图；counts 为各桶非累计计数，最后一个为 +Inf"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """按桶内线性插值估算分位数"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+def rss_bytes():
+    """进程常驻内存；Linux 读取 /proc，其他平台退化为峰值 RSS"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 以字节为单位，Linux 以 KB 为单位
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def total_memory_bytes():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, AttributeError, OSError):
+        return None
+
+
+class Metrics:
+    """线程安全的指标集合"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._latency = {}   # (阶段, 平台) -> Histogram
+        self._errors = {}    # (错误类型, 平台) -> 次数
+        self._events = {}    # (事件, 平台) -> 次数
+        self._today = (date.today(), {})  # 当日事件计数
+        self._inflight = 0
+
+    def observe(self, stage, seconds, platform='unknown'):
+        """记录一次阶段耗时"""
+        if not self.enabled:
+            return
+        key = (stage, platform or 'unknown')
+        with self._lock:
+            hist = self._latency.get(key)
+            if hist is None:
+                hist = self._latency[key] = Histogram()
+            hist.observe(seconds)
+
+    def timer(self, stage, platform='unknown', inflight=False):
+        """计时上下文：with METRICS.timer('fetch', platform, inflight=True): ..."""
+        if not self.enabled:
+            return nullcontext()
+        return _Timer(self, stage, platform, inflight)
+
+    def _finish(self, stage, platform, elapsed, inflight):
+        key = (stage, platform or 'unknown')
+        with self._lock:
+            if inflight:
+                self._inflight -= 1
+            hist = self._latency.get(key)
+            if hist is None:
+                hist = self._latency[key] = Histogram()
+            hist.observe(elapsed)
+
+    def count_error(self, error_type, platform='unknown'):
+        if not self.enabled:
+            return
+        key = (error_type, platform or 'unknown')
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def count_event(self, event, platform='unknown'):
+        """业务事件计数（播放、下载完成等），同时累计当日数量"""
+        if not self.enabled:
+            return
+        key = (event, platform or 'unknown')
+        today = date.today()
+        with self._lock:
+            self._events[key] = self._events.get(key, 0) + 1
+            if self._today[0] != today:
+                self._today = (today, {})
+            daily = self._today[1]
+            daily[event] = daily.get(event, 0) + 1
+
+    def events(self, event):
+        """返回 (当日次数, 累计次数)"""
+        with self._lock:
+            total = sum(n for (name, _), n in self._events.items() if name == event)
+            today = self._today[1].get(event, 0) if self._today[0] == date.today() else 0
+        return today, total
+
+    @property
+    def inflight(self):
+        return self._inflight
+
+    def reset(self):
+        with self._lock:
+            self._latency.clear()
+            self._errors.clear()
+            self._events.clear()
+            self._today = (date.today(), {})
+
+    def snapshot(self):
+        """JSON 可序列化的全部指标"""
+        with self._lock:
+            latency = [{
+                'stage': stage, 'platform': platform, 'count': hist.count,
+                'sum': round(hist.sum, 6),
+                'p50': hist.quantile(0.5), 'p95': hist.quantile(0.95), 'p99': hist.quantile(0.99),
+                'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], hist.counts)),
+            } for (stage, platform), hist in sorted(self._latency.items())]
+            errors = [{'type': t, 'platform': p, 'count': n} for (t, p), n in sorted(self._errors.items())]
+            events = [{'event': e, 'platform': p, 'count': n} for (e, p), n in sorted(self._events.items())]
+            inflight = self._inflight
+        return {
+            'enabled': self.enabled,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'inflight_requests': inflight,
+            'rss_bytes': rss_bytes(),
+            'latency': latency,
+            'errors': errors,
+            'events': events,
+        }
+
+    def prometheus(self):
+        """Prometheus 文本格式导出"""
+        snap = self.snapshot()
+        lines = [
+            '# HELP vp_stage_latency_seconds Latency of crawler stages.',
+            '# TYPE vp_stage_latency_seconds histogram',
+        ]
+        for item in snap['latency']:
+            labels = f'stage="{_escape(item["stage"])}",platform="{_escape(item["platform"])}"'
+            cumulative = 0
+            for bound, n in item['buckets'].items():
+                cumulative += n
+                lines.append(f'vp_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'vp_stage_latency_seconds_sum{{{labels}}} {item["sum"]}')
+            lines.append(f'vp_stage_latency_seconds_count{{{labels}}} {item["count"]}')
+        lines += ['# HELP vp_errors_total Errors by type and platform.',
+                  '# TYPE vp_errors_total counter']
+        lines += [f'vp_errors_total{{type="{_escape(e["type"])}",platform="{_escape(e["platform"])}"}} {e["count"]}'
+                  for e in snap['errors']]
+        lines += ['# HELP vp_events_total Plays, downloads and other user-visible events.',
+                  '# TYPE vp_events_total counter']
+        lines += [f'vp_events_total{{event="{_escape(e["event"])}",platform="{_escape(e["platform"])}"}} {e["count"]}'
+                  for e in snap['events']]
+        lines += ['# HELP vp_inflight_requests Requests currently being fetched.',
+                  '# TYPE vp_inflight_requests gauge',
+                  f'vp_inflight_requests {snap["inflight_requests"]}']
+        if snap['rss_bytes'] is not None:
+            lines += ['# HELP vp_process_resident_memory_bytes Resident memory of this process.',
+                      '# TYPE vp_process_resident_memory_bytes gauge',
+                      f'vp_process_resident_memory_bytes {snap["rss_bytes"]}']
+        return '\n'.join(lines) + '\n'
+
+
+class _Timer:
+    """轻量计时器（比 contextmanager 生成器少一次函数帧切换）"""
+
+    __slots__ = ('metrics', 'stage', 'platform', 'inflight', 'start')
+
+    def __init__(self, metrics, stage, platform, inflight):
+        self.metrics = metrics
+        self.stage = stage
+        self.platform = platform
+        self.inflight = inflight
+
+    def __enter__(self):
+        if self.inflight:
+            with self.metrics._lock:
+                self.metrics._inflight += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._finish(self.stage, self.platform, time.perf_counter() - self.start, self.inflight)
+        return False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _ExportHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body, content_type = self.server.metrics.prometheus(), 'text/plain; version=0.0.4'
+        elif path == '/metrics.json':
+            body, content_type = json.dumps(self.server.metrics.snapshot(), ensure_ascii=False), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MetricsExporter(ThreadingHTTPServer):
+    """在后台线程提供 /metrics 与 /metrics.json"""
+
+    daemon_threads = True
+
+    def __init__(self, metrics, host='127.0.0.1', port=DEFAULT_PORT):
+        super().__init__((host, port), _ExportHandler)
+        self.metrics = metrics
+        self.thread = threading.Thread(target=self.serve_forever, name='vp-metrics-exporter', daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+
+def start_exporter(metrics=None, host='127.0.0.1', port=None):
+    """启动导出线程；端口由 VP_METRICS_PORT 指定(0 表示不导出)，被占用时返回 None"""
+    if port is None:
+        port = int(os.environ.get('VP_METRICS_PORT', DEFAULT_PORT))
+    if not port:
+        return None
+    try:
+        return MetricsExporter(metrics or METRICS, host, port)
+    except OSError:
+        return None
+
+
+METRICS = Metrics(enabled=os.environ.get('VP_METRICS', '1') != '0')
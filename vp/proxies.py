@@ -0,0 +1,260 @@
+"""代理池：后台健康检查，按最近延迟与成功率为每个请求选择代理，避开对目标主机已被限流的代理
+
+路由发生在连接池适配器（PooledAdapter.send）中，对调用方透明；requests 为每个代理地址
+维护独立的 ProxyManager，因此每个代理都有自己的连接池。代理对某主机返回 429/503 时，
+该代理在 Retry-After（默认 60 秒）内不再用于该主机；目标主机对某代理连续返回 5xx 时同样
+只停用该代理与该主机的组合。配置了代理而全部不可用时抛出 NoProxyAvailable，不会退回直接连接
+（直接连接会暴露本机地址）。socks 代理需要 PySocks（requests[socks]）。
+"""
+
+import importlib.util
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from vp.retry import parse_retry_after
+
+DEFAULT_CHECK_URL = 'http://www.gstatic.com/generate_204'
+CHECK_INTERVAL = 30
+CHECK_TIMEOUT = 5
+# 延迟与成功率的指数滑动平均系数，越大越看重最近的结果
+EWMA_ALPHA = 0.3
+# 连续失败达到该次数标记为不健康，等下一次健康检查成功后恢复；
+# 目标主机经某代理连续返回 5xx 达到该次数时，该代理对该主机停用 THROTTLE_SECONDS 秒
+MAX_FAILURES = 3
+THROTTLE_SECONDS = 60
+THROTTLE_STATUS = frozenset({429, 503})
+# 少量请求随机分给其他可用代理，使各代理的延迟统计保持新鲜
+EXPLORE_RATIO = 0.05
+_SCHEMES = ('http', 'https', 'socks4', 'socks4a', 'socks5', 'socks5h')
+
+
+class NoProxyAvailable(requests.exceptions.ConnectionError):
+    """配置了代理但当前没有可用于目标主机的代理；Retry-After 为最早恢复的等待秒数"""
+
+    retryable = True
+    status = None
+
+    def __init__(self, host, retry_in=None):
+        super().__init__(f'没有可用于 {host} 的代理' + (f'，约 {retry_in:.0f} 秒后恢复' if retry_in else ''))
+        self.host = host
+        self.headers = {'Retry-After': str(int(retry_in) + 1)} if retry_in else {}
+
+
+def parse_proxies(text):
+    """解析代理列表（换行、逗号或空白分隔），缺省协议按 http 处理，返回去重后的URL列表
+
+    socks 代理在未安装 PySocks 时抛出 ValueError。
+    """
+    proxies = []
+    for item in re.split(r'[\s,;]+', text or ''):
+        item = item.strip()
+        if not item or item.startswith('#'):
+            continue
+        if '://' not in item:
+            item = 'http://' + item
+        parts = urlsplit(item)
+        scheme = parts.scheme.lower()
+        if scheme not in _SCHEMES or not parts.hostname:
+            continue
+        if scheme.startswith('socks') and importlib.util.find_spec('socks') is None:
+            raise ValueError(f'{item} 是 SOCKS 代理，需要先安装 PySocks：pip install "requests[socks]"')
+        if item not in proxies:
+            proxies.append(item)
+    return proxies
+
+
+class Proxy:
+    """单个代理的统计：延迟与成功率滑动平均、连续失败次数、按主机的限流截止时间"""
+
+    __slots__ = ('url', 'latency', 'success', 'failures', 'healthy', 'requests', 'errors',
+                 'checked', 'throttled', 'host_failures')
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.success = 1.0
+        self.failures = 0
+        self.healthy = True
+        self.requests = 0
+        self.errors = 0
+        self.checked = None
+        self.throttled = {}  # 主机 -> 限流截止时间(monotonic)
+        self.host_failures = {}  # 主机 -> 经该代理连续返回 5xx 的次数
+
+    @property
+    def label(self):
+        """隐藏认证信息的显示名"""
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.hostname}:{parts.port}" if parts.port else f"{parts.scheme}://{parts.hostname}"
+
+    def score(self):
+        """越小越好：延迟按成功率放大；尚无延迟数据的代理优先尝试"""
+        if self.latency is None:
+            return 0.0
+        return self.latency / max(self.success, 0.05)
+
+    def available_for(self, host, now):
+        if not self.healthy:
+            return False
+        until = self.throttled.get(host)
+        if until is None:
+            return True
+        if until <= now:
+            del self.throttled[host]
+            return True
+        return False
+
+
+class ProxyPool:
+    """线程安全的代理池"""
+
+    def __init__(self, proxies=(), check_url=DEFAULT_CHECK_URL, check_interval=CHECK_INTERVAL,
+                 check_timeout=CHECK_TIMEOUT, explore_ratio=EXPLORE_RATIO):
+        self.check_url = check_url
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.explore_ratio = explore_ratio
+        self._lock = threading.Lock()
+        self._proxies = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.rejected = 0
+        self.set_proxies(proxies)
+
+    @property
+    def active(self):
+        return bool(self._proxies)
+
+    def urls(self):
+        with self._lock:
+            return list(self._proxies)
+
+    def set_proxies(self, urls):
+        """替换代理列表，保留仍在列表中的代理的统计"""
+        with self._lock:
+            self._proxies = {url: self._proxies.get(url) or Proxy(url) for url in urls}
+        if self._proxies:
+            self.start()
+
+    def choose(self, host):
+        """为目标主机选择代理；没有可用代理时抛出 NoProxyAvailable"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [p for p in self._proxies.values() if p.available_for(host, now)]
+            if not candidates:
+                self.rejected += 1
+                # 被该主机限流的健康代理最早何时恢复；全部不健康时等下一轮健康检查
+                waits = [p.throttled[host] - now for p in self._proxies.values()
+                         if p.healthy and host in p.throttled]
+                raise NoProxyAvailable(host, min(waits) if waits else self.check_interval)
+            if len(candidates) > 1 and random.random() < self.explore_ratio:
+                proxy = random.choice(candidates)
+            else:
+                proxy = min(candidates, key=Proxy.score)
+            proxy.requests += 1
+            return proxy
+
+    def record(self, proxy, host, latency=None, status=None, retry_after=None):
+        """记录一次经代理的请求结果；latency 为 None 表示连接失败"""
+        with self._lock:
+            if latency is None:
+                self._fail(proxy)
+                return
+            if status in THROTTLE_STATUS:
+                # 限流只针对该代理与该主机的组合，不影响代理整体的成功率
+                wait = parse_retry_after(retry_after)
+                proxy.throttled[host] = time.monotonic() + (THROTTLE_SECONDS if wait is None else wait)
+                return
+            if status is not None and status >= 500:
+                # 代理本身转发成功；5xx 多半来自目标主机，只累计该代理与该主机的组合
+                count = proxy.host_failures.get(host, 0) + 1
+                if count >= MAX_FAILURES:
+                    proxy.throttled[host] = time.monotonic() + THROTTLE_SECONDS
+                    count = 0
+                proxy.host_failures[host] = count
+            else:
+                proxy.host_failures.pop(host, None)
+            self._observe(proxy, latency, True)
+
+    def _observe(self, proxy, latency, ok):
+        proxy.latency = latency if proxy.latency is None else (
+            EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * proxy.latency)
+        if ok:
+            proxy.success = EWMA_ALPHA + (1 - EWMA_ALPHA) * proxy.success
+            proxy.failures = 0
+            proxy.healthy = True
+        else:
+            self._fail(proxy)
+
+    @staticmethod
+    def _fail(proxy):
+        proxy.errors += 1
+        proxy.failures += 1
+        proxy.success *= 1 - EWMA_ALPHA
+        if proxy.failures >= MAX_FAILURES:
+            proxy.healthy = False
+
+    def check(self, proxy):
+        """经代理请求检查地址，更新延迟与健康状态"""
+        start = time.perf_counter()
+        try:
+            response = requests.get(self.check_url, proxies={'http': proxy.url, 'https': proxy.url},
+                                    timeout=self.check_timeout, stream=True)
+            response.close()
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        with self._lock:
+            proxy.checked = time.time()
+            if ok:
+                self._observe(proxy, time.perf_counter() - start, True)
+            else:
+                # 健康检查失败立即停用，下一轮检查成功后恢复
+                self._fail(proxy)
+                proxy.healthy = False
+
+    def check_all(self):
+        """并发检查全部代理"""
+        with self._lock:
+            proxies = list(self._proxies.values())
+        threads = [threading.Thread(target=self.check, args=(p,), daemon=True) for p in proxies]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def start(self):
+        """启动后台健康检查线程（已启动时忽略）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='vp-proxy-health', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._proxies:
+                self.check_all()
+            self._stop.wait(self.check_interval)
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self):
+        """页面展示用的代理状态列表"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'proxy': p.label,
+                'healthy': p.healthy,
+                'latency_ms': round(p.latency * 1000, 1) if p.latency is not None else None,
+                'success': round(p.success, 3),
+                'requests': p.requests,
+                'errors': p.errors,
+                'throttled_hosts': sorted(h for h, until in p.throttled.items() if until > now),
+            } for p in self._proxies.values()]
@@ -0,0 +1,164 @@
+"""平台提取器注册表：启动时构建域名后缀索引，ID规则预编译"""
+
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl
+
+_HOST_RE = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:)?//(?:[^/?#@]*@)?(\[[^\]]*\]|[^/?#:]*)([^?#]*)(?:\?([^#]*))?')
+
+
+class Extractor:
+    """平台描述：域名列表、预编译的视频ID规则与规范链接模板"""
+
+    __slots__ = ('name', 'domains', 'id_rules', 'canonical_template', 'keep_params')
+
+    def __init__(self, name, domains, id_rules=(), canonical_template=None, keep_params=()):
+        self.name = name
+        self.domains = tuple(domains)
+        # id_rules: (限定域名或None, 作用位置'path'/'query', 正则)
+        self.id_rules = tuple((host, where, re.compile(pattern)) for host, where, pattern in id_rules)
+        self.canonical_template = canonical_template
+        self.keep_params = tuple(keep_params)
+
+    def extract_id(self, host, path, query):
+        """按规则顺序提取视频ID"""
+        for rule_host, where, pattern in self.id_rules:
+            if rule_host is not None and host != rule_host and not host.endswith('.' + rule_host):
+                continue
+            match = pattern.search(path if where == 'path' else query)
+            if match:
+                return match.group(1)
+        return None
+
+    def canonical(self, video_id, query):
+        """生成规范链接，保留 keep_params 中影响内容的参数"""
+        url = self.canonical_template.format(id=video_id)
+        if self.keep_params and query:
+            params = [(k, v) for k, v in parse_qsl(query) if k in self.keep_params and v not in ('', '1')]
+            if params:
+                url += '?' + '&'.join(f'{k}={v}' for k, v in params)
+        return url
+
+
+EXTRACTORS = (
+    # 视频ID不限定长度，与原先的提取规则一致：任意 [\w-] 组成的片段都接受
+    Extractor('youtube', ['youtube.com', 'youtu.be', 'youtube-nocookie.com'], [
+        ('youtu.be', 'path', r'^/([\w-]+)(?:[/?]|$)'),
+        (None, 'path', r'^/(?:embed|shorts|live|v)/([\w-]+)'),
+        (None, 'query', r'(?:^|&)v=([\w-]+)(?:&|$)'),
+    ], 'https://www.youtube.com/watch?v={id}'),
+    Extractor('bilibili', ['bilibili.com', 'b23.tv'], [
+        (None, 'path', r'/video/((?:BV|bv)[0-9A-Za-z]{10}|av\d+)'),
+    ], 'https://www.bilibili.com/video/{id}', keep_params=('p',)),
+    Extractor('vimeo', ['vimeo.com'], [
+        (None, 'path', r'^/(?:video/|channels/[\w-]+/)?(\d+)(?:[/?]|$)'),
+    ], 'https://vimeo.com/{id}'),
+    Extractor('dailymotion', ['dailymotion.com', 'dai.ly'], [
+        ('dai.ly', 'path', r'^/([a-z0-9]+)'),
+        (None, 'path', r'^/(?:embed/)?video/([a-z0-9]+)'),
+    ], 'https://www.dailymotion.com/video/{id}'),
+    Extractor('twitch', ['twitch.tv'], [
+        (None, 'path', r'^/videos/(\d+)'),
+    ], 'https://www.twitch.tv/videos/{id}'),
+    Extractor('youku', ['youku.com'], [
+        (None, 'path', r'/id_([\w=]+?)(?:==)?\.html'),
+    ], 'https://v.youku.com/v_show/id_{id}.html'),
+    Extractor('iqiyi', ['iqiyi.com'], [
+        (None, 'path', r'^/(v_\w+)\.html'),
+    ], 'https://www.iqiyi.com/{id}.html'),
+)
+
+
+def split_url(url):
+    """快速拆分URL为 (小写主机, 路径, 查询串)，无协议前缀时按 https 处理"""
+    if '//' not in url[:12]:
+        url = '//' + url
+    match = _HOST_RE.match(url)
+    if not match:
+        return '', '', ''
+    host, path, query = match.groups()
+    return host.lower().rstrip('.'), path, query or ''
+
+
+class ExtractorRegistry:
+    """域名后缀索引：按主机名逐级去掉最左标签查表，匹配为 O(标签数)"""
+
+    def __init__(self, extractors=EXTRACTORS):
+        self.extractors = {e.name: e for e in extractors}
+        self._index = {}
+        for extractor in extractors:
+            for domain in extractor.domains:
+                self._index[domain] = extractor
+        self.match_host = lru_cache(maxsize=4096)(self._match_host)
+
+    def _match_host(self, host):
+        """按后缀匹配主机名，notyoutube.com 不会匹配 youtube.com"""
+        while host:
+            extractor = self._index.get(host)
+            if extractor is not None:
+                return extractor
+            dot = host.find('.')
+            if dot < 0:
+                return None
+            host = host[dot + 1:]
+        return None
+
+    def detect(self, url):
+        """返回平台名；无效URL返回 'unknown'，未注册域名返回 'generic'"""
+        if not url or not isinstance(url, str):
+            return 'unknown'
+        host = split_url(url.strip())[0]
+        if not host:
+            return 'unknown'
+        extractor = self.match_host(host)
+        return extractor.name if extractor else 'generic'
+
+    def identify(self, url):
+        """返回 (平台名, 视频ID或None)"""
+        if not url or not isinstance(url, str):
+            return 'unknown', None
+        host, path, query = split_url(url.strip())
+        if not host:
+            return 'unknown', None
+        extractor = self.match_host(host)
+        if extractor is None:
+            return 'generic', None
+        return extractor.name, extractor.extract_id(host, path, query)
+
+    def extract_id(self, url, platform=None):
+        """提取视频ID，指定 platform 时平台不符返回None"""
+        name, video_id = self.identify(url)
+        if platform is not None and name != platform:
+            return None
+        return video_id
+
+    def canonical(self, url):
+        """已知平台且能识别视频ID时返回规范链接，否则返回None"""
+        if not url or not isinstance(url, str):
+            return None
+        host, path, query = split_url(url.strip())
+        extractor = self.match_host(host) if host else None
+        if extractor is None:
+            return None
+        video_id = extractor.extract_id(host, path, query)
+        return extractor.canonical(video_id, query) if video_id else None
+
+    def classify(self, urls):
+        """一次遍历把URL列表按平台分组，组内保持输入顺序"""
+        groups = {}
+        match_host = self.match_host
+        for url in urls:
+            if not url or not isinstance(url, str):
+                name = 'unknown'
+            else:
+                host = split_url(url)[0]
+                extractor = match_host(host) if host else None
+                name = extractor.name if extractor else ('generic' if host else 'unknown')
+            group = groups.get(name)
+            if group is None:
+                group = groups[name] = []
+            group.append(url)
+        return groups
+
+
+REGISTRY = ExtractorRegistry()
@@ -0,0 +1,105 @@
+"""批量结果的列式存储：工作线程逐行追加，页面在服务端筛选、排序、分页，只把当前页交给前端
+
+行数据按列保存在列表中，frame() 只把新增的行拼接到已构建的 DataFrame；
+播放所需的完整视频信息单独按序号保存，不进入 DataFrame。
+"""
+
+import threading
+
+COLUMNS = ('index', 'url', 'platform', 'status', 'title', 'error')
+SORT_COLUMNS = ('index', 'platform', 'status', 'title', 'url')
+
+
+class BatchResults:
+    """线程安全的批量结果集合"""
+
+    def __init__(self, total=None):
+        self.total = total
+        self._lock = threading.Lock()
+        self._columns = {name: [] for name in COLUMNS}
+        self._data = {}
+        self._platforms = set()
+        self._success = 0
+        self._frame = None
+        self._frame_rows = 0
+
+    @classmethod
+    def from_rows(cls, rows, total=None):
+        """由 (序号, 结果字典) 序列构建"""
+        results = cls(total)
+        for index, row in rows:
+            results.add(index, **row)
+        return results
+
+    def add(self, index, url, status, title=None, platform=None, error=None, data=None):
+        """追加一行结果；data 为播放所需的完整视频信息"""
+        platform = platform or 'unknown'
+        with self._lock:
+            for name, value in zip(COLUMNS, (index, url, platform, status, title or '', error or '')):
+                self._columns[name].append(value)
+            if data is not None:
+                self._data[index] = data
+            self._platforms.add(platform)
+            if status == 'success':
+                self._success += 1
+
+    def __len__(self):
+        return len(self._columns['index'])
+
+    def stats(self):
+        with self._lock:
+            rows = len(self._columns['index'])
+            return {'rows': rows, 'total': self.total or rows,
+                    'success': self._success, 'failed': rows - self._success}
+
+    def platforms(self):
+        with self._lock:
+            return sorted(self._platforms)
+
+    def data(self, index):
+        """按序号取回完整视频信息，失败行返回 None"""
+        with self._lock:
+            return self._data.get(index)
+
+    def frame(self):
+        """返回包含全部已完成行的 DataFrame，只拼接上次构建之后的新增行"""
+        import pandas as pd
+        with self._lock:
+            rows = len(self._columns['index'])
+            if self._frame is not None and rows == self._frame_rows:
+                return self._frame
+            # 基准表与行数在同一次加锁内取快照，锁外只使用快照
+            base, base_rows = self._frame, self._frame_rows
+            new = {name: values[base_rows:rows] for name, values in self._columns.items()}
+        chunk = pd.DataFrame(new, columns=list(COLUMNS))
+        chunk.index = range(base_rows, rows)
+        frame = chunk if base is None else pd.concat([base, chunk])
+        with self._lock:
+            # 并发调用时以行数更多的结果为准；没有任何行时也保留空表
+            if rows > self._frame_rows or self._frame is None:
+                self._frame, self._frame_rows = frame, rows
+            return self._frame
+
+    def query(self, status=None, platform=None, search=None, sort_by='index', descending=False,
+              page=1, page_size=50):
+        """服务端筛选、排序与分页，返回 (当前页 DataFrame, 筛选后总行数)"""
+        frame = self.frame()
+        mask = None
+        if status is not None:
+            mask = frame['status'] == status if status == 'success' else frame['status'] != 'success'
+        if platform is not None:
+            match = frame['platform'] == platform
+            mask = match if mask is None else mask & match
+        if search:
+            match = (frame['url'].str.contains(search, case=False, regex=False)
+                     | frame['title'].str.contains(search, case=False, regex=False))
+            mask = match if mask is None else mask & match
+        if mask is not None:
+            frame = frame[mask]
+        matched = len(frame)
+        if sort_by not in SORT_COLUMNS:
+            sort_by = 'index'
+        # 行按完成顺序追加，默认也需按序号排序；稳定排序使相同键保持完成顺序
+        frame = frame.sort_values(sort_by, ascending=not descending, kind='stable')
+        start = max(0, (page - 1) * page_size)
+        return frame.iloc[start:start + page_size], matched
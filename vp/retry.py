@@ -0,0 +1,187 @@
+"""重试策略：错误分类、带抖动的指数退避、批次重试预算与按域名熔断"""
+
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """目标域名已熔断，请求被直接拒绝"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f'{host} 连续失败已熔断，{retry_in:.0f} 秒后重试')
+        self.host = host
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头(秒数或HTTP日期)，返回等待秒数或None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _root_cause(error):
+    """展开 youtube-dl 等库包装过的原始异常"""
+    seen = set()
+    while id(error) not in seen:
+        seen.add(id(error))
+        exc_info = getattr(error, 'exc_info', None)
+        inner = exc_info[1] if isinstance(exc_info, tuple) and len(exc_info) > 1 else None
+        inner = inner or error.__cause__
+        if not isinstance(inner, BaseException):
+            break
+        error = inner
+    return error
+
+
+def classify(error):
+    """错误分类，返回 (是否可重试, Retry-After秒数或None, HTTP状态码或None)
+
+    超时、连接错误、5xx、408/425/429 可重试；其余 4xx、解析错误等不可重试。
+    """
+    error = _root_cause(error)
+    # 跨进程传回的错误已在子进程中分类
+    explicit = getattr(error, 'retryable', None)
+    if isinstance(explicit, bool):
+        headers = getattr(error, 'headers', None) or {}
+        return explicit, parse_retry_after(headers.get('Retry-After')), getattr(error, 'status', None)
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status', None) or getattr(error, 'code', None)
+    headers = getattr(error, 'headers', None)
+    if response is not None and getattr(response, 'status_code', None):
+        status, headers = response.status_code, response.headers
+    if isinstance(status, int) and 100 <= status < 600:
+        retry_after = parse_retry_after((headers or {}).get('Retry-After')) if headers else None
+        return status in RETRYABLE_STATUS, retry_after, status
+
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, socket.timeout,
+                          TimeoutError, ConnectionError)):
+        return True, None, None
+    # aiohttp 等库的连接类异常按类名识别，避免强依赖
+    name = type(error).__name__
+    if 'Timeout' in name or 'Connect' in name or 'Disconnect' in name:
+        return True, None, None
+    return False, None, None
+
+
+class RetryBudget:
+    """批次级重试预算：重试总次数不超过 min_retries 与请求数 * ratio 中的较大者"""
+
+    def __init__(self, ratio=0.2, min_retries=10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self):
+        """申请一次重试，预算不足时返回False"""
+        with self._lock:
+            if self.retries >= max(self.min_retries, self.requests * self.ratio):
+                return False
+            self.retries += 1
+            return True
+
+
+class CircuitBreakers:
+    """按域名的熔断器：连续失败达到阈值后打开，冷却后放行一次试探请求"""
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host):
+        """请求前检查，熔断中抛出 CircuitOpenError"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(host)
+            if not state or state['opened_at'] is None:
+                return
+            remaining = state['opened_at'] + self.cooldown - now
+            if remaining > 0 or state['probing']:
+                raise CircuitOpenError(host, max(remaining, 0))
+            # 冷却结束，半开状态只放行一个试探请求
+            state['probing'] = True
+
+    def record_success(self, host):
+        with self._lock:
+            self._state.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            state = self._state.setdefault(host, {'failures': 0, 'opened_at': None, 'probing': False})
+            state['failures'] += 1
+            if state['probing'] or state['failures'] >= self.failure_threshold:
+                state['opened_at'] = time.monotonic()
+                state['probing'] = False
+
+    def open_hosts(self):
+        """当前处于熔断状态的域名及剩余冷却秒数"""
+        now = time.monotonic()
+        with self._lock:
+            return {host: max(0.0, s['opened_at'] + self.cooldown - now)
+                    for host, s in self._state.items() if s['opened_at'] is not None}
+
+
+class RetryPolicy:
+    """按错误分类重试：可重试错误带抖动指数退避，不可重试错误立即抛出"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=10.0, breakers=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breakers = breakers
+
+    def backoff(self, attempt, retry_after=None):
+        """第 attempt 次失败后的等待时间(full jitter)，Retry-After 优先"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay * 6))
+        return delay
+
+    def call(self, func, url, *args, budget=None, sleep=time.sleep, **kwargs):
+        """执行 func(url, ...)，失败时按策略重试"""
+        host = (urlsplit(url).hostname or '').lower()
+        for attempt in range(self.max_attempts):
+            if self.breakers is not None:
+                self.breakers.before_request(host)
+            if budget is not None:
+                budget.record_request()
+            try:
+                result = func(url, *args, **kwargs)
+            except Exception as e:
+                retryable, retry_after, status = classify(e)
+                if self.breakers is not None:
+                    # 4xx 等客户端错误不代表主机故障，不计入熔断
+                    if retryable:
+                        self.breakers.record_failure(host)
+                    else:
+                        self.breakers.record_success(host)
+                if (not retryable or attempt == self.max_attempts - 1
+                        or (budget is not None and not budget.try_spend())):
+                    raise
+                sleep(self.backoff(attempt, retry_after))
+                continue
+            if self.breakers is not None:
+                self.breakers.record_success(host)
+            return result
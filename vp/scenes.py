@@ -0,0 +1,247 @@
+"""镜头切换检测：解码缩小后的帧，按批用 NumPy 计算颜色直方图差异，生成镜头索引
+
+索引以 JSON 存放在视频旁（<视频>.scenes.json），视频未变化时直接复用。
+长视频按帧区间拆分到多个进程。
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+INDEX_SUFFIX = '.scenes.json'
+INDEX_VERSION = 1
+# 每通道 8 个量化级，共 512 个联合颜色桶
+BINS_PER_CHANNEL = 8
+DEFAULT_THRESHOLD = 0.35
+MIN_SCENE_SECONDS = 0.5
+FRAME_WIDTH = 64
+BATCH_SIZE = 256
+# 超过该帧数的视频拆分到多进程
+PARALLEL_MIN_FRAMES = 9000
+
+
+def histograms(frames):
+    """批量计算颜色直方图：frames 为 (N, H, W, 3) uint8，返回 (N, 512) 归一化直方图"""
+    import numpy as np
+    count = frames.shape[0]
+    bits = (BINS_PER_CHANNEL - 1).bit_length()
+    quantized = frames >> (8 - bits)
+    # 三通道量化值原地拼成 uint16 联合桶号，再按帧错开桶号区间，一次 bincount 得到整批直方图
+    bins = quantized[..., 0].astype(np.uint16)
+    bins <<= bits
+    bins |= quantized[..., 1]
+    bins <<= bits
+    bins |= quantized[..., 2]
+    total = BINS_PER_CHANNEL ** 3
+    bins = np.add(bins, (np.arange(count, dtype=np.intp) * total)[:, None, None], dtype=np.intp)
+    hist = np.bincount(bins.ravel(), minlength=count * total)
+    return hist.reshape(count, total).astype(np.float32) / (frames.shape[1] * frames.shape[2])
+
+
+def histogram_distances(hist, previous=None):
+    """相邻帧直方图的总变差距离(0~1)；previous 为上一批最后一帧的直方图"""
+    import numpy as np
+    if previous is not None:
+        hist = np.vstack([previous[None, :], hist])
+    return 0.5 * np.abs(np.diff(hist, axis=0)).sum(axis=1)
+
+
+def _scan_range(path, start, end, stride=1, width=FRAME_WIDTH, batch_size=BATCH_SIZE):
+    """解码 [start, end) 帧区间，返回 (帧号数组, 与前一采样帧的距离数组, 解码帧数)
+
+    在子进程中执行。start>0 时额外解码前一采样帧，使区间边界处的差异也能算出。
+    """
+    import cv2
+    import numpy as np
+    cv2.setNumThreads(1)
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频: {path}")
+    first = max(0, start - stride)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    frame_numbers, distances = [], []
+    previous = None
+    batch, batch_numbers = [], []
+    decoded = 0
+    size = None
+
+    def flush():
+        nonlocal previous
+        hist = histograms(np.stack(batch))
+        dist = histogram_distances(hist, previous)
+        numbers = batch_numbers
+        if previous is None:
+            # 区间第一帧没有前驱，不产生距离
+            numbers = numbers[1:]
+        frame_numbers.extend(numbers)
+        distances.append(dist)
+        previous = hist[-1]
+        batch.clear()
+        batch_numbers.clear()
+
+    try:
+        position = first
+        while position < end:
+            if (position - first) % stride:
+                if not cap.grab():
+                    break
+                position += 1
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            decoded += 1
+            if size is None:
+                height, src_width = frame.shape[:2]
+                size = (width, max(1, round(height * width / src_width)))
+            batch.append(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+            batch_numbers.append(position)
+            position += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        cap.release()
+    if distances:
+        distances = np.concatenate(distances)
+    else:
+        distances = np.zeros(0, np.float32)
+    return np.asarray(frame_numbers, np.int64), distances, decoded
+
+
+def _ranges(frame_count, parts, stride):
+    """把帧区间切成 parts 段，边界对齐到采样步长"""
+    step = -(-frame_count // parts)
+    step = -(-step // stride) * stride
+    return [(start, min(start + step, frame_count)) for start in range(0, frame_count, step)]
+
+
+def default_workers(frame_count):
+    if frame_count < PARALLEL_MIN_FRAMES:
+        return 1
+    return max(1, min(os.cpu_count() or 1, frame_count // PARALLEL_MIN_FRAMES + 1))
+
+
+def scan_distances(path, frame_count, stride=1, workers=1, width=FRAME_WIDTH):
+    """计算全片相邻采样帧的直方图距离，返回 (帧号数组, 距离数组, 解码帧数)"""
+    import numpy as np
+    if workers <= 1 or frame_count < 2 * stride:
+        return _scan_range(path, 0, frame_count or 1 << 62, stride, width)
+    ranges = _ranges(frame_count, workers, stride)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(len(ranges), mp_context=context) as pool:
+        futures = [pool.submit(_scan_range, path, start, end, stride, width)
+                   for start, end in ranges]
+        parts = [future.result() for future in futures]
+    return (np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]),
+            sum(p[2] for p in parts))
+
+
+def find_cuts(frame_numbers, distances, fps, threshold=DEFAULT_THRESHOLD,
+              min_scene_seconds=MIN_SCENE_SECONDS):
+    """距离超过阈值的帧视为镜头起点；间隔过近的切点只保留差异最大的一个"""
+    import numpy as np
+    candidates = np.flatnonzero(distances > threshold)
+    min_gap = max(1, round(min_scene_seconds * fps)) if fps > 0 else 1
+    cuts = []
+    for i in candidates:
+        frame, score = int(frame_numbers[i]), float(distances[i])
+        if cuts and frame - cuts[-1][0] < min_gap:
+            if score > cuts[-1][1]:
+                cuts[-1] = (frame, score)
+            continue
+        if frame < min_gap:
+            continue
+        cuts.append((frame, score))
+    return cuts
+
+
+def build_scenes(cuts, frame_count, fps):
+    """由切点生成镜头列表"""
+    starts = [(0, 1.0)] + cuts
+    scenes = []
+    for i, (start, score) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else frame_count
+        scenes.append({
+            'index': i,
+            'start_frame': start,
+            'end_frame': end,
+            'start': round(start / fps, 3) if fps > 0 else 0.0,
+            'end': round(end / fps, 3) if fps > 0 else 0.0,
+            'score': round(score, 4),
+        })
+    return scenes
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def load_index(path, threshold=None):
+    """读取已持久化且与当前视频匹配的镜头索引，不存在或已过期时返回 None"""
+    try:
+        with open(index_path(path), encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION or index.get('video') != _signature(path):
+        return None
+    if threshold is not None and index.get('threshold') != threshold:
+        return None
+    return index
+
+
+def detect_scenes(path, threshold=DEFAULT_THRESHOLD, sample_fps=None, workers=None,
+                  width=FRAME_WIDTH, use_index=True):
+    """检测镜头切换并把索引写到视频旁，返回索引字典
+
+    sample_fps 为空时逐帧检测；设定后按该帧率抽样以加速长视频。
+    """
+    if use_index:
+        index = load_index(path, threshold)
+        if index is not None:
+            return index
+    import cv2
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    stride = max(1, round(fps / sample_fps)) if sample_fps and fps > 0 else 1
+    if workers is None:
+        workers = default_workers(frame_count)
+
+    started = time.perf_counter()
+    frame_numbers, distances, decoded = scan_distances(path, frame_count, stride, workers, width)
+    elapsed = time.perf_counter() - started
+    if not frame_count and len(frame_numbers):
+        frame_count = int(frame_numbers[-1]) + 1
+    cuts = find_cuts(frame_numbers, distances, fps, threshold)
+    index = {
+        'version': INDEX_VERSION,
+        'video': _signature(path),
+        'fps': fps,
+        'frame_count': frame_count,
+        'threshold': threshold,
+        'stride': stride,
+        'workers': workers,
+        'decoded_frames': decoded,
+        'elapsed': round(elapsed, 3),
+        'frames_per_second': round(decoded / elapsed, 1) if elapsed > 0 else None,
+        'scenes': build_scenes(cuts, frame_count, fps),
+    }
+    tmp_path = index_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path(path))
+    return index
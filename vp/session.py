@@ -0,0 +1,115 @@
+"""共享HTTP会话与连接池"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 连接池参数：每个主机保留的连接数需覆盖最大并发数(10)，避免高并发时丢弃连接
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 16
+
+
+class PooledAdapter(HTTPAdapter):
+    """带连接统计的适配器，主机连接池被淘汰时保留其计数"""
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self.retired_connections = 0
+        self.retired_requests = 0
+        # 设置 ProxyPool 后每个请求按代理池的选择经代理发出
+        self.proxy_pool = None
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        pool = self.proxy_pool
+        if pool is None or not pool.active:
+            return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        host = urlsplit(request.url).hostname
+        # 连不上代理本身时换一个代理再试一次，请求尚未到达目标站点；没有可用代理时
+        # choose 抛出 NoProxyAvailable，不退回直接连接
+        for attempt in range(2):
+            proxy = pool.choose(host)
+            routed = dict(proxies or {}, http=proxy.url, https=proxy.url)
+            start = time.perf_counter()
+            try:
+                response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                        proxies=routed)
+                break
+            except requests.exceptions.ProxyError:
+                pool.record(proxy, host)
+                if attempt:
+                    raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                pool.record(proxy, host)
+                raise
+        # 此时正文尚未读取，耗时即首字节延迟
+        pool.record(proxy, host, time.perf_counter() - start, response.status_code,
+                    response.headers.get('Retry-After'))
+        return response
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pools = self.poolmanager.pools
+        dispose = pools.dispose_func
+
+        def retire(pool):
+            with self._stats_lock:
+                self.retired_connections += pool.num_connections
+                self.retired_requests += pool.num_requests
+            if dispose:
+                dispose(pool)
+
+        pools.dispose_func = retire
+
+    def live_pools(self):
+        """当前存活的主机连接池(含代理)"""
+        managers = [self.poolmanager] + list(self.proxy_manager.values())
+        for manager in managers:
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    yield pool
+
+
+def build_session(headers=None, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, cache=None,
+                  proxy_pool=None):
+    """创建挂载了定长连接池的会话，供多个线程共享使用
+
+    传入 HttpCache 时启用磁盘HTTP缓存；传入 ProxyPool 时请求经代理池路由（每个代理独立的连接池）。
+    """
+    session = requests.Session()
+    if cache is not None:
+        from vp.httpcache import CachingAdapter
+        adapter = CachingAdapter(cache, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    else:
+        adapter = PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    adapter.proxy_pool = proxy_pool
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def connection_stats(session):
+    """汇总会话的连接复用统计：请求数、新建连接数、复用次数"""
+    connections = requests_count = hosts = 0
+    adapters = {id(a): a for a in session.adapters.values() if isinstance(a, PooledAdapter)}
+    for adapter in adapters.values():
+        with adapter._stats_lock:
+            connections += adapter.retired_connections
+            requests_count += adapter.retired_requests
+        for pool in adapter.live_pools():
+            hosts += 1
+            connections += pool.num_connections
+            requests_count += pool.num_requests
+    return {
+        'hosts': hosts,
+        'requests': requests_count,
+        'new_connections': connections,
+        'reused_connections': max(0, requests_count - connections),
+        'reuse_ratio': round(1 - connections / requests_count, 3) if requests_count else 0.0,
+    }
@@ -0,0 +1,172 @@
+"""上传文件落盘：分块写入 temp/，之后以 mmap + memoryview 只读访问，避免整文件 bytes 拷贝"""
+
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import time
+
+CHUNK_SIZE = 4 * 1024 * 1024
+# 新建落盘文件时只保留最近使用的若干个，连同其旁边的索引文件（如 .scenes.json）一起删除
+KEEP_SPOOLS = 5
+# 崩溃遗留的 .spool 临时文件超过该秒数后清理
+STALE_TMP_SECONDS = 3600
+_SPOOL_RE = re.compile(r'^upload_[0-9a-f]{16}(\.\w+)?$')
+
+
+class SpooledFile:
+    """已落盘的上传文件；view() 返回零拷贝的只读 memoryview，用完调用 close()"""
+
+    def __init__(self, path, size, name=None, digest=None):
+        self.path = path
+        self.size = size
+        self.name = name or os.path.basename(path)
+        self.digest = digest
+        self._file = None
+        self._mmap = None
+        self._views = []
+
+    def view(self, start=0, stop=None):
+        """返回文件内容的 memoryview 切片，首次调用时建立内存映射"""
+        if self.size == 0:
+            return memoryview(b'')
+        if self._mmap is None:
+            self._file = open(self.path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)[start:stop]
+        self._views.append(view)
+        return view
+
+    def head(self, size=4096):
+        """文件头若干字节（小拷贝，用于格式嗅探）"""
+        return bytes(self.view(0, size))
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        """按块产出 memoryview，供流式处理"""
+        for offset in range(0, self.size, chunk_size):
+            yield self.view(offset, offset + chunk_size)
+
+    def close(self):
+        # 必须先释放所有导出的 memoryview，mmap 才能关闭
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"SpooledFile({self.path!r}, size={self.size})"
+
+
+def _source_chunks(source, chunk_size):
+    """从上传对象按块读取到复用的缓冲区
+
+    不使用 BytesIO.getbuffer()：对以 bytes 初始化的 BytesIO（如 Streamlit 的
+    UploadedFile）导出缓冲区会触发整文件复制。
+    """
+    if getattr(source, 'seekable', lambda: False)():
+        source.seek(0)
+    chunk = bytearray(chunk_size)
+    view = memoryview(chunk)
+    while True:
+        read = source.readinto(view) if hasattr(source, 'readinto') else None
+        if read is None:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            yield data
+            continue
+        if not read:
+            break
+        yield view[:read]
+
+
+def spool_upload(source, directory="temp", name=None, chunk_size=CHUNK_SIZE):
+    """把上传对象分块写入 directory，返回 SpooledFile
+
+    文件按内容哈希命名，同一文件重复上传或脚本重跑时复用已有副本。
+    内存峰值约为一个分块大小，与文件大小无关。
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = name or getattr(source, 'name', None)
+    ext = os.path.splitext(name or '')[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.spool')
+    try:
+        with os.fdopen(fd, 'wb', buffering=0) as f:
+            for chunk in _source_chunks(source, chunk_size):
+                digest.update(chunk)
+                written = 0
+                while written < len(chunk):
+                    written += f.write(chunk[written:])
+                size += len(chunk)
+        hexdigest = digest.hexdigest()
+        path = os.path.join(directory, f"upload_{hexdigest[:16]}{ext}")
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            os.remove(tmp_path)
+            # 复用时刷新修改时间，清理按最近使用排序
+            os.utime(path)
+        else:
+            os.replace(tmp_path, path)
+            prune_spools(directory, keep_path=path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return SpooledFile(path, size, name=name, digest=hexdigest)
+
+
+def prune_spools(directory="temp", keep=KEEP_SPOOLS, keep_path=None):
+    """删除超出保留数量的旧落盘文件及其旁边的索引文件，以及过期的临时文件
+
+    其他会话仍在使用的文件被删除后，load_video_from_bytes 会在下次重跑时重新落盘。
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    now = time.time()
+    spools = []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        if _SPOOL_RE.match(name):
+            spools.append((mtime, name))
+        elif name.endswith('.spool') and now - mtime > STALE_TMP_SECONDS:
+            _remove(path)
+    spools.sort(reverse=True)
+    for _, name in spools[keep:]:
+        if keep_path is not None and os.path.join(directory, name) == keep_path:
+            continue
+        for other in names:
+            if other == name or other.startswith(name + '.'):
+                _remove(os.path.join(directory, other))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,253 @@
+"""下载历史与收藏的 SQLite 存储：WAL 模式支持多会话并发，按索引分页查询
+
+查询使用键集分页（按时间倒序，游标为上一页最后一行的 (时间, id)），
+翻页代价与页码无关；批处理结果通过 BatchWriter 分批写入。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from vp.urls import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    platform TEXT NOT NULL DEFAULT 'unknown',
+    status TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT 'download',
+    path TEXT,
+    size INTEGER,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_created ON history (created DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_history_status ON history (status, created DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_history_platform ON history (platform, created DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_history_status_platform
+    ON history (status, platform, created DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    platform TEXT NOT NULL DEFAULT 'unknown',
+    thumbnail TEXT,
+    added REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_favorites_added ON favorites (added DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_favorites_platform ON favorites (platform, added DESC, id DESC);
+"""
+
+HISTORY_COLUMNS = ('url', 'title', 'platform', 'status', 'source', 'path', 'size', 'error')
+
+
+class HistoryStore:
+    """线程安全的 SQLite 存储，每个线程持有独立连接"""
+
+    def __init__(self, path=os.path.join("data", "vp.db"), timeout=10):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---- 下载历史 ----
+
+    def add_history(self, url, status, title=None, platform=None, source='download',
+                    path=None, size=None, error=None):
+        """写入一条历史记录，返回记录 id"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO history (url, title, platform, status, source, path, size, error,"
+                " created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, title, platform or 'unknown', status, source, path, size, error, now, now))
+            return cursor.lastrowid
+
+    def add_history_many(self, records):
+        """在一个事务内批量写入历史记录（dict 序列）"""
+        now = time.time()
+        rows = [(r.get('url'), r.get('title'), r.get('platform') or 'unknown', r['status'],
+                 r.get('source', 'download'), r.get('path'), r.get('size'), r.get('error'),
+                 r.get('created', now), now)
+                for r in records]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO history (url, title, platform, status, source, path, size, error,"
+                " created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def update_history(self, record_id, **fields):
+        """更新记录的状态、路径、大小或错误信息"""
+        fields = {k: v for k, v in fields.items() if k in HISTORY_COLUMNS}
+        if not fields:
+            return
+        assignments = ', '.join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE history SET {assignments}, updated = ? WHERE id = ?",
+                         (*fields.values(), time.time(), record_id))
+
+    def delete_history(self, status=None):
+        """删除历史记录（可按状态），返回删除条数"""
+        where, params = _filters(status=status)
+        sql = "DELETE FROM history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._connect() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def writer(self, batch_size=200):
+        """批处理任务使用的缓冲写入器"""
+        return BatchWriter(self, batch_size)
+
+    def query_history(self, status=None, platform=None, since=None, until=None,
+                      limit=50, cursor=None):
+        """按条件分页查询历史，返回 (行列表, 下一页游标或None)"""
+        where, params = _filters(status=status, platform=platform)
+        if since is not None:
+            where.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created < ?")
+            params.append(until)
+        return self._page("history", "created", where, params, limit, cursor)
+
+    def count_history(self, status=None, platform=None, since=None, until=None):
+        where, params = _filters(status=status, platform=platform)
+        if since is not None:
+            where.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created < ?")
+            params.append(until)
+        return self._count("history", where, params)
+
+    def history_platforms(self):
+        """历史中出现过的平台（走索引去重）"""
+        rows = self._connect().execute("SELECT DISTINCT platform FROM history ORDER BY platform")
+        return [row[0] for row in rows]
+
+    def history_status_counts(self):
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM history GROUP BY status")
+        return {row[0]: row[1] for row in rows}
+
+    # ---- 收藏 ----
+
+    def add_favorite(self, url, title=None, platform=None, thumbnail=None):
+        """收藏视频，同一规范化URL只保留一条（重复收藏时更新信息）"""
+        key = canonical_url(url)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO favorites (url, title, platform, thumbnail, added) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET title = excluded.title,"
+                " platform = excluded.platform, thumbnail = excluded.thumbnail",
+                (key, title, platform or 'unknown', thumbnail, time.time()))
+
+    def remove_favorite(self, favorite_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM favorites WHERE id = ?", (favorite_id,))
+
+    def query_favorites(self, platform=None, search=None, limit=20, cursor=None):
+        """分页查询收藏，返回 (行列表, 下一页游标或None)"""
+        where, params = _filters(platform=platform)
+        if search:
+            where.append("title LIKE ?")
+            params.append(f"%{search}%")
+        return self._page("favorites", "added", where, params, limit, cursor)
+
+    def count_favorites(self, platform=None, search=None):
+        where, params = _filters(platform=platform)
+        if search:
+            where.append("title LIKE ?")
+            params.append(f"%{search}%")
+        return self._count("favorites", where, params)
+
+    def favorite_platforms(self):
+        rows = self._connect().execute("SELECT DISTINCT platform FROM favorites ORDER BY platform")
+        return [row[0] for row in rows]
+
+    # ---- 内部 ----
+
+    def _page(self, table, order_column, where, params, limit, cursor):
+        where, params = list(where), list(params)
+        if cursor is not None:
+            # 键集分页：严格位于上一页最后一行之后
+            where.append(f"({order_column}, id) < (?, ?)")
+            params.extend(cursor)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_column} DESC, id DESC LIMIT ?"
+        rows = [dict(row) for row in self._connect().execute(sql, (*params, limit + 1))]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][order_column], rows[-1]['id'])
+        return rows, next_cursor
+
+    def _count(self, table, where, params):
+        sql = f"SELECT COUNT(*) FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._connect().execute(sql, params).fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _filters(**equals):
+    where, params = [], []
+    for column, value in equals.items():
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    return where, params
+
+
+class BatchWriter:
+    """缓冲历史记录，满 batch_size 条或退出时在一个事务内写入"""
+
+    def __init__(self, store, batch_size=200):
+        self.store = store
+        self.batch_size = batch_size
+        self.pending = []
+        self.written = 0
+
+    def add(self, **record):
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.written += self.store.add_history_many(self.pending)
+            self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
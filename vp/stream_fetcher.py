@@ -0,0 +1,301 @@
+"""HLS/DASH 点播分片并行下载：有界预取窗口，按顺序拼接为单个文件"""
+
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+_DASH_NS = {'mpd': 'urn:mpeg:dash:schema:mpd:2011'}
+_DURATION_RE = re.compile(r'P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?')
+_TEMPLATE_RE = re.compile(r'\$(RepresentationID|Number|Time|Bandwidth)(?:%0(\d+)d)?\$')
+# 下载过程中写入临时文件，完成后才改名为目标文件名
+PART_SUFFIX = '.part'
+
+
+class Segment:
+    """单个媒体分片：地址与可选字节范围 (起始, 结束)"""
+
+    __slots__ = ('index', 'url', 'byterange', 'duration')
+
+    def __init__(self, index, url, byterange=None, duration=0.0):
+        self.index = index
+        self.url = url
+        self.byterange = byterange
+        self.duration = duration
+
+
+def _parse_attrs(text):
+    return {k: v.strip('"') for k, v in _ATTR_RE.findall(text)}
+
+
+def is_manifest(url, content_type=''):
+    """判断地址是否为 HLS/DASH 播放列表"""
+    path = (url or '').split('?')[0].lower()
+    return (path.endswith(('.m3u8', '.mpd'))
+            or 'mpegurl' in (content_type or '') or 'dash+xml' in (content_type or ''))
+
+
+def parse_m3u8(text, base_url):
+    """解析 m3u8，返回 ('master', [(带宽, 分辨率高度, 地址)]) 或 ('media', 初始化分片, [Segment])"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or not lines[0].startswith('#EXTM3U'):
+        raise ValueError('不是有效的 m3u8 播放列表')
+
+    if any(line.startswith('#EXT-X-STREAM-INF') for line in lines):
+        variants = []
+        for i, line in enumerate(lines):
+            if line.startswith('#EXT-X-STREAM-INF') and i + 1 < len(lines):
+                attrs = _parse_attrs(line.split(':', 1)[1])
+                height = int(attrs.get('RESOLUTION', 'x0').split('x')[-1] or 0)
+                variants.append((int(attrs.get('BANDWIDTH', 0)), height, urljoin(base_url, lines[i + 1])))
+        return 'master', variants
+
+    if '#EXT-X-ENDLIST' not in lines:
+        raise ValueError('仅支持点播(VOD)播放列表，直播流没有 #EXT-X-ENDLIST')
+
+    init, segments = None, []
+    duration, byterange, next_offset = 0.0, None, 0
+    for line in lines:
+        if line.startswith('#EXT-X-KEY'):
+            method = _parse_attrs(line.split(':', 1)[1]).get('METHOD', 'NONE')
+            if method != 'NONE':
+                raise ValueError(f'暂不支持加密分片 ({method})')
+        elif line.startswith('#EXT-X-MAP'):
+            attrs = _parse_attrs(line.split(':', 1)[1])
+            init_range = None
+            if 'BYTERANGE' in attrs:
+                length, _, offset = attrs['BYTERANGE'].partition('@')
+                init_range = (int(offset or 0), int(offset or 0) + int(length) - 1)
+            init = Segment(-1, urljoin(base_url, attrs['URI']), init_range)
+        elif line.startswith('#EXTINF'):
+            duration = float(line.split(':', 1)[1].split(',')[0] or 0)
+        elif line.startswith('#EXT-X-BYTERANGE'):
+            length, _, offset = line.split(':', 1)[1].partition('@')
+            start = int(offset) if offset else next_offset
+            byterange = (start, start + int(length) - 1)
+            next_offset = byterange[1] + 1
+        elif not line.startswith('#'):
+            segments.append(Segment(len(segments), urljoin(base_url, line), byterange, duration))
+            duration, byterange = 0.0, None
+    return 'media', init, segments
+
+
+def _iso_duration(value):
+    match = _DURATION_RE.fullmatch(value or '')
+    if not match:
+        return 0.0
+    days, hours, minutes, seconds = match.groups()
+    return (int(days or 0) * 86400 + int(hours or 0) * 3600
+            + int(minutes or 0) * 60 + float(seconds or 0))
+
+
+def _fill_template(template, rep_id, bandwidth, number=None, time_=None):
+    def repl(match):
+        name, width = match.group(1), match.group(2)
+        value = {'RepresentationID': rep_id, 'Bandwidth': bandwidth,
+                 'Number': number, 'Time': time_}[name]
+        return str(value).zfill(int(width)) if width else str(value)
+    return _TEMPLATE_RE.sub(repl, template)
+
+
+def _find_inherited(path, *nodes):
+    """按 Representation -> AdaptationSet 的继承顺序查找子元素"""
+    for node in nodes:
+        el = node.find(path, _DASH_NS)
+        if el is not None:
+            return el
+    return None
+
+
+def parse_mpd(text, base_url):
+    """解析静态 DASH MPD，选取带宽最高的视频表示，返回 (初始化分片, [Segment])"""
+    root = ET.fromstring(text)
+    if root.get('type', 'static') != 'static':
+        raise ValueError('仅支持点播(static)类型的 MPD')
+    total = _iso_duration(root.get('mediaPresentationDuration'))
+    period = root.find('mpd:Period', _DASH_NS)
+    if period is None:
+        raise ValueError('MPD 中没有 Period')
+
+    def base(node, url):
+        el = node.find('mpd:BaseURL', _DASH_NS)
+        return urljoin(url, el.text.strip()) if el is not None and el.text else url
+
+    candidates = []
+    for aset in period.findall('mpd:AdaptationSet', _DASH_NS):
+        kind = aset.get('contentType') or aset.get('mimeType', '')
+        for rep in aset.findall('mpd:Representation', _DASH_NS):
+            rep_kind = kind or rep.get('mimeType', '')
+            if 'audio' in rep_kind:
+                continue
+            candidates.append((int(rep.get('bandwidth', 0)), aset, rep))
+    if not candidates:
+        raise ValueError('MPD 中没有视频表示')
+    _, aset, rep = max(candidates, key=lambda c: c[0])
+
+    url = base(rep, base(aset, base(period, base(root, base_url))))
+    rep_id, bandwidth = rep.get('id', ''), rep.get('bandwidth', '0')
+    template = _find_inherited('mpd:SegmentTemplate', rep, aset)
+    seg_list = _find_inherited('mpd:SegmentList', rep, aset)
+
+    if template is not None:
+        init = None
+        if template.get('initialization'):
+            init = Segment(-1, urljoin(url, _fill_template(template.get('initialization'), rep_id, bandwidth)))
+        media = template.get('media')
+        start_number = int(template.get('startNumber', 1))
+        timescale = int(template.get('timescale', 1))
+        timeline = template.find('mpd:SegmentTimeline', _DASH_NS)
+        segments = []
+        if timeline is not None:
+            t, number = 0, start_number
+            for s in timeline.findall('mpd:S', _DASH_NS):
+                t = int(s.get('t', t))
+                d = int(s.get('d'))
+                for _ in range(int(s.get('r', 0)) + 1):
+                    seg_url = urljoin(url, _fill_template(media, rep_id, bandwidth, number, t))
+                    segments.append(Segment(len(segments), seg_url, duration=d / timescale))
+                    t += d
+                    number += 1
+        else:
+            seg_duration = int(template.get('duration', 0)) / timescale
+            if not seg_duration or not total:
+                raise ValueError('SegmentTemplate 缺少分片时长或总时长')
+            count = int(-(-total // seg_duration))
+            for i in range(count):
+                seg_url = urljoin(url, _fill_template(media, rep_id, bandwidth, start_number + i))
+                segments.append(Segment(i, seg_url, duration=seg_duration))
+        return init, segments
+
+    if seg_list is not None:
+        init_el = seg_list.find('mpd:Initialization', _DASH_NS)
+        init = Segment(-1, urljoin(url, init_el.get('sourceURL'))) if init_el is not None else None
+        segments = [Segment(i, urljoin(url, el.get('media')))
+                    for i, el in enumerate(seg_list.findall('mpd:SegmentURL', _DASH_NS))]
+        return init, segments
+
+    # 单文件表示，整体作为一个分片
+    return None, [Segment(0, url, duration=total)]
+
+
+class StreamFetcher:
+    """并行下载播放列表分片，按序写入输出文件，内存占用受预取窗口限制"""
+
+    def __init__(self, session, workers=4, window=8, timeout=30, max_retries=3, max_height=1080):
+        self.session = session
+        self.workers = max(1, workers)
+        self.window = max(self.workers, window)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_height = max_height
+
+    def resolve(self, url, headers=None):
+        """获取并解析播放列表，返回 (初始化分片, [Segment])"""
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        text, final_url = response.text, response.url or url
+        if text.lstrip().startswith('<') or final_url.split('?')[0].endswith('.mpd'):
+            return parse_mpd(text, final_url)
+
+        parsed = parse_m3u8(text, final_url)
+        if parsed[0] == 'master':
+            variants = parsed[1]
+            fitting = [v for v in variants if not v[1] or v[1] <= self.max_height] or variants
+            return self.resolve(max(fitting)[2], headers)
+        return parsed[1], parsed[2]
+
+    def fetch_segment(self, segment, headers=None, cancel=None):
+        """下载单个分片，失败时只重试该分片"""
+        headers = dict(headers or {})
+        if segment.byterange:
+            headers['Range'] = 'bytes=%d-%d' % segment.byterange
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.get(segment.url, headers=headers, timeout=self.timeout)
+                response.raise_for_status()
+                return response.content
+            except Exception:
+                if attempt == self.max_retries or (cancel and cancel.is_set()):
+                    raise
+                # 退避期间取消立即返回
+                delay = min(0.5 * 2 ** attempt, 8)
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    raise InterruptedError('分片下载已取消')
+
+    def download(self, url, dest, headers=None, progress=None, cancel=None):
+        """下载整个点播流到 dest，返回 {'path', 'size', 'segments', 'duration', 'elapsed'}
+
+        progress(已完成分片数, 分片总数, 已写入字节, 字节/秒) 在调用线程中回调。
+        内容先写入 dest + '.part'，成功后替换为 dest；失败或取消时删除临时文件。
+        """
+        cancel = cancel or threading.Event()
+        start_time = time.monotonic()
+        init, segments = self.resolve(url, headers)
+        if not segments:
+            raise ValueError('播放列表中没有分片')
+
+        part = dest + PART_SUFFIX
+        try:
+            written = self._write_segments(part, init, segments, headers, progress, cancel)
+        except BaseException:
+            try:
+                os.remove(part)
+            except OSError:
+                pass
+            raise
+        os.replace(part, dest)
+
+        return {
+            'path': dest,
+            'size': written,
+            'segments': len(segments),
+            'duration': sum(s.duration for s in segments),
+            'elapsed': time.monotonic() - start_time,
+        }
+
+    def _write_segments(self, path, init, segments, headers, progress, cancel):
+        """按序写出全部分片，返回写入字节数"""
+        written = 0
+        samples = deque(maxlen=16)
+        with open(path, 'wb') as out, \
+                ThreadPoolExecutor(self.workers, thread_name_prefix='vp-hls') as pool:
+            if init is not None:
+                written += out.write(self.fetch_segment(init, headers, cancel))
+
+            pending = deque()
+            queue = iter(segments)
+
+            def refill():
+                while len(pending) < self.window:
+                    segment = next(queue, None)
+                    if segment is None:
+                        return
+                    pending.append(pool.submit(self.fetch_segment, segment, headers, cancel))
+
+            refill()
+            done = 0
+            try:
+                while pending:
+                    if cancel.is_set():
+                        raise InterruptedError('分片下载已取消')
+                    data = pending.popleft().result()
+                    written += out.write(data)
+                    done += 1
+                    del data
+                    refill()
+                    samples.append((time.monotonic(), written))
+                    if progress:
+                        (t0, b0), (t1, b1) = samples[0], samples[-1]
+                        speed = (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+                        progress(done, len(segments), written, speed)
+            finally:
+                for future in pending:
+                    future.cancel()
+        return written
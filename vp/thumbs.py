@@ -0,0 +1,254 @@
+"""缩略图本地代理缓存：每张图只从上游获取一次，用 cv2 缩放到展示宽度后按内容哈希落盘
+
+磁盘占用按 LRU 淘汰到容量上限；同一缩略图的并发请求合并为一次获取。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+
+from vp.urls import canonical_url
+
+DISPLAY_WIDTHS = (200, 320)
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+FAILURE_TTL = 60
+JPEG_QUALITY = 85
+INDEX_FILE = 'index.json'
+
+
+def _cv2():
+    import cv2
+    return cv2
+
+
+def resize_image(data, widths=DISPLAY_WIDTHS, quality=JPEG_QUALITY):
+    """解码原图并缩放到各展示宽度（不放大），返回 {宽度: jpeg字节}"""
+    cv2 = _cv2()
+    import numpy as np
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("无法解码图片")
+    height, width = image.shape[:2]
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    resized = {}
+    for target in widths:
+        if width > target:
+            scaled = cv2.resize(image, (target, max(1, round(height * target / width))),
+                                interpolation=cv2.INTER_AREA)
+        else:
+            scaled = image
+        resized[target] = cv2.imencode('.jpg', scaled, params)[1].tobytes()
+    return resized
+
+
+@lru_cache(maxsize=16)
+def placeholder_image(width=200, height=150, text="Thumbnail"):
+    """本地生成的占位图，替代 via.placeholder.com"""
+    cv2 = _cv2()
+    import numpy as np
+    image = np.full((height, width, 3), 204, np.uint8)
+    scale = width / 400
+    (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 1)
+    cv2.putText(image, text, ((width - text_w) // 2, (height + text_h) // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, scale, (102, 102, 102), 1, cv2.LINE_AA)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+class ThumbnailCache:
+    """内容寻址的缩略图磁盘缓存
+
+    索引 (规范化URL, 宽度) -> 内容哈希；文件按内容哈希存放，相同图片只存一份。
+    """
+
+    def __init__(self, session, directory="temp/thumbs", max_bytes=100 * 1024 * 1024,
+                 widths=DISPLAY_WIDTHS, timeout=15):
+        self.session = session
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.widths = tuple(widths)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._index = {}
+        self._files = OrderedDict()  # 内容哈希 -> 字节数，按最近使用排序
+        self._bytes = 0
+        self._inflight = {}
+        self._failures = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.errors = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def get(self, url, width=DISPLAY_WIDTHS[0]):
+        """返回缩略图 jpeg 字节；获取失败返回 None"""
+        if not url:
+            return None
+        if width not in self.widths:
+            width = min(self.widths, key=lambda w: abs(w - width))
+        key = canonical_url(url)
+        with self._lock:
+            data = self._read(key, width)
+            if data is not None:
+                self.hits += 1
+                return data
+            self.misses += 1
+            if self._failures.get(key, 0) > time.monotonic():
+                return None
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                future.set_result(self._fetch(url, key))
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self._failures[key] = time.monotonic() + FAILURE_TTL
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        try:
+            return future.result()[width]
+        except Exception:
+            return None
+
+    def resize(self, max_bytes):
+        """调整磁盘容量上限，超出部分立即淘汰"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+            self._save()
+
+    def clear(self):
+        """删除全部缓存文件"""
+        with self._lock:
+            for digest in list(self._files):
+                self._delete(digest)
+            self._index.clear()
+            self._failures.clear()
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'files': len(self._files),
+                'urls': len({key for key, _ in self._index}),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'fetches': self.fetches,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'errors': self.errors,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def _fetch(self, url, key):
+        """从上游获取原图（带大小上限），缩放到全部展示宽度并落盘"""
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise ValueError(f"图片超过 {MAX_IMAGE_BYTES // 1024 // 1024} MB 上限")
+                chunks.append(chunk)
+        resized = resize_image(b''.join(chunks), self.widths)
+        with self._lock:
+            self.fetches += 1
+            for width, data in resized.items():
+                self._index[(key, width)] = self._write(data)
+            self._shrink()
+            self._save()
+        return resized
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.jpg")
+
+    def _read(self, key, width):
+        digest = self._index.get((key, width))
+        if digest is None or digest not in self._files:
+            return None
+        try:
+            with open(self._path(digest), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._forget(digest)
+            return None
+        self._files.move_to_end(digest)
+        return data
+
+    def _write(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self._files:
+            self._files.move_to_end(digest)
+            return digest
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._files[digest] = len(data)
+        self._bytes += len(data)
+        return digest
+
+    def _shrink(self):
+        while self._bytes > self.max_bytes and self._files:
+            self._delete(next(iter(self._files)))
+            self.evictions += 1
+
+    def _delete(self, digest):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+        self._forget(digest)
+
+    def _forget(self, digest):
+        size = self._files.pop(digest, None)
+        if size is not None:
+            self._bytes -= size
+        for index_key in [k for k, v in self._index.items() if v == digest]:
+            del self._index[index_key]
+
+    def _save(self):
+        """持久化索引与 LRU 顺序，重启后继续使用已落盘的缩略图"""
+        payload = {
+            'files': list(self._files.items()),
+            'index': [[key, width, digest] for (key, width), digest in self._index.items()],
+        }
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _load(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for digest, size in payload.get('files', []):
+            if os.path.exists(self._path(digest)):
+                self._files[digest] = size
+                self._bytes += size
+        for key, width, digest in payload.get('index', []):
+            if digest in self._files:
+                self._index[(key, width)] = digest
+        self._shrink()
@@ -0,0 +1,233 @@
+"""URL列表文件的流式导入：逐行读取 TXT/CSV，按平台规则规范化，用布隆过滤器在固定内存内去重
+
+UrlImport 是惰性可迭代对象，批量任务逐个取出URL时才读取下一行，文件不会整体拆分成列表；
+去重键为 canonical_url 的结果，同一视频的不同链接形式（短链、带追踪参数等）只保留第一次出现；
+产出的是文件中的原始URL，规范化只用于去重，提取时仍请求用户提供的链接。
+布隆过滤器的内存由预期条数与误判率决定，与文件行数无关；误判会把极少数新URL当作重复丢弃。
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import math
+import os
+import re
+import time
+
+from vp.registry import split_url
+from vp.urls import canonical_url
+
+# CSV 表头中视为URL列的名称（小写比较）
+URL_HEADERS = ('url', 'urls', 'link', 'links', 'href', 'video_url', 'webpage_url', '链接', '视频链接', '网址', '地址')
+# 未指定预期条数时按平均每行字节数从文件大小估算
+BYTES_PER_LINE = 32
+MIN_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.001
+_SPACE_RE = re.compile(r'\s')
+
+
+class BloomFilter:
+    """固定大小的布隆过滤器，按预期条数与误判率确定位数组大小和哈希次数"""
+
+    def __init__(self, capacity=1_000_000, error_rate=DEFAULT_ERROR_RATE):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+    @staticmethod
+    def _hash(key):
+        # 双重哈希：一次 blake2b 摘要拆成两个 64 位值，第 i 个位置为 h1 + i*h2
+        digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest(), 'little')
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, key):
+        """加入 key；此前(可能)已存在时返回 False"""
+        h1, h2 = self._hash(key)
+        bits, size = self._bits, self.size
+        added = False
+        for _ in range(self.hashes):
+            position = h1 % size
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+            h1 += h2
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, key):
+        h1, h2 = self._hash(key)
+        bits, size = self._bits, self.size
+        for _ in range(self.hashes):
+            position = h1 % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            h1 += h2
+        return True
+
+
+class ImportStats:
+    """导入进度统计，工作线程更新、页面线程读取"""
+
+    def __init__(self):
+        self.lines = 0
+        self.urls = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def lines_per_sec(self):
+        elapsed = self.elapsed
+        return self.lines / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def dedupe_ratio(self):
+        """重复URL占全部有效URL的比例"""
+        seen = self.urls + self.duplicates
+        return self.duplicates / seen if seen else 0.0
+
+    def summary(self):
+        return (f"已读取 {self.lines:,} 行（{self.lines_per_sec:,.0f} 行/秒），"
+                f"有效URL {self.urls:,} 个，去除重复 {self.duplicates:,} 个（去重率 {self.dedupe_ratio:.1%}），"
+                f"无效行 {self.invalid:,}")
+
+
+def looks_like_url(url):
+    """主机名包含点号（或为 localhost/IP 字面量）且不含空白时视为URL"""
+    host = split_url(url)[0]
+    if not host or _SPACE_RE.search(host):
+        return False
+    return '.' in host or host == 'localhost' or host.startswith('[')
+
+
+def _detect_encoding(raw):
+    """按文件开头判断编码：UTF-8(含BOM) 或中文 Excel 常见的 GB18030"""
+    head = raw.read(65536)
+    raw.seek(0)
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # 末尾被截断的多字节字符不算解码失败
+        if e.start < len(head) - 3:
+            return 'gb18030'
+    return 'utf-8'
+
+
+class UrlImport:
+    """惰性的URL导入过程：迭代时逐行读取、按规范化形式去重并产出原始URL，stats 随迭代实时更新
+
+    source 可以是文件路径或二进制文件对象（如 Streamlit 的 UploadedFile）；只能迭代一次。
+    """
+
+    def __init__(self, source, name=None, size=None, csv_mode=None, capacity=None,
+                 error_rate=DEFAULT_ERROR_RATE):
+        self.source = source
+        self.name = name or getattr(source, 'name', None) or str(source)
+        self.size = size if size is not None else self._source_size(source)
+        self.csv_mode = self.name.lower().endswith('.csv') if csv_mode is None else csv_mode
+        if capacity is None:
+            capacity = max(MIN_CAPACITY, (self.size or 0) // BYTES_PER_LINE)
+        self.seen = BloomFilter(capacity, error_rate)
+        self.stats = ImportStats()
+        self._raw = None
+
+    @staticmethod
+    def _source_size(source):
+        if isinstance(source, str):
+            return os.path.getsize(source)
+        try:
+            position = source.tell()
+            size = source.seek(0, io.SEEK_END)
+            source.seek(position)
+            return size
+        except (AttributeError, OSError):
+            return None
+
+    @property
+    def progress(self):
+        """按已读取字节估算的进度（0~1），大小未知时返回 0"""
+        if not self.size or self._raw is None:
+            return 0.0
+        try:
+            return min(1.0, self._raw.tell() / self.size)
+        except (ValueError, OSError):
+            # 文件已关闭即读取完成
+            return 1.0
+
+    def __iter__(self):
+        if self.stats.started is not None:
+            raise RuntimeError("UrlImport 只能迭代一次")
+        self.stats.started = time.perf_counter()
+        owned = isinstance(self.source, str)
+        raw = open(self.source, 'rb') if owned else self.source
+        if not owned:
+            raw.seek(0)
+        self._raw = raw
+        text = io.TextIOWrapper(raw, encoding=_detect_encoding(raw), errors='replace', newline='')
+        try:
+            candidates = self._csv_cells(text) if self.csv_mode else self._txt_cells(text)
+            stats, seen = self.stats, self.seen
+            for cell in candidates:
+                if not cell or not looks_like_url(cell):
+                    stats.invalid += 1
+                    continue
+                if seen.add(canonical_url(cell)):
+                    stats.urls += 1
+                    yield cell
+                else:
+                    stats.duplicates += 1
+        finally:
+            self.stats.finished = time.perf_counter()
+            # 上传文件对象由 Streamlit 管理，只关闭自己打开的文件
+            if owned:
+                text.close()
+            else:
+                text.detach()
+
+    def _txt_cells(self, text):
+        """每行取第一个空白分隔的字段，空行与 # 注释行只计入行数"""
+        stats = self.stats
+        for line in text:
+            stats.lines += 1
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line.split(None, 1)[0]
+
+    def _csv_cells(self, text):
+        """有URL表头时取该列，否则取每行第一个像URL的单元格"""
+        stats = self.stats
+        column = None
+        for row_number, row in enumerate(csv.reader(text)):
+            stats.lines += 1
+            if not row:
+                continue
+            if row_number == 0:
+                headers = [cell.strip().lower() for cell in row]
+                column = next((i for i, h in enumerate(headers) if h in URL_HEADERS), None)
+                if column is not None or not any(looks_like_url(cell.strip()) for cell in row):
+                    # 表头行不计入无效行
+                    continue
+            if column is not None:
+                yield row[column].strip() if column < len(row) else ''
+            else:
+                yield next((cell.strip() for cell in row if looks_like_url(cell.strip())), '')
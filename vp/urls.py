@@ -0,0 +1,35 @@
+"""URL规范化：同一视频的不同链接形式映射为同一个键"""
+
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from vp.registry import REGISTRY
+
+_TRACKING_PARAMS = re.compile(r'^(?:utm_\w+|spm_id_from|share_\w+|fbclid|gclid)$')
+
+
+def canonical_url(url):
+    """返回规范化的URL，用作缓存与去重的键"""
+    if not url or not isinstance(url, str):
+        return ''
+    url = url.strip()
+    canonical = REGISTRY.canonical(url)
+    if canonical:
+        return canonical
+
+    if '://' not in url:
+        url = 'https://' + url
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    netloc = host
+    if port and not (scheme == 'http' and port == 80 or scheme == 'https' and port == 443):
+        netloc = f'{host}:{port}'
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _TRACKING_PARAMS.match(k))
+    return urlunsplit((scheme, netloc, parts.path or '/', urlencode(query), ''))
@@ -0,0 +1,282 @@
+"""常驻 youtube-dl 提取进程池：每个进程持有预热的 YoutubeDL 实例"""
+
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from vp.retry import classify
+
+DEFAULT_YDL_OPTS = {
+    'format': 'best[height<=1080]',
+    'outtmpl': 'downloads/%(title)s.%(ext)s',
+    'quiet': True,
+    'no_warnings': True,
+}
+
+
+class WorkerError(Exception):
+    """子进程中提取失败；保留错误分类信息供重试策略使用"""
+
+    def __init__(self, message, error_type='', retryable=False, status=None, retry_after=None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.retryable = retryable
+        self.status = status
+        self.headers = {'Retry-After': str(int(retry_after))} if retry_after else None
+
+
+class WorkerTimeout(TimeoutError):
+    """单次提取超时，对应的工作进程已被终止并重启"""
+
+
+def youtube_dl_extractor(opts=None):
+    """默认提取器工厂：在子进程中创建一次 YoutubeDL 并复用"""
+    import youtube_dl
+
+    ydl = youtube_dl.YoutubeDL(dict(DEFAULT_YDL_OPTS, **(opts or {})))
+
+    def extract(url):
+        return ydl.extract_info(url, download=False)
+
+    return extract
+
+
+def _current_rss():
+    """当前进程常驻内存(字节)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _worker_main(conn, factory, factory_kwargs):
+    """子进程主循环：预热提取器后逐个处理请求"""
+    try:
+        extract = factory(**(factory_kwargs or {}))
+        conn.send(('ready', None, _current_rss()))
+    except Exception as e:
+        conn.send(('error', (f'{type(e).__name__}: {e}', type(e).__name__, False, None, None), 0))
+        return
+    while True:
+        try:
+            url = conn.recv()
+        except EOFError:
+            return
+        if url is None:
+            return
+        try:
+            conn.send(('ok', extract(url), _current_rss()))
+        except Exception as e:
+            retryable, retry_after, status = classify(e)
+            conn.send(('error', (str(e), type(e).__name__, retryable, status, retry_after), _current_rss()))
+
+
+class _Worker:
+    """父进程侧的工作进程句柄与统计"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.id = next(self._ids)
+        self.process = None
+        self.conn = None
+        self.jobs_since_start = 0
+        self.started_at = None
+        self.rss = 0
+        self.stats = {'jobs': 0, 'errors': 0, 'timeouts': 0, 'recycles': 0, 'latency_total': 0.0}
+        self.latencies = deque(maxlen=200)
+
+    def start(self):
+        ctx = self.pool._ctx
+        parent, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, name=f'vp-ydl-{self.id}', daemon=True,
+                                   args=(child, self.pool.factory, self.pool.factory_kwargs))
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self.jobs_since_start = 0
+        self.started_at = time.monotonic()
+        if not parent.poll(self.pool.startup_timeout):
+            self.kill()
+            raise WorkerTimeout('提取进程启动超时')
+        status, payload, rss = parent.recv()
+        if status != 'ready':
+            self.kill()
+            raise WorkerError(*payload)
+        self.rss = rss
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(2)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+        self.process = None
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.join(2)
+            self.conn.close()
+            self.process = None
+
+    def needs_recycle(self):
+        pool = self.pool
+        return (self.jobs_since_start >= pool.max_jobs
+                or (pool.max_rss and self.rss > pool.max_rss))
+
+    def run(self, url, timeout):
+        """在该进程中执行一次提取"""
+        if self.process is None or not self.process.is_alive():
+            self.start()
+        start = time.monotonic()
+        self.conn.send(url)
+        if not self.conn.poll(timeout):
+            self.kill()
+            self.stats['timeouts'] += 1
+            raise WorkerTimeout(f'提取超时({timeout}秒): {url}')
+        try:
+            status, payload, rss = self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            self.stats['errors'] += 1
+            raise WorkerError('提取进程异常退出', 'WorkerCrash', retryable=True)
+        elapsed = time.monotonic() - start
+        self.rss = rss
+        self.jobs_since_start += 1
+        self.stats['jobs'] += 1
+        self.stats['latency_total'] += elapsed
+        self.latencies.append(elapsed)
+        if status != 'ok':
+            self.stats['errors'] += 1
+            raise WorkerError(*payload)
+        return payload
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        jobs = self.stats['jobs']
+        return {
+            'worker': self.id,
+            'pid': self.process.pid if self.process else None,
+            'alive': bool(self.process and self.process.is_alive()),
+            'jobs': jobs,
+            'errors': self.stats['errors'],
+            'timeouts': self.stats['timeouts'],
+            'recycles': self.stats['recycles'],
+            'jobs_since_start': self.jobs_since_start,
+            'throughput': round(self.jobs_since_start / uptime, 2) if uptime else 0.0,
+            'latency_avg': round(self.stats['latency_total'] / jobs, 3) if jobs else 0.0,
+            'latency_p50': round(pct(0.5), 3),
+            'latency_p95': round(pct(0.95), 3),
+            'rss_mb': round(self.rss / 1024 / 1024, 1),
+        }
+
+
+class ExtractorPool:
+    """提取进程池：请求排队，空闲进程取任务执行，按任务数或内存回收进程"""
+
+    def __init__(self, size=2, factory=youtube_dl_extractor, factory_kwargs=None,
+                 max_jobs=200, max_rss_mb=512, timeout=60, startup_timeout=60):
+        self.size = max(1, size)
+        self.factory = factory
+        self.factory_kwargs = factory_kwargs
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._ctx = multiprocessing.get_context('spawn')
+        self._requests = queue.Queue()
+        self._workers = [_Worker(self) for _ in range(self.size)]
+        self._threads = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动工作进程与调度线程"""
+        with self._lock:
+            if self._threads:
+                return self
+            for worker in self._workers:
+                thread = threading.Thread(target=self._dispatch, args=(worker,), daemon=True,
+                                          name=f'vp-ydl-dispatch-{worker.id}')
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.close)
+        return self
+
+    def _dispatch(self, worker):
+        """调度线程：把排队的请求交给对应的工作进程"""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            url, timeout, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(worker.run(url, timeout))
+            except Exception as e:
+                future.set_exception(e)
+            if worker.process is not None and worker.needs_recycle():
+                # 回收后立即预热新进程，避免下一个请求承担启动开销
+                worker.stop()
+                worker.stats['recycles'] += 1
+                try:
+                    worker.start()
+                except Exception:
+                    pass
+        worker.stop()
+
+    def submit(self, url, timeout=None):
+        """提交提取请求，返回 Future"""
+        if self._closed:
+            raise RuntimeError('提取进程池已关闭')
+        self.start()
+        future = Future()
+        self._requests.put((url, timeout or self.timeout, future))
+        return future
+
+    def extract(self, url, timeout=None):
+        """阻塞执行一次提取；执行超时由工作进程强制，调用方额外等待排队与进程启动"""
+        timeout = timeout or self.timeout
+        future = self.submit(url, timeout)
+        try:
+            return future.result(timeout=timeout * 2 + self.startup_timeout)
+        except FutureTimeout:
+            if future.done():
+                raise
+            future.cancel()
+            raise WorkerTimeout(f'提取请求排队超时: {url}')
+
+    def stats(self):
+        """各工作进程的吞吐与延迟统计"""
+        return [worker.snapshot() for worker in self._workers]
+
+    def close(self):
+        """停止所有工作进程"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._requests.put(None)
+        for thread in self._threads:
+            thread.join(5)